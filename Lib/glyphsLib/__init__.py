@@ -21,14 +21,19 @@ import collections
 import os
 import logging
 
+import defcon
 from fontTools.misc.py23 import tostr
 
 from glyphsLib.classes import __all__ as __all_classes__
 from glyphsLib.classes import *
 from glyphsLib.builder import to_ufos, to_designspace, to_glyphs
+from glyphsLib.builder.streaming import StreamingUFOModule
 from glyphsLib.parser import load, loads
 from glyphsLib.writer import dump, dumps
+from glyphsLib.diffing import diff
+from glyphsLib.merging import merge
 from glyphsLib.util import clean_ufo, ufo_create_background_layer_for_all_glyphs
+from glyphsLib import profiling
 
 try:
     from ._version import version as __version__
@@ -41,7 +46,7 @@ except ImportError:
 # https://bugs.python.org/issue21720
 __all__ = [tostr(s) for s in [
     "build_masters", "build_instances", "load_to_ufos",
-    "load", "loads", "dump", "dumps",
+    "load", "loads", "dump", "dumps", "diff", "merge",
  ] + __all_classes__]
 
 logger = logging.getLogger(__name__)
@@ -72,7 +77,9 @@ def build_masters(filename,
                   propagate_anchors=True,
                   minimize_glyphs_diffs=False,
                   normalize_ufos=False,
-                  create_background_layers=False):
+                  create_background_layers=False,
+                  subset=None,
+                  stream=False):
     """Write and return UFOs from the masters and the designspace defined in a
     .glyphs file.
 
@@ -82,6 +89,13 @@ def build_masters(filename,
             written alongside the master UFOs though no instances will be built.
         family_name: If provided, the master UFOs will be given this name and
             only instances with this name will be included in the designspace.
+        subset: If provided, an iterable of glyph names. Only these glyphs and
+            the glyphs they use as components are written to the masters.
+        stream: If True, the glyphs are written to disk as soon as they are
+            converted, instead of building whole defcon fonts in memory and
+            saving them at the end. The returned UFOs are then light objects
+            that only keep stubs of most glyphs. See
+            glyphsLib.builder.streaming.
 
     Returns:
         A named tuple of master UFOs (`ufos`) and the path to the designspace
@@ -95,30 +109,46 @@ def build_masters(filename,
     else:
         instance_dir = os.path.relpath(designspace_instance_dir, master_dir)
 
-    designspace = to_designspace(
-        font,
-        family_name=family_name,
-        propagate_anchors=propagate_anchors,
-        instance_dir=instance_dir,
-        minimize_glyphs_diffs=minimize_glyphs_diffs)
-
-    ufos = []
-    for source in designspace.sources:
-        ufos.append(source.font)
-
-        if create_background_layers:
-            ufo_create_background_layer_for_all_glyphs(source.font)
-
-        ufo_path = os.path.join(master_dir, source.filename)
-        clean_ufo(ufo_path)
-        source.font.save(ufo_path)
-
-        if normalize_ufos:
-            import ufonormalizer
-            ufonormalizer.normalizeUFO(ufo_path, writeModTimes=False)
+    if stream:
+        ufo_module = StreamingUFOModule(master_dir)
+    else:
+        ufo_module = defcon
+
+    try:
+        designspace = to_designspace(
+            font,
+            family_name=family_name,
+            propagate_anchors=propagate_anchors,
+            instance_dir=instance_dir,
+            ufo_module=ufo_module,
+            minimize_glyphs_diffs=minimize_glyphs_diffs,
+            subset=subset)
+
+        ufos = []
+        # The sources are in the same order as the masters
+        for master, source in zip(font.masters, designspace.sources):
+            ufos.append(source.font)
+
+            if create_background_layers:
+                ufo_create_background_layer_for_all_glyphs(source.font)
+
+            ufo_path = os.path.join(master_dir, source.filename)
+            with profiling.stage('save', master.id):
+                clean_ufo(ufo_path)
+                source.font.save(ufo_path)
+
+            if normalize_ufos:
+                import ufonormalizer
+                with profiling.stage('normalize', master.id):
+                    ufonormalizer.normalizeUFO(ufo_path, writeModTimes=False)
+    finally:
+        if stream:
+            # Don't leave temporary UFOs behind if the conversion failed
+            ufo_module.discard()
 
     if not designspace_path:
         designspace_path = os.path.join(master_dir, designspace.filename)
-    designspace.write(designspace_path)
+    with profiling.stage('save'):
+        designspace.write(designspace_path)
 
     return Masters(ufos, designspace_path)
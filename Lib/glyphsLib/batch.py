@@ -0,0 +1,127 @@
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Convert many .glyphs files to UFO masters with a pool of processes.
+
+Starting Python, importing glyphsLib, defcon and fontTools and loading the
+glyph data take about a second, which adds up when converting hundreds of
+files one `glyphs2ufo` at a time. `build_masters_batch` pays for it once per
+worker process instead, and hands out the files largest first so that the
+workers finish at about the same time:
+
+    for result in build_masters_batch(jobs, processes=8):
+        print(result.status, result.seconds, result.job.glyphs_file)
+"""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import collections
+import io
+import multiprocessing
+import os
+import time
+import traceback
+
+__all__ = ['BatchJob', 'BatchResult', 'build_masters_batch', 'read_manifest']
+
+# The arguments of build_masters that change from one file to the other
+BatchJob = collections.namedtuple('BatchJob', [
+    'glyphs_file', 'master_dir', 'designspace_instance_dir',
+    'designspace_path'])
+
+# `status` is 'ok' or 'failed', `error` the formatted traceback of a failure
+BatchResult = collections.namedtuple('BatchResult', [
+    'job', 'status', 'seconds', 'error'])
+
+
+def read_manifest(path):
+    """Return the .glyphs file paths listed in the manifest file `path`.
+
+    The manifest lists one path per line, relative to the directory of the
+    manifest. Empty lines and lines starting with '#' are skipped.
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+    paths = []
+    with io.open(path, encoding='utf-8') as fp:
+        for line in fp:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                paths.append(os.path.join(base_dir, line))
+    return paths
+
+
+def build_masters_batch(jobs, processes=None, **kwargs):
+    """Run `glyphsLib.build_masters` on each BatchJob of `jobs`, with the
+    other keyword arguments of build_masters given in `kwargs`.
+
+    The jobs are run in a pool of `processes` worker processes (by default,
+    one per CPU), largest .glyphs file first, or in the current process if
+    `processes` is 1. Yield a BatchResult for each job as soon as it is done.
+    A failed job does not stop the others.
+    """
+    jobs = sorted(jobs, key=_file_size, reverse=True)
+    tasks = [(job, kwargs) for job in jobs]
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    processes = min(processes, len(tasks))
+    if processes <= 1:
+        for task in tasks:
+            yield _run(task)
+        return
+
+    pool = multiprocessing.Pool(processes, initializer=_warm_up)
+    try:
+        # chunksize=1 so that the largest files start first
+        for result in pool.imap_unordered(_run, tasks, chunksize=1):
+            yield result
+        pool.close()
+    except BaseException:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+
+def _file_size(job):
+    try:
+        return os.path.getsize(job.glyphs_file)
+    except OSError:
+        # Missing files fail quickly, let them go last
+        return -1
+
+
+def _warm_up():
+    """Do the expensive imports and loading before the first job."""
+    import glyphsLib.builder  # noqa: F401
+    from glyphsLib import glyphdata
+    glyphdata.get_glyph('A')
+    try:
+        import ufonormalizer  # noqa: F401
+    except ImportError:
+        pass
+
+
+def _run(task):
+    job, kwargs = task
+    import glyphsLib
+    start = time.time()
+    try:
+        glyphsLib.build_masters(
+            job.glyphs_file, job.master_dir, job.designspace_instance_dir,
+            designspace_path=job.designspace_path, **kwargs)
+    except Exception:
+        return BatchResult(job, 'failed', time.time() - start,
+                           traceback.format_exc())
+    return BatchResult(job, 'ok', time.time() - start, None)
@@ -29,7 +29,9 @@ def to_ufos(font,
             family_name=None,
             propagate_anchors=True,
             ufo_module=defcon,
-            minimize_glyphs_diffs=False):
+            minimize_glyphs_diffs=False,
+            subset=None,
+            bulk=True):
     """Take a GSFont object and convert it into one UFO per master.
 
     Takes in data as Glyphs.app-compatible classes, as documented at
@@ -39,13 +41,22 @@ def to_ufos(font,
 
     If family_name is provided, the master UFOs will be given this name and
     only instances with this name will be returned.
+
+    If subset is provided, only the glyphs with these names (and the glyphs
+    they use as components) will be converted.
+
+    If bulk is False, the UFO objects post all their change notifications
+    while the glyphs are built, which is much slower on large fonts. See
+    UFOBuilder for details.
     """
     builder = UFOBuilder(
         font,
         ufo_module=ufo_module,
         family_name=family_name,
         propagate_anchors=propagate_anchors,
-        minimize_glyphs_diffs=minimize_glyphs_diffs)
+        minimize_glyphs_diffs=minimize_glyphs_diffs,
+        subset=subset,
+        bulk=bulk)
 
     result = list(builder.masters)
 
@@ -59,7 +70,9 @@ def to_designspace(font,
                    instance_dir=None,
                    propagate_anchors=True,
                    ufo_module=defcon,
-                   minimize_glyphs_diffs=False):
+                   minimize_glyphs_diffs=False,
+                   subset=None,
+                   bulk=True):
     """Take a GSFont object and convert it into a Designspace Document + UFOS.
     The UFOs are available as the attribute `font` of each SourceDescriptor of
     the DesignspaceDocument:
@@ -78,6 +91,13 @@ def to_designspace(font,
 
     If family_name is provided, the master UFOs will be given this name and
     only instances with this name will be returned.
+
+    If subset is provided, only the glyphs with these names (and the glyphs
+    they use as components) will be converted.
+
+    If bulk is False, the UFO objects post all their change notifications
+    while the glyphs are built, which is much slower on large fonts. See
+    UFOBuilder for details.
     """
     builder = UFOBuilder(
         font,
@@ -86,7 +106,9 @@ def to_designspace(font,
         instance_dir=instance_dir,
         propagate_anchors=propagate_anchors,
         use_designspace=True,
-        minimize_glyphs_diffs=minimize_glyphs_diffs)
+        minimize_glyphs_diffs=minimize_glyphs_diffs,
+        subset=subset,
+        bulk=bulk)
     return builder.designspace
 
 
@@ -26,83 +26,134 @@ __all__ = ['to_ufo_propagate_font_anchors']
 def to_ufo_propagate_font_anchors(self, ufo):
     """Copy anchors from parent glyphs' components to the parent."""
 
-    processed = set()
-    for glyph in ufo:
-        _propagate_glyph_anchors(self, ufo, glyph, processed)
+    # Anchors of the glyphs that have already been processed, indexed by name
+    indices = {}
+    for glyph in _depth_first_components_order(ufo):
+        _propagate_glyph_anchors(self, ufo, glyph, indices)
+        indices[glyph.name] = _AnchorIndex(glyph)
+
+
+def _depth_first_components_order(ufo):
+    """Yield the glyphs of the UFO so that each glyph comes after all the
+    glyphs that it uses as components.
+
+    This is the same order as a recursive depth-first walk of the component
+    graph, but done with an explicit stack so that deeply nested composites
+    don't hit the recursion limit. Components that form a cycle are yielded
+    before their parent, like the recursive walk would do.
+    """
+    visited = set()
+    for root in ufo:
+        if root.name in visited:
+            continue
+        visited.add(root.name)
+        stack = [(root, iter(root.components))]
+        while stack:
+            glyph, components = stack[-1]
+            for component in components:
+                name = component.baseGlyph
+                if name in visited or name not in ufo:
+                    continue
+                visited.add(name)
+                child = ufo[name]
+                stack.append((child, iter(child.components)))
+                break
+            else:
+                stack.pop()
+                yield glyph
+
+
+class _AnchorIndex(object):
+    """Anchors of one glyph, indexed for the lookups done by the propagation.
+    """
 
+    def __init__(self, glyph):
+        self.anchors = list(glyph.anchors)
+        self.by_name = {}
+        self.prefixes = set()
+        self.is_mark = False
+        for anchor in self.anchors:
+            name = anchor.name
+            self.by_name.setdefault(name, anchor)
+            self.prefixes.update(name[:i] for i in range(len(name) + 1))
+            if name.startswith('_'):
+                self.is_mark = True
 
-def _propagate_glyph_anchors(self, ufo, parent, processed):
-    """Propagate anchors for a single parent glyph."""
 
-    if parent.name in processed:
-        return
-    processed.add(parent.name)
+def _propagate_glyph_anchors(self, ufo, parent, indices):
+    """Propagate anchors for a single parent glyph.
+
+    All the components of the parent must have been processed already, except
+    for those that are part of a component cycle.
+    """
 
     base_components = []
     mark_components = []
     anchor_names = set()
     to_add = {}
     for component in parent.components:
-        try:
-            glyph = ufo[component.baseGlyph]
-        except KeyError:
+        name = component.baseGlyph
+        if name not in ufo:
             self.logger.warning(
                 'Anchors not propagated for inexistent component {} in glyph {}'.
-                format(component.baseGlyph, parent.name))
+                format(name, parent.name))
+            continue
+        index = indices.get(name)
+        if index is None:
+            # Part of a component cycle, use the anchors as they are now
+            index = _AnchorIndex(ufo[name])
+        transform = Transform(*component.transformation)
+        if index.is_mark:
+            mark_components.append((index, transform))
         else:
-            _propagate_glyph_anchors(self, ufo, glyph, processed)
-            if any(a.name.startswith('_') for a in glyph.anchors):
-                mark_components.append(component)
-            else:
-                base_components.append(component)
-                anchor_names |= {a.name for a in glyph.anchors}
+            base_components.append((index, transform))
+            anchor_names.update(index.by_name)
 
-    for anchor_name in anchor_names:
-        # don't add if parent already contains this anchor OR any associated
-        # ligature anchors (e.g. "top_1, top_2" for "top")
-        if not any(a.name.startswith(anchor_name) for a in parent.anchors):
-            _get_anchor_data(to_add, ufo, base_components, anchor_name)
+    if anchor_names:
+        parent_prefixes = _AnchorIndex(parent).prefixes
+        for anchor_name in anchor_names:
+            # don't add if parent already contains this anchor OR any
+            # associated ligature anchors (e.g. "top_1, top_2" for "top")
+            if anchor_name not in parent_prefixes:
+                _get_anchor_data(to_add, base_components, anchor_name)
 
-    for component in mark_components:
-        _adjust_anchors(to_add, ufo, component)
+    for index, transform in mark_components:
+        _adjust_anchors(to_add, index, transform)
 
     # we sort propagated anchors to append in a deterministic order
     for name, (x, y) in sorted(to_add.items()):
         anchor_dict = {'name': name, 'x': x, 'y': y}
-        parent.appendAnchor(glyph.anchorClass(anchorDict=anchor_dict))
+        parent.appendAnchor(parent.anchorClass(anchorDict=anchor_dict))
 
 
-def _get_anchor_data(anchor_data, ufo, components, anchor_name):
+def _get_anchor_data(anchor_data, components, anchor_name):
     """Get data for an anchor from a list of components."""
 
     anchors = []
-    for component in components:
-        for anchor in ufo[component.baseGlyph].anchors:
-            if anchor.name == anchor_name:
-                anchors.append((anchor, component))
-                break
+    for index, transform in components:
+        anchor = index.by_name.get(anchor_name)
+        if anchor is not None:
+            anchors.append((anchor, transform))
     if len(anchors) > 1:
-        for i, (anchor, component) in enumerate(anchors):
-            t = Transform(*component.transformation)
+        for i, (anchor, transform) in enumerate(anchors):
             name = '%s_%d' % (anchor.name, i + 1)
-            anchor_data[name] = t.transformPoint((anchor.x, anchor.y))
+            anchor_data[name] = transform.transformPoint((anchor.x, anchor.y))
     elif anchors:
-        anchor, component = anchors[0]
-        t = Transform(*component.transformation)
-        anchor_data[anchor.name] = t.transformPoint((anchor.x, anchor.y))
+        anchor, transform = anchors[0]
+        anchor_data[anchor.name] = transform.transformPoint(
+            (anchor.x, anchor.y))
 
 
-def _adjust_anchors(anchor_data, ufo, component):
+def _adjust_anchors(anchor_data, index, transform):
     """Adjust anchors to which a mark component may have been attached."""
 
-    glyph = ufo[component.baseGlyph]
-    t = Transform(*component.transformation)
-    for anchor in glyph.anchors:
+    for anchor in index.anchors:
         # only adjust if this anchor has data and the component also contains
         # the associated mark anchor (e.g. "_top" for "top")
         if (anchor.name in anchor_data and
-                any(a.name == '_' + anchor.name for a in glyph.anchors)):
-            anchor_data[anchor.name] = t.transformPoint((anchor.x, anchor.y))
+                '_' + anchor.name in index.by_name):
+            anchor_data[anchor.name] = transform.transformPoint(
+                (anchor.x, anchor.y))
 
 
 def to_ufo_glyph_anchors(self, glyph, anchors):
@@ -16,6 +16,7 @@ from __future__ import (print_function, division, absolute_import,
                         unicode_literals)
 
 from collections import OrderedDict, defaultdict
+from contextlib import contextmanager
 import logging
 import tempfile
 import os
@@ -25,13 +26,37 @@ import defcon
 
 from fontTools import designspaceLib
 
-from glyphsLib import classes, glyphdata_generated
+from glyphsLib import classes, glyphdata_generated, profiling
 from .constants import PUBLIC_PREFIX, GLYPHS_PREFIX, FONT_CUSTOM_PARAM_PREFIX
 from .axes import (WEIGHT_AXIS_DEF, WIDTH_AXIS_DEF, find_base_style,
                    class_to_value)
 
 GLYPH_ORDER_KEY = PUBLIC_PREFIX + 'glyphOrder'
 
+# The defcon notifications that only propagate dirty states and "something
+# changed" events up the object tree. Building a glyph posts dozens of them
+# (one per point added to a contour, for example), while nobody but the UFO
+# objects themselves observes the UFOs that the builder is filling.
+BULK_DISABLED_NOTIFICATIONS = (
+    'Anchor.Changed',
+    'Component.Changed',
+    'Contour.Changed',
+    'Contour.PointsChanged',
+    'Font.Changed',
+    'Glyph.AnchorsChanged',
+    'Glyph.Changed',
+    'Glyph.ComponentsChanged',
+    'Glyph.ContoursChanged',
+    'Glyph.LibChanged',
+    'Glyph.WidthChanged',
+    'Layer.Changed',
+    'Layer.GlyphChanged',
+    'Layer.LibChanged',
+    'LayerSet.Changed',
+    'LayerSet.LayerChanged',
+    'Lib.Changed',
+)
+
 
 class _LoggerMixin(object):
 
@@ -56,7 +81,9 @@ class UFOBuilder(_LoggerMixin):
                  instance_dir=None,
                  propagate_anchors=True,
                  use_designspace=False,
-                 minimize_glyphs_diffs=False):
+                 minimize_glyphs_diffs=False,
+                 subset=None,
+                 bulk=True):
         """Create a builder that goes from Glyphs to UFO + designspace.
 
         Keyword arguments:
@@ -76,6 +103,15 @@ class UFOBuilder(_LoggerMixin):
         minimize_glyphs_diffs -- set to True to store extra info in UFOs
                                  in order to get smaller diffs between .glyphs
                                  .glyphs files when going glyphs->ufo->glyphs.
+        subset -- if provided, an iterable of glyph names: only those glyphs
+                  and the glyphs that they use as components are converted,
+                  and the glyph order, groups and kerning are pruned to match.
+        bulk -- set to False to let the UFO objects post all their
+                notifications while the glyphs are built. By default, the
+                notifications that only report changes are disabled during
+                that stage, and the glyph order and dirty states are fixed up
+                once at the end (only for UFO objects with a defcon-like
+                notification dispatcher).
         """
         self.font = font
         self.ufo_module = ufo_module
@@ -84,6 +120,20 @@ class UFOBuilder(_LoggerMixin):
         self.propagate_anchors = propagate_anchors
         self.use_designspace = use_designspace
         self.minimize_glyphs_diffs = minimize_glyphs_diffs
+        self.bulk = bulk
+
+        # The names of the glyphs to convert, or None to convert all glyphs
+        self.subset = None
+        if subset is not None:
+            graph = font.componentGraph
+            unknown = [name for name in subset if name not in graph]
+            if unknown:
+                self.logger.warning(
+                    'Glyphs not found in the font, left out of the subset: '
+                    '%s' % ', '.join(unknown))
+            self.subset = graph.componentClosure(subset)
+        # The groups that became empty once pruned to the subset
+        self._subset_dropped_groups = set()
 
         # The set of (SourceDescriptor + UFO)s that will be built,
         # indexed by master ID, the same order as masters in the source GSFont.
@@ -136,60 +186,109 @@ class UFOBuilder(_LoggerMixin):
         # TODO(jamesgk) maybe create one font at a time to reduce memory usage
         # TODO: (jany) in the future, return a lazy iterator that builds UFOs
         #     on demand.
-        self.to_ufo_font_attributes(self.family_name)
-
-        for glyph in self.font.glyphs:
-            for layer in glyph.layers.values():
-                if layer.associatedMasterId != layer.layerId:
-                    # The layer is not the main layer of a master
-                    # Store all layers, even the invalid ones, and just skip
-                    # them and print a warning below.
-                    supplementary_layer_data.append((glyph, layer))
+        with profiling.stage('ufo.font_attributes'):
+            self.to_ufo_font_attributes(self.family_name)
+
+        with self._bulk_notifications():
+            for glyph in self.font.glyphs:
+                if self.subset is not None and glyph.name not in self.subset:
+                    continue
+                for layer in glyph.layers.values():
+                    if layer.associatedMasterId != layer.layerId:
+                        # The layer is not the main layer of a master
+                        # Store all layers, even the invalid ones, and just
+                        # skip them and print a warning below.
+                        supplementary_layer_data.append((glyph, layer))
+                        continue
+
+                    with profiling.stage('ufo.glyph', layer.layerId):
+                        ufo_layer = self.to_ufo_layer(glyph, layer)
+                        ufo_glyph = ufo_layer.newGlyph(glyph.name)
+                        self.to_ufo_glyph(ufo_glyph, layer, glyph)
+
+            for glyph, layer in supplementary_layer_data:
+                if (layer.layerId not in master_layer_ids and
+                        layer.associatedMasterId not in master_layer_ids):
+                    if self.minimize_glyphs_diffs:
+                        self.logger.warning(
+                            '{}, glyph "{}": Layer "{}" is dangling and will '
+                            'be skipped. Did you copy a glyph from a '
+                            'different font? If so, you should clean up any '
+                            'phantom layers not associated with an actual '
+                            'master.'
+                            .format(self.font.familyName, glyph.name,
+                                    layer.layerId))
                     continue
 
-                ufo_layer = self.to_ufo_layer(glyph, layer)
-                ufo_glyph = ufo_layer.newGlyph(glyph.name)
-                self.to_ufo_glyph(ufo_glyph, layer, glyph)
-
-        for glyph, layer in supplementary_layer_data:
-            if (layer.layerId not in master_layer_ids and
-                    layer.associatedMasterId not in master_layer_ids):
-                if self.minimize_glyphs_diffs:
-                    self.logger.warning(
-                        '{}, glyph "{}": Layer "{}" is dangling and will be '
-                        'skipped. Did you copy a glyph from a different font?'
-                        ' If so, you should clean up any phantom layers not '
-                        'associated with an actual master.'.format(
-                            self.font.familyName, glyph.name, layer.layerId))
-                continue
-
-            if not layer.name:
-                # Empty layer names are invalid according to the UFO spec.
-                if self.minimize_glyphs_diffs:
-                    self.logger.warning(
-                        '{}, glyph "{}": Contains layer without a name which '
-                        'will be skipped.'.format(self.font.familyName,
-                                                  glyph.name))
-                continue
-
-            ufo_layer = self.to_ufo_layer(glyph, layer)
-            ufo_glyph = ufo_layer.newGlyph(glyph.name)
-            self.to_ufo_glyph(ufo_glyph, layer, layer.parent)
+                if not layer.name:
+                    # Empty layer names are invalid according to the UFO spec.
+                    if self.minimize_glyphs_diffs:
+                        self.logger.warning(
+                            '{}, glyph "{}": Contains layer without a name '
+                            'which will be skipped.'.format(
+                                self.font.familyName, glyph.name))
+                    continue
 
-        for source in self._sources.values():
+                master_id = layer.associatedMasterId or layer.layerId
+                with profiling.stage('ufo.glyph', master_id):
+                    ufo_layer = self.to_ufo_layer(glyph, layer)
+                    ufo_glyph = ufo_layer.newGlyph(glyph.name)
+                    self.to_ufo_glyph(ufo_glyph, layer, layer.parent)
+
+        for master_id, source in self._sources.items():
             ufo = source.font
             if self.propagate_anchors:
-                self.to_ufo_propagate_font_anchors(ufo)
-            for layer in ufo.layers:
-                self.to_ufo_layer_lib(layer)
-
-        self.to_ufo_features()  # This depends on the glyphOrder key
-        self.to_ufo_groups()
-        self.to_ufo_kerning()
+                with profiling.stage('ufo.propagate_anchors', master_id):
+                    self.to_ufo_propagate_font_anchors(ufo)
+            with profiling.stage('ufo.layer_lib', master_id):
+                for layer in ufo.layers:
+                    self.to_ufo_layer_lib(layer)
+
+        # Features depend on the glyphOrder key
+        with profiling.stage('ufo.features'):
+            self.to_ufo_features()
+        with profiling.stage('ufo.groups'):
+            self.to_ufo_groups()
+        with profiling.stage('ufo.kerning'):
+            self.to_ufo_kerning()
 
         for source in self._sources.values():
             yield source.font
 
+    @contextmanager
+    def _bulk_notifications(self):
+        """Disable the change notifications of the master UFOs within the
+        `with` block, if `self.bulk` is True.
+
+        The font observes every layer to append each new glyph to its glyph
+        order, which costs a copy of the whole glyph order per glyph. Instead,
+        the glyph order (already set by `to_ufo_font_attributes`) is completed
+        in one pass at the end, and the layers and fonts are marked dirty.
+        """
+        ufos = [source.font for source in self._sources.values()]
+        if self.bulk:
+            ufos = [ufo for ufo in ufos if _has_dispatcher(ufo)]
+        else:
+            ufos = []
+        for ufo in ufos:
+            for notification in BULK_DISABLED_NOTIFICATIONS:
+                ufo.dispatcher.disableNotifications(notification=notification)
+            ufo.dispatcher.disableNotifications(
+                notification='Layer.GlyphAdded', observer=ufo)
+        try:
+            yield
+        finally:
+            for ufo in ufos:
+                for notification in BULK_DISABLED_NOTIFICATIONS:
+                    ufo.dispatcher.enableNotifications(
+                        notification=notification)
+                ufo.dispatcher.enableNotifications(
+                    notification='Layer.GlyphAdded', observer=ufo)
+                _complete_glyph_order(ufo)
+                for layer in ufo.layers:
+                    layer.dirty = True
+                ufo.dirty = True
+
     @property
     def designspace(self):
         """Get a designspace Document instance that links the masters together
@@ -199,10 +298,11 @@ class UFOBuilder(_LoggerMixin):
             return self._designspace
         self._designspace_is_complete = True
         ufos = list(self.masters)  # Make sure that the UFOs are built
-        self.to_designspace_axes()
-        self.to_designspace_sources()
-        self.to_designspace_instances()
-        self.to_designspace_family_user_data()
+        with profiling.stage('ufo.designspace'):
+            self.to_designspace_axes()
+            self.to_designspace_sources()
+            self.to_designspace_instances()
+            self.to_designspace_family_user_data()
 
         # append base style shared by all masters to designspace file name
         base_family = self.family_name or 'Unnamed'
@@ -262,6 +362,27 @@ class UFOBuilder(_LoggerMixin):
                             to_ufo_layer_user_data, to_ufo_node_user_data)
 
 
+def _has_dispatcher(ufo):
+    return callable(getattr(
+        getattr(ufo, 'dispatcher', None), 'disableNotifications', None))
+
+
+def _complete_glyph_order(ufo):
+    """Append the glyphs that are missing from the glyph order of `ufo`, as
+    defcon does when a glyph is added to a layer.
+    """
+    glyph_order = list(ufo.glyphOrder)
+    known = set(glyph_order)
+    missing = []
+    for layer in ufo.layers:
+        for name in layer.keys():
+            if name not in known:
+                known.add(name)
+                missing.append(name)
+    if missing:
+        ufo.glyphOrder = glyph_order + missing
+
+
 def filter_instances_by_family(instances, family_name=None):
     """Yield instances whose 'familyName' custom parameter is
     equal to 'family_name'.
@@ -318,6 +439,10 @@ class GlyphsBuilder(_LoggerMixin):
         self._font = None
         """The GSFont that will be built."""
 
+        self._glyph_layers = {}
+        """Glyph name -> (master id, layer name) -> GSLayer, filled on demand
+        by `to_glyphs_layer`."""
+
     @property
     def font(self):
         """Get the GSFont built from the UFOs + designspace."""
@@ -331,20 +456,25 @@ class GlyphsBuilder(_LoggerMixin):
         self._sources = OrderedDict()  # Same as in UFOBuilder
         for index, source in enumerate(sorted_sources):
             master = self.glyphs_module.GSFontMaster()
-            self.to_glyphs_font_attributes(source, master,
-                                           is_initial=(index == 0))
-            self.to_glyphs_master_attributes(source, master)
+            with profiling.stage('glyphs.font_attributes'):
+                self.to_glyphs_font_attributes(source, master,
+                                               is_initial=(index == 0))
+                self.to_glyphs_master_attributes(source, master)
             self._font.masters.insert(len(self._font.masters), master)
             self._sources[master.id] = source
 
             for layer in _sorted_backgrounds_last(source.font.layers):
                 self.to_glyphs_layer_lib(layer)
                 for glyph in layer:
-                    self.to_glyphs_glyph(glyph, layer, master)
+                    with profiling.stage('glyphs.glyph', master.id):
+                        self.to_glyphs_glyph(glyph, layer, master)
 
-        self.to_glyphs_features()
-        self.to_glyphs_groups()
-        self.to_glyphs_kerning()
+        with profiling.stage('glyphs.features'):
+            self.to_glyphs_features()
+        with profiling.stage('glyphs.groups'):
+            self.to_glyphs_groups()
+        with profiling.stage('glyphs.kerning'):
+            self.to_glyphs_kerning()
 
         # Now that all GSGlyph are built, restore the glyph order
         if self.designspace.sources:
@@ -359,13 +489,15 @@ class GlyphsBuilder(_LoggerMixin):
             # merge the various `public.glyphorder` values?
 
             # Restore the layer ordering in each glyph
-            for glyph in self._font.glyphs:
-                self.to_glyphs_layer_order(glyph)
-
-        self.to_glyphs_family_user_data_from_designspace()
-        self.to_glyphs_axes()
-        self.to_glyphs_sources()
-        self.to_glyphs_instances()
+            with profiling.stage('glyphs.layer_order'):
+                for glyph in self._font.glyphs:
+                    self.to_glyphs_layer_order(glyph)
+
+        with profiling.stage('glyphs.designspace'):
+            self.to_glyphs_family_user_data_from_designspace()
+            self.to_glyphs_axes()
+            self.to_glyphs_sources()
+            self.to_glyphs_instances()
 
         return self._font
 
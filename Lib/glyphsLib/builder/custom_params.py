@@ -123,6 +123,10 @@ class GlyphsObjectProxy(object):
         for value in values:
             self.set_custom_value(key, value)
 
+    def custom_names(self):
+        """Return the names of the custom parameters of the object."""
+        return [key for key, values in self._lookup.items() if values]
+
     def unhandled_custom_parameters(self):
         for param in self._owner.customParameters:
             if param.name not in self._handled:
@@ -147,6 +151,9 @@ class UFOProxy(object):
     def has_lib_key(self, name):
         return name in self._owner.lib
 
+    def lib_keys(self):
+        return self._owner.lib.keys()
+
     def get_lib_value(self, name):
         if name not in self._owner.lib:
             return None
@@ -172,6 +179,20 @@ class AbstractParamHandler(object):
     def to_ufo(self):
         pass
 
+    # The two following methods return the names under which the handler
+    # looks for its value, so that it is only called when one of them is
+    # present. None means that the handler must always be called.
+    def glyphs_names(self):
+        """Return the names of the custom parameters read by `to_ufo`."""
+        return None
+
+    def ufo_names(self):
+        """Return the names of the UFO info attributes and lib keys read by
+        `to_glyphs`. Lib keys of custom parameters are given without their
+        `CUSTOM_PARAM_PREFIX` and GlyphsObjectProxy `sub_key`.
+        """
+        return None
+
 
 class ParamHandler(AbstractParamHandler):
     def __init__(self, glyphs_name, ufo_name=None,
@@ -191,6 +212,16 @@ class ParamHandler(AbstractParamHandler):
         self.value_to_ufo = value_to_ufo
         self.value_to_glyphs = value_to_glyphs
 
+    def glyphs_names(self):
+        if self.glyphs_long_name is not None:
+            return (self.glyphs_name, self.glyphs_long_name)
+        return (self.glyphs_name,)
+
+    def ufo_names(self):
+        if self.ufo_prefix == CUSTOM_PARAM_PREFIX:
+            return (self.ufo_name,)
+        return (self.ufo_name, self.ufo_prefix + self.ufo_name)
+
     # By default, the parameter is read from/written to:
     #  - the Glyphs object's customParameters
     #  - the UFO's info object if it has a matching attribute, else the lib
@@ -260,6 +291,63 @@ def register(handler):
     KNOWN_PARAM_HANDLERS.append(handler)
 
 
+class ParamDispatchTable(object):
+    """Index handlers by the names of the parameters that they read, so that
+    a conversion only calls the handlers of the parameters that are present,
+    in the order in which the handlers were registered.
+    """
+    def __init__(self, handlers):
+        self.handlers = list(handlers)
+        self._by_glyphs_name = defaultdict(list)
+        self._by_ufo_name = defaultdict(list)
+        self._always_to_ufo = []
+        self._always_to_glyphs = []
+        for position, handler in enumerate(self.handlers):
+            names = handler.glyphs_names()
+            if names is None:
+                self._always_to_ufo.append(position)
+            else:
+                for name in names:
+                    self._by_glyphs_name[name].append(position)
+            names = handler.ufo_names()
+            if names is None:
+                self._always_to_glyphs.append(position)
+            else:
+                for name in names:
+                    self._by_ufo_name[name].append(position)
+
+    def to_ufo_handlers(self, glyphs):
+        positions = set(self._always_to_ufo)
+        for name in glyphs.custom_names():
+            positions.update(self._by_glyphs_name.get(name, ()))
+        return [self.handlers[position] for position in sorted(positions)]
+
+    def to_glyphs_handlers(self, glyphs, ufo):
+        positions = set(self._always_to_glyphs)
+        for name, handler_positions in self._by_ufo_name.items():
+            if (ufo.has_info_attr(name) and
+                    ufo.get_info_value(name) is not None):
+                positions.update(handler_positions)
+        prefix = CUSTOM_PARAM_PREFIX + glyphs.sub_key
+        for key in ufo.lib_keys():
+            if key.startswith(prefix):
+                key = key[len(prefix):]
+            positions.update(self._by_ufo_name.get(key, ()))
+        return [self.handlers[position] for position in sorted(positions)]
+
+
+_dispatch_table = None
+
+
+def get_dispatch_table():
+    """Return the ParamDispatchTable of the KNOWN_PARAM_HANDLERS."""
+    global _dispatch_table
+    if (_dispatch_table is None or
+            len(_dispatch_table.handlers) != len(KNOWN_PARAM_HANDLERS)):
+        _dispatch_table = ParamDispatchTable(KNOWN_PARAM_HANDLERS)
+    return _dispatch_table
+
+
 GLYPHS_UFO_CUSTOM_PARAMS = (
     ('hheaAscender', 'openTypeHheaAscender'),
     ('hheaDescender', 'openTypeHheaDescender'),
@@ -374,6 +462,12 @@ register(EmptyListDefaultParamHandler('postscriptFamilyOtherBlues'))
 
 # Convert code page numbers to OS/2 ulCodePageRange bits. Empty lists stay empty lists.
 class OS2CodePageRangesParamHandler(AbstractParamHandler):
+    def glyphs_names(self):
+        return ('codePageRanges', 'openTypeOS2CodePageRanges')
+
+    def ufo_names(self):
+        return ('openTypeOS2CodePageRanges',)
+
     def to_glyphs(self, glyphs, ufo):
         ufo_codepage_bits = ufo.get_info_value("openTypeOS2CodePageRanges")
         if ufo_codepage_bits is None:
@@ -471,6 +565,10 @@ register(ParamHandler(
 
 class MiscParamHandler(ParamHandler):
     """Copy GSFont attributes to ufo lib"""
+    def glyphs_names(self):
+        # The value is an attribute, not a custom parameter
+        return None
+
     def _read_from_glyphs(self, glyphs):
         return glyphs.get_attribute_value(self.glyphs_name)
 
@@ -504,6 +602,13 @@ def append_unique(array, value):
 class OS2SelectionParamHandler(AbstractParamHandler):
     flags = {7: "Use Typo Metrics", 8: "Has WWS Names"}
 
+    def glyphs_names(self):
+        return tuple(self.flags.values()) + (
+            "openTypeOS2SelectionUnsupportedBits",)
+
+    def ufo_names(self):
+        return ("openTypeOS2Selection",)
+
     # Note that en empty openTypeOS2Selection list should stay an empty list, as
     # opposed to a non-existant list. In the latter case, we round-trip nothing, in the
     # former, we at least write an empty list to openTypeOS2SelectionUnsupportedBits
@@ -581,6 +686,12 @@ register(FilterParamHandler())
 
 
 class ReplaceFeatureParamHandler(AbstractParamHandler):
+    def glyphs_names(self):
+        return ('Replace Feature',)
+
+    def ufo_names(self):
+        return ()
+
     def to_ufo(self, glyphs, ufo):
         for value in glyphs.get_custom_values('Replace Feature'):
             tag, repl = re.split("\s*;\s*", value, 1)
@@ -615,6 +726,12 @@ class ReencodeGlyphsParamHandler(AbstractParamHandler):
     the UFO lib, but directly applied to the UFO unicode values.
     """
 
+    def glyphs_names(self):
+        return ("Reencode Glyphs",)
+
+    def ufo_names(self):
+        return ()
+
     def to_ufo(self, glyphs, ufo):
         # TODO Check that the wrapped glyphs object is indeed an instance, and
         # not a GSFont or GSMaster (unlikely)
@@ -650,7 +767,7 @@ def to_ufo_custom_params(self, ufo, glyphs_object):
     glyphs_proxy = GlyphsObjectProxy(glyphs_object, glyphs_module=None)
     ufo_proxy = UFOProxy(ufo)
 
-    for handler in KNOWN_PARAM_HANDLERS:
+    for handler in get_dispatch_table().to_ufo_handlers(glyphs_proxy):
         handler.to_ufo(glyphs_proxy, ufo_proxy)
 
     for param in glyphs_proxy.unhandled_custom_parameters():
@@ -666,7 +783,8 @@ def to_glyphs_custom_params(self, ufo, glyphs_object):
     ufo_proxy = UFOProxy(ufo)
 
     # Handle known parameters
-    for handler in KNOWN_PARAM_HANDLERS:
+    for handler in get_dispatch_table().to_glyphs_handlers(glyphs_proxy,
+                                                           ufo_proxy):
         handler.to_glyphs(glyphs_proxy, ufo_proxy)
 
     # Since all UFO `info` entries (from `fontinfo.plist`) have a registered
@@ -38,13 +38,21 @@ def autostr(automatic):
 
 
 def to_ufo_features(self):
+    # The code of the prefixes, classes and features is defined at the font
+    # level, and so are the glyph order and the glyph categories used for
+    # GDEF: they are only computed once and shared by all the masters.
+    cache = {}
     for master_id, source in self._sources.items():
         master = self.font.masters[master_id]
-        _to_ufo_features(self, master, source.font)
+        _to_ufo_features(self, master, source.font, cache)
 
 
-def _to_ufo_features(self, master, ufo):
-    """Write an UFO's OpenType feature file."""
+def _to_ufo_features(self, master, ufo, cache=None):
+    """Write an UFO's OpenType feature file.
+
+    `cache` is an optional dict that can be shared between the masters of a
+    font to only build the feature code that they have in common once.
+    """
 
     # Recover the original feature code if it was stored in the user data
     original = master.userData[ORIGINAL_FEATURE_CODE_KEY]
@@ -52,6 +60,32 @@ def _to_ufo_features(self, master, ufo):
         ufo.features.text = original
         return
 
+    if cache is None:
+        cache = {}
+    shared_str = cache.get('shared')
+    if shared_str is None:
+        shared_str = cache['shared'] = _build_shared_features(self)
+
+    # Don't add a GDEF when planning to round-trip
+    gdef_str = None
+    if not self.minimize_glyphs_diffs:
+        gdef_str = _build_gdef(ufo, cache.setdefault('gdef', {}))
+
+    # Masters with the same GDEF table get the very same feature text
+    full_texts = cache.setdefault('fullTexts', {})
+    full_text = full_texts.get(gdef_str)
+    if full_text is None:
+        # make sure feature text is a unicode string, for defcon
+        full_text = '\n\n'.join(filter(None, [shared_str, gdef_str])) + '\n'
+        full_text = full_text if full_text.strip() else ''
+        full_texts[gdef_str] = full_text
+    ufo.features.text = full_text
+
+
+def _build_shared_features(self):
+    """Build the feature code of the font's prefixes, classes and features,
+    which is the same for all masters.
+    """
     prefixes = []
     for prefix in self.font.featurePrefixes:
         strings = []
@@ -89,24 +123,20 @@ def _to_ufo_features(self, master, ufo):
         feature_defs.append('\n'.join(lines))
     fea_str = '\n\n'.join(feature_defs)
 
-    # Don't add a GDEF when planning to round-trip
-    gdef_str = None
-    if not self.minimize_glyphs_diffs:
-        gdef_str = _build_gdef(ufo)
+    return '\n\n'.join(filter(None, [prefix_str, class_str, fea_str]))
 
-    # make sure feature text is a unicode string, for defcon
-    full_text = '\n\n'.join(
-        filter(None, [prefix_str, class_str, fea_str, gdef_str])) + '\n'
-    ufo.features.text = full_text if full_text.strip() else ''
 
+def _build_gdef(ufo, cache=None):
+    """Build a table GDEF statement for ligature carets.
 
-def _build_gdef(ufo):
-    """Build a table GDEF statement for ligature carets."""
-    from glyphsLib import glyphdata  # Expensive import
+    `cache` is an optional dict that can be shared between the masters of a
+    font to only compute the glyph order index and glyph categories once.
+    """
+    if cache is None:
+        cache = {}
+    categories = cache.setdefault('categories', {})
 
     bases, ligatures, marks, carets = set(), set(), set(), {}
-    category_key = GLYPHLIB_PREFIX + 'category'
-    subCategory_key = GLYPHLIB_PREFIX + 'subCategory'
     for glyph in ufo:
         has_attaching_anchor = False
         for anchor in glyph.anchors:
@@ -115,16 +145,11 @@ def _build_gdef(ufo):
                 has_attaching_anchor = True
             if name and name.startswith('caret_') and 'x' in anchor:
                 carets.setdefault(glyph.name, []).append(round(anchor['x']))
-        lib = glyph.lib
-        glyphinfo = glyphdata.get_glyph(glyph.name)
-        # first check glyph.lib for category/subCategory overrides; else use
-        # global values from GlyphData
-        category = lib.get(category_key)
-        if category is None:
-            category = glyphinfo.category
-        subCategory = lib.get(subCategory_key)
-        if subCategory is None:
-            subCategory = glyphinfo.subCategory
+        try:
+            category, subCategory = categories[glyph.name]
+        except KeyError:
+            category, subCategory = categories[glyph.name] = \
+                _gdef_glyph_category(glyph)
 
         # Glyphs.app assigns glyph classes like this:
         #
@@ -152,9 +177,13 @@ def _build_gdef(ufo):
     if not any((bases, ligatures, marks, carets)):
         return None
     lines = ['table GDEF {', '  # automatic']
-    glyphOrder = ufo.lib[PUBLIC_PREFIX + 'glyphOrder']
-    glyphIndex = lambda glyph: glyphOrder.index(glyph)
-    fmt = lambda g: ('[%s]' % ' '.join(sorted(g, key=glyphIndex))) if g else ''
+    glyphIndex = cache.get('glyphIndex')
+    if glyphIndex is None:
+        glyphOrder = ufo.lib[PUBLIC_PREFIX + 'glyphOrder']
+        glyphIndex = cache['glyphIndex'] = {
+            name: index for index, name in enumerate(glyphOrder)}
+    fmt = lambda g: ('[%s]' % ' '.join(
+        sorted(g, key=glyphIndex.__getitem__))) if g else ''
     lines.extend([
         '  GlyphClassDef',
         '    %s, # Base' % fmt(bases),
@@ -168,6 +197,25 @@ def _build_gdef(ufo):
     return '\n'.join(lines)
 
 
+def _gdef_glyph_category(glyph):
+    """Return the (category, subCategory) of a UFO glyph for the GDEF table.
+    """
+    from glyphsLib import glyphdata  # Expensive import
+
+    lib = glyph.lib
+    # first check glyph.lib for category/subCategory overrides; else use
+    # global values from GlyphData
+    category = lib.get(GLYPHLIB_PREFIX + 'category')
+    subCategory = lib.get(GLYPHLIB_PREFIX + 'subCategory')
+    if category is None or subCategory is None:
+        glyphinfo = glyphdata.get_glyph(glyph.name)
+        if category is None:
+            category = glyphinfo.category
+        if subCategory is None:
+            subCategory = glyphinfo.subCategory
+    return category, subCategory
+
+
 def replace_feature(tag, repl, features):
     if not repl.endswith("\n"):
         repl += "\n"
@@ -50,7 +50,8 @@ def to_ufo_font_attributes(self, family_name):
     manufacturer = font.manufacturer
     manufacturer_url = font.manufacturerURL
     note = font.note
-    glyph_order = list(glyph.name for glyph in font.glyphs)
+    glyph_order = list(glyph.name for glyph in font.glyphs
+                       if self.subset is None or glyph.name in self.subset)
 
     for index, master in enumerate(font.masters):
         source = self._designspace.newSourceDescriptor()
@@ -20,6 +20,7 @@ logger = logging.getLogger(__name__)
 from defcon import Color
 
 import glyphsLib.glyphdata
+from glyphsLib import profiling
 from .common import to_ufo_time, from_ufo_time, from_loose_ufo_time
 from .constants import (GLYPHLIB_PREFIX, GLYPHS_COLORS, GLYPHS_PREFIX,
                         PUBLIC_PREFIX)
@@ -106,18 +107,33 @@ def to_ufo_glyph(self, ufo_glyph, layer, glyph):
     else:
         ufo_glyph.width = width
 
+    master_id = layer.associatedMasterId
     self.to_ufo_background_image(ufo_glyph, layer)
     self.to_ufo_guidelines(ufo_glyph, layer)
-    self.to_ufo_glyph_background(ufo_glyph, layer)
+    with profiling.stage('ufo.glyph.background', master_id):
+        self.to_ufo_glyph_background(ufo_glyph, layer)
     self.to_ufo_annotations(ufo_glyph, layer)
-    self.to_ufo_hints(ufo_glyph, layer)
-    self.to_ufo_glyph_user_data(ufo_glyph.font, glyph)
-    self.to_ufo_layer_user_data(ufo_glyph, layer)
+    with profiling.stage('ufo.glyph.hints', master_id):
+        self.to_ufo_hints(ufo_glyph, layer)
+    with profiling.stage('ufo.glyph.user_data', master_id):
+        self.to_ufo_glyph_user_data(ufo_glyph.font, glyph)
+        self.to_ufo_layer_user_data(ufo_glyph, layer)
     self.to_ufo_smart_component_axes(ufo_glyph, glyph)
 
-    self.to_ufo_paths(ufo_glyph, layer)
-    self.to_ufo_components(ufo_glyph, layer)
-    self.to_ufo_glyph_anchors(ufo_glyph, layer.anchors)
+    with profiling.stage('ufo.glyph.paths', master_id):
+        self.to_ufo_paths(ufo_glyph, layer)
+    with profiling.stage('ufo.glyph.components', master_id):
+        self.to_ufo_components(ufo_glyph, layer)
+    with profiling.stage('ufo.glyph.anchors', master_id):
+        self.to_ufo_glyph_anchors(ufo_glyph, layer.anchors)
+
+    if profiling.active():
+        profiling.count('ufo.glyphs', 1, master_id)
+        profiling.count('ufo.paths', len(layer.paths), master_id)
+        profiling.count('ufo.nodes', sum(len(path.nodes)
+                                         for path in layer.paths), master_id)
+        profiling.count('ufo.components', len(layer.components), master_id)
+        profiling.count('ufo.anchors', len(layer.anchors), master_id)
 
 
 def to_glyphs_glyph(self, ufo_glyph, ufo_layer, master):
@@ -213,14 +229,26 @@ def to_glyphs_glyph(self, ufo_glyph, ufo_layer, master):
     self.to_glyphs_background_image(ufo_glyph, layer)
     self.to_glyphs_guidelines(ufo_glyph, layer)
     self.to_glyphs_annotations(ufo_glyph, layer)
-    self.to_glyphs_hints(ufo_glyph, layer)
-    self.to_glyphs_glyph_user_data(ufo_glyph.font, glyph)
-    self.to_glyphs_layer_user_data(ufo_glyph, layer)
+    with profiling.stage('glyphs.glyph.hints', master.id):
+        self.to_glyphs_hints(ufo_glyph, layer)
+    with profiling.stage('glyphs.glyph.user_data', master.id):
+        self.to_glyphs_glyph_user_data(ufo_glyph.font, glyph)
+        self.to_glyphs_layer_user_data(ufo_glyph, layer)
     self.to_glyphs_smart_component_axes(ufo_glyph, glyph)
 
-    self.to_glyphs_paths(ufo_glyph, layer)
-    self.to_glyphs_components(ufo_glyph, layer)
-    self.to_glyphs_glyph_anchors(ufo_glyph, layer)
+    with profiling.stage('glyphs.glyph.paths', master.id):
+        self.to_glyphs_paths(ufo_glyph, layer)
+    with profiling.stage('glyphs.glyph.components', master.id):
+        self.to_glyphs_components(ufo_glyph, layer)
+    with profiling.stage('glyphs.glyph.anchors', master.id):
+        self.to_glyphs_glyph_anchors(ufo_glyph, layer)
+
+    if profiling.active():
+        profiling.count('glyphs.glyphs', 1, master.id)
+        profiling.count('glyphs.contours', len(ufo_glyph), master.id)
+        profiling.count('glyphs.components', len(ufo_glyph.components),
+                        master.id)
+        profiling.count('glyphs.anchors', len(ufo_glyph.anchors), master.id)
 
 
 def to_ufo_glyph_background(self, glyph, layer):
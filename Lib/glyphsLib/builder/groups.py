@@ -15,11 +15,11 @@
 from __future__ import (print_function, division, absolute_import,
                         unicode_literals)
 
-from collections import defaultdict
+from collections import OrderedDict, defaultdict
 import os
 import re
 
-from glyphsLib import classes
+from glyphsLib import classes, profiling
 from .constants import GLYPHLIB_PREFIX
 
 UFO_ORIGINAL_KERNING_GROUPS_KEY = GLYPHLIB_PREFIX + 'originalKerningGroups'
@@ -44,6 +44,16 @@ def to_ufo_groups(self):
                     # Empty group: using split like above would produce ['']
                     groups[gsclass.name] = []
 
+    # Index the glyphs by name and collect their kerning groups in one pass
+    glyphs_by_name = {}
+    glyph_kerning_groups = []
+    for glyph in self.font.glyphs.values():
+        glyphs_by_name.setdefault(glyph.name, glyph)
+        for side in 1, 2:
+            group = getattr(glyph, _glyph_kerning_attr(glyph, side))
+            if group:
+                glyph_kerning_groups.append((glyph.name, side, group))
+
     # Rebuild kerning groups from `left/rightKerningGroup`s
     # Use the original list of kerning groups as a base, to recover
     #  - the original ordering
@@ -56,12 +66,13 @@ def to_ufo_groups(self):
             if not glyphs:
                 # Restore empty group
                 groups[group] = []
+                continue
+            match = UFO_KERN_GROUP_PATTERN.match(group)
+            side = match.group(1)
+            group_name = match.group(2)
             for glyph_name in glyphs:
                 # Check that the original value is still valid
-                match = UFO_KERN_GROUP_PATTERN.match(group)
-                side = match.group(1)
-                group_name = match.group(2)
-                glyph = self.font.glyphs[glyph_name]
+                glyph = glyphs_by_name.get(glyph_name)
                 if not glyph or getattr(
                         glyph, _glyph_kerning_attr(glyph, side)) == group_name:
                     # The original grouping is still valid
@@ -71,29 +82,48 @@ def to_ufo_groups(self):
                     recovered.add((glyph_name, int(side)))
 
     # Read modified grouping values
-    for glyph in self.font.glyphs.values():
-        for side in 1, 2:
-            if (glyph.name, side) not in recovered:
-                attr = _glyph_kerning_attr(glyph, side)
-                group = getattr(glyph, attr)
-                if group:
-                    group = 'public.kern%s.%s' % (side, group)
-                    groups[group].append(glyph.name)
-
-    # Update all UFOs with the same info
+    for glyph_name, side, group in glyph_kerning_groups:
+        if (glyph_name, side) not in recovered:
+            groups['public.kern%s.%s' % (side, group)].append(glyph_name)
+
+    if self.subset is not None:
+        groups = _subset_groups(self, groups)
+    profiling.count('ufo.groups', len(groups))
+
+    # Update all UFOs with the same info, in one go for each
     for source in self._sources.values():
-        for name, glyphs in groups.items():
-            # Shallow copy to prevent unexpected object sharing
-            source.font.groups[name] = glyphs[:]
+        # Shallow copy to prevent unexpected object sharing
+        source.font.groups.update(OrderedDict(
+            (name, glyphs[:]) for name, glyphs in groups.items()))
+
+
+def _subset_groups(self, groups):
+    """Remove the glyphs that are not in the builder's subset from `groups`.
+
+    Groups that lose all their glyphs are dropped altogether, and their names
+    are remembered so that kerning rules that use them can be dropped too.
+    """
+    subset_groups = defaultdict(list)
+    for name, glyphs in groups.items():
+        kept = [glyph_name for glyph_name in glyphs
+                if glyph_name in self.subset]
+        if glyphs and not kept:
+            self._subset_dropped_groups.add(name)
+            continue
+        subset_groups[name] = kept
+    return subset_groups
 
 
 def to_glyphs_groups(self):
     # Build the GSClasses from the groups of the first UFO.
     groups = []
+    glyphs_by_name = {}
+    for glyph in self.font.glyphs.values():
+        glyphs_by_name.setdefault(glyph.name, glyph)
     for source in self._sources.values():
         for name, glyphs in source.font.groups.items():
             if _is_kerning_group(name):
-                _to_glyphs_kerning_group(self, name, glyphs)
+                _to_glyphs_kerning_group(self, name, glyphs, glyphs_by_name)
             else:
                 gsclass = classes.GSClass(name, " ".join(glyphs))
                 self.font.classes.append(gsclass)
@@ -103,10 +133,12 @@ def to_glyphs_groups(self):
         break
 
     # Check that other UFOs are identical and print a warning if not.
-    for index, source in enumerate(self._sources.values()):
-        if index == 0:
+    reference_ufo = None
+    for source in self._sources.values():
+        if reference_ufo is None:
             reference_ufo = source.font
-        else:
+            reference_signature = _groups_signature(reference_ufo)
+        elif _groups_signature(source.font) != reference_signature:
             _assert_groups_are_identical(self, reference_ufo, source.font)
 
 
@@ -115,7 +147,7 @@ def _is_kerning_group(name):
             name.startswith('public.kern2.'))
 
 
-def _to_glyphs_kerning_group(self, name, glyphs):
+def _to_glyphs_kerning_group(self, name, glyphs, glyphs_by_name):
     if self.minimize_ufo_diffs:
         # Preserve ordering when going from UFO group
         # to left/rightKerningGroup disseminated in GSGlyphs
@@ -128,7 +160,7 @@ def _to_glyphs_kerning_group(self, name, glyphs):
     side = match.group(1)
     group_name = match.group(2)
     for glyph_name in glyphs:
-        glyph = self.font.glyphs[glyph_name]
+        glyph = glyphs_by_name.get(glyph_name)
         if glyph:
             setattr(glyph, _glyph_kerning_attr(glyph, side), group_name)
 
@@ -143,6 +175,15 @@ def _glyph_kerning_attr(glyph, side):
         return 'leftKerningGroup'
 
 
+def _groups_signature(ufo):
+    """Return a hashable summary of the groups of `ufo`, with the glyphs of
+    each group as a set, to tell quickly whether two UFOs have the same
+    groups.
+    """
+    return frozenset((name, frozenset(glyphs))
+                     for name, glyphs in ufo.groups.items())
+
+
 def _assert_groups_are_identical(self, reference_ufo, ufo):
     first_time = [True]  # Using a mutable as a non-local for closure below
 
@@ -15,14 +15,21 @@
 from __future__ import (print_function, division, absolute_import,
                         unicode_literals)
 
+from itertools import repeat
 import re
 
+from glyphsLib import profiling
+
 UFO_KERN_GROUP_PATTERN = re.compile('^public\\.kern([12])\\.(.*)$')
+MMK_LEFT_PATTERN = re.compile('@MMK_L_(.+)')
+MMK_RIGHT_PATTERN = re.compile('@MMK_R_(.+)')
 
 
 def to_ufo_kerning(self):
     for master_id, kerning in self.font.kerning.items():
-        _to_ufo_kerning(self, self._sources[master_id].font, kerning)
+        ufo = self._sources[master_id].font
+        _to_ufo_kerning(self, ufo, kerning)
+        profiling.count('ufo.kerning_pairs', len(ufo.kerning), master_id)
 
 
 def _to_ufo_kerning(self, ufo, kerning_data):
@@ -31,55 +38,100 @@ def _to_ufo_kerning(self, ufo, kerning_data):
     warning_msg = 'Non-existent glyph class %s found in kerning rules.'
     class_glyph_pairs = []
 
+    # Work on plain dicts and only update the UFO objects once at the end,
+    # instead of sending change notifications for every pair.
+    groups = dict(ufo.groups)
+    kerning = dict(ufo.kerning)
+    left_names = {}
+    right_names = {}
+
     for left, pairs in kerning_data.items():
-        match = re.match(r'@MMK_L_(.+)', left)
-        left_is_class = bool(match)
-        if left_is_class:
-            left = 'public.kern1.%s' % match.group(1)
-            if left not in ufo.groups:
-                self.logger.warning(warning_msg % left)
+        left, left_is_class = _ufo_kerning_name(
+            left_names, left, MMK_LEFT_PATTERN, 'public.kern1.%s')
+        if _is_excluded_by_subset(self, left, left_is_class):
+            continue
+        if left_is_class and left not in groups:
+            self.logger.warning(warning_msg % left)
         for right, kerning_val in pairs.items():
-            match = re.match(r'@MMK_R_(.+)', right)
-            right_is_class = bool(match)
-            if right_is_class:
-                right = 'public.kern2.%s' % match.group(1)
-                if right not in ufo.groups:
-                    self.logger.warning(warning_msg % right)
+            right, right_is_class = _ufo_kerning_name(
+                right_names, right, MMK_RIGHT_PATTERN, 'public.kern2.%s')
+            if _is_excluded_by_subset(self, right, right_is_class):
+                continue
+            if right_is_class and right not in groups:
+                self.logger.warning(warning_msg % right)
             if left_is_class != right_is_class:
                 if left_is_class:
                     pair = (left, right, True)
                 else:
                     pair = (right, left, False)
                 class_glyph_pairs.append(pair)
-            ufo.kerning[left, right] = kerning_val
+            kerning[left, right] = kerning_val
 
     seen = {}
     for classname, glyph, is_left_class in reversed(class_glyph_pairs):
-        _remove_rule_if_conflict(self, ufo, seen, classname, glyph,
-                                 is_left_class)
+        _remove_rule_if_conflict(self, ufo, groups, kerning, seen, classname,
+                                 glyph, is_left_class)
+
+    ufo.kerning.clear()
+    ufo.kerning.update(kerning)
+
+
+def _ufo_kerning_name(cache, name, pattern, group_format):
+    """Return the UFO name of a side of a .glyphs kerning rule, and whether
+    it is a class. Each distinct name is only matched once.
+    """
+    try:
+        return cache[name]
+    except KeyError:
+        match = pattern.match(name)
+        if match:
+            result = cache[name] = (group_format % match.group(1), True)
+        else:
+            result = cache[name] = (name, False)
+        return result
 
 
-def _remove_rule_if_conflict(self, ufo, seen, classname, glyph, is_left_class):
+def _is_excluded_by_subset(self, name, is_class):
+    """Return whether a kerning rule side refers only to glyphs that are
+    outside of the builder's subset.
+    """
+    if self.subset is None:
+        return False
+    if is_class:
+        return name in self._subset_dropped_groups
+    return name not in self.subset
+
+
+def _remove_rule_if_conflict(self, ufo, groups, kerning, seen, classname,
+                             glyph, is_left_class):
     """Check if a class-to-glyph kerning rule has a conflict with any existing
     rule in `seen`, and remove any conflicts if they exist.
     """
     original_pair = (classname, glyph) if is_left_class else (glyph, classname)
-    val = ufo.kerning[original_pair]
+    val = kerning[original_pair]
     rule = original_pair + (val,)
 
     try:
-        old_glyphs = ufo.groups[classname]
+        old_glyphs = groups[classname]
     except KeyError:
         # This can happen. The main function `to_ufo_kerning` prints a warning.
         return
 
+    if is_left_class:
+        pairs = list(zip(old_glyphs, repeat(glyph)))
+    else:
+        pairs = list(zip(repeat(glyph), old_glyphs))
+    if not any(pair in seen for pair in pairs):
+        # No other rule has been seen for these pairs: nothing can conflict
+        seen.update(zip(pairs, repeat(rule)))
+        return
+
     new_glyphs = []
-    for member in old_glyphs:
-        pair = (member, glyph) if is_left_class else (glyph, member)
+    for member, pair in zip(old_glyphs, pairs):
         existing_rule = seen.get(pair)
         if (existing_rule is not None and
                 existing_rule[-1] != val and
-                pair not in ufo.kerning):
+                pair not in kerning):
             self.logger.warning(
                 'Conflicting kerning rules found in %s master for glyph pair '
                 '"%s, %s" (%s and %s), removing pair from latter rule' %
@@ -89,10 +141,10 @@ def _remove_rule_if_conflict(self, ufo, seen, classname, glyph, is_left_class):
             seen[pair] = rule
 
     if new_glyphs != old_glyphs:
-        del ufo.kerning[original_pair]
+        del kerning[original_pair]
         for member in new_glyphs:
             pair = (member, glyph) if is_left_class else (glyph, member)
-            ufo.kerning[pair] = val
+            kerning[pair] = val
 
 
 def to_glyphs_kerning(self):
@@ -70,10 +70,7 @@ def to_glyphs_layer(self, ufo_layer, glyph, master):
         # Find or create the foreground layer
         # TODO: (jany) add lib attribute to find foreground by layer id
         foreground_name = ufo_layer.name[:-len('.background')]
-        foreground = next(
-            (l for l in glyph.layers
-             if l.name == foreground_name and l.associatedMasterId == master.id
-             ), None)
+        foreground = _find_layer(self, glyph, master.id, foreground_name)
         if foreground is None:
             foreground = self.glyphs_module.GSLayer()
             foreground.name = foreground_name
@@ -81,10 +78,7 @@ def to_glyphs_layer(self, ufo_layer, glyph, master):
         layer = foreground.background
         # Background layers don't have an associated master id nor a name nor an id
     else:
-        layer = next((
-            l for l in glyph.layers
-            if l.name == ufo_layer.name and l.associatedMasterId == master.id),
-                     None)
+        layer = _find_layer(self, glyph, master.id, ufo_layer.name)
         if layer is None:
             layer = self.glyphs_module.GSLayer()
         layer.associatedMasterId = master.id
@@ -92,6 +86,7 @@ def to_glyphs_layer(self, ufo_layer, glyph, master):
             layer.layerId = ufo_layer.lib[LAYER_ID_KEY]
         layer.name = ufo_layer.name
         glyph.layers.append(layer)
+        _remember_layer(self, glyph, layer)
     order_key = LAYER_ORDER_PREFIX + glyph.name
     if order_key in ufo_layer.lib:
         order = ufo_layer.lib[order_key]
@@ -105,19 +100,55 @@ def _get_or_make_foreground(self, glyph, master):
         layer = glyph.layers[master.id] = self.glyphs_module.GSLayer()
     layer.layerId = master.id
     layer.name = master.name
+    _remember_layer(self, glyph, layer)
     return layer
 
 
+def _find_layer(self, glyph, master_id, name):
+    """Return the first layer of `glyph` with the given associated master id
+    and name, or None.
+
+    The layers of each glyph are indexed by (master id, name) the first time
+    that the glyph is looked at. The index is kept up to date by
+    `_remember_layer` as layers are added, and rebuilt when the id, the
+    master id or the name of one of the layers of the glyph has changed.
+    """
+    index = self._glyph_layers.get(glyph.name)
+    if index is None or index[0] != _layer_keys_version(glyph):
+        index = _index_layers(self, glyph)
+    return index[1].get((master_id, name))
+
+
+def _index_layers(self, glyph):
+    layers = {}
+    for layer in glyph.layers:
+        layers.setdefault((layer.associatedMasterId, layer.name), layer)
+    index = self._glyph_layers[glyph.name] = (
+        _layer_keys_version(glyph), layers)
+    return index
+
+
+def _remember_layer(self, glyph, layer):
+    index = self._glyph_layers.get(glyph.name)
+    if index is not None and index[0] == _layer_keys_version(glyph):
+        index[1].setdefault((layer.associatedMasterId, layer.name), layer)
+
+
+def _layer_keys_version(glyph):
+    # The glyphs of another `glyphs_module` may not count the changes
+    return getattr(glyph, '_layerKeysVersion', None)
+
+
 def to_glyphs_layer_order(self, glyph):
     # TODO: (jany) ask for the rules of layer ordering inside a glyph
     # For now, order according to key in lib
-    glyph.layers = sorted(glyph.layers, key=_layer_order)
-    for layer in glyph.layers:
+    layers = list(glyph.layers)
+    orders = []
+    for layer in layers:
+        order = float('inf')
         if LAYER_ORDER_TEMP_USER_DATA_KEY in layer.userData:
+            order = layer.userData[LAYER_ORDER_TEMP_USER_DATA_KEY]
             del(layer.userData[LAYER_ORDER_TEMP_USER_DATA_KEY])
-
-
-def _layer_order(layer):
-    if LAYER_ORDER_TEMP_USER_DATA_KEY in layer.userData:
-        return layer.userData[LAYER_ORDER_TEMP_USER_DATA_KEY]
-    return float('inf')
+        orders.append(order)
+    indices = sorted(range(len(layers)), key=orders.__getitem__)
+    glyph.layers = [layers[index] for index in indices]
@@ -23,10 +23,10 @@ def to_ufo_paths(self, ufo_glyph, layer):
     """Draw .glyphs paths onto a pen."""
     pen = ufo_glyph.getPointPen()
 
-    for path in layer.paths:
+    for path_index, path in enumerate(layer.paths):
         nodes = list(path.nodes) # the list is changed below, otherwise you can't draw more than once per session.
-        for node in nodes:
-            self.to_ufo_node_user_data(ufo_glyph, node)
+        for node_index, node in enumerate(nodes):
+            self.to_ufo_node_user_data(ufo_glyph, node, path_index, node_index)
 
         pen.beginPath()
         if not nodes:
@@ -47,6 +47,7 @@ def to_ufo_paths(self, ufo_glyph, layer):
 
 
 def to_glyphs_paths(self, ufo_glyph, layer):
+    path_index = len(layer.paths)
     for contour in ufo_glyph:
         path = self.glyphs_module.GSPath()
         for point in contour:
@@ -61,8 +62,10 @@ def to_glyphs_paths(self, ufo_glyph, layer):
             path.nodes.append(path.nodes.pop(0))
         layer.paths.append(path)
 
-        for node in path.nodes:
-            self.to_glyphs_node_user_data(ufo_glyph, node)
+        for node_index, node in enumerate(path.nodes):
+            self.to_glyphs_node_user_data(ufo_glyph, node, path_index,
+                                          node_index)
+        path_index += 1
 
 
 def _to_ufo_node_type(node_type):
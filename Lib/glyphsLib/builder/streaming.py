@@ -0,0 +1,294 @@
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""UFO fonts that write their glyphs to disk while they are being built.
+
+`StreamingUFOModule` can be given to the UFOBuilder as its `ufo_module`,
+instead of defcon. Each font that it makes is backed by a temporary UFO
+directory: as soon as a glyph is complete, its .glif file is written there
+and only a light stub of the glyph (name, unicodes, width, anchors and lib)
+stays in memory, for the anchor propagation and the GDEF table. `Font.save`
+then writes the remaining glyphs, the plist files and features.fea, and moves
+the UFO to its final path.
+
+The glyphs are defcon Glyph objects that are not attached to a notification
+dispatcher, and the font data (info, lib, groups, kerning, features) are the
+defcon objects, so the builder sees the same API as with defcon and the files
+are written by the same ufoLib calls as `defcon.Font.save`. The one possible
+difference is in the .glif file names, which are given in the order that the
+glyphs are written instead of alphabetical order: they only differ if two
+glyph names map to the same file name.
+
+A glyph is complete once the next glyph of the same layer is created, unless
+it has components: anchors may still be propagated to composite glyphs, so
+they are kept in memory until the font is saved.
+"""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import os
+import shutil
+import tempfile
+
+import defcon
+from defcon.objects.dataSet import DataSet
+from defcon.objects.guideline import Guideline
+from defcon.objects.imageSet import ImageSet
+from ufoLib import UFOWriter
+
+__all__ = ['StreamingUFOModule']
+
+
+class StreamingUFOModule(object):
+    """Stand-in for the defcon module, whose fonts write their glyphs in
+    temporary UFOs inside `directory` (which should be on the same file
+    system as the final UFOs).
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.fonts = []
+
+    def Font(self):
+        font = Font(self.directory)
+        self.fonts.append(font)
+        return font
+
+    def discard(self):
+        """Remove the temporary UFOs of the fonts that were not saved."""
+        for font in self.fonts:
+            font.discard()
+
+
+class Font(object):
+    """A UFO font whose glyphs are written to disk as they are built."""
+
+    def __init__(self, directory):
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        self._tempdir = tempfile.mkdtemp(dir=directory, suffix='.tmp')
+        self._writer = UFOWriter(os.path.join(self._tempdir, 'font.ufo'),
+                                 formatVersion=3)
+        self.path = None
+        self._guidelines = []
+        self.info = defcon.Info(font=self)
+        self.lib = defcon.Lib()
+        self.groups = defcon.Groups()
+        self.kerning = defcon.Kerning()
+        self.features = defcon.Features()
+        self.data = DataSet()
+        # Only observed by the images of the glyphs, stays empty
+        self.images = ImageSet()
+        self.layers = LayerSet(self)
+
+    def _get_glyphOrder(self):
+        return list(self.lib.get('public.glyphOrder', []))
+
+    def _set_glyphOrder(self, value):
+        if value:
+            self.lib['public.glyphOrder'] = value
+        elif 'public.glyphOrder' in self.lib:
+            del self.lib['public.glyphOrder']
+
+    glyphOrder = property(_get_glyphOrder, _set_glyphOrder)
+
+    # Font guidelines are written in fontinfo.plist, through self.info
+
+    def _get_guidelines(self):
+        return list(self._guidelines)
+
+    def _set_guidelines(self, value):
+        self._guidelines = [
+            guideline if isinstance(guideline, Guideline)
+            else Guideline(guidelineDict=guideline)
+            for guideline in value]
+
+    guidelines = property(_get_guidelines, _set_guidelines)
+
+    def newLayer(self, name):
+        return self.layers.newLayer(name)
+
+    def newGlyph(self, name):
+        return self.layers.defaultLayer.newGlyph(name)
+
+    def keys(self):
+        return self.layers.defaultLayer.keys()
+
+    def __iter__(self):
+        return iter(self.layers.defaultLayer)
+
+    def __len__(self):
+        return len(self.layers.defaultLayer)
+
+    def __contains__(self, name):
+        return name in self.layers.defaultLayer
+
+    def __getitem__(self, name):
+        return self.layers.defaultLayer[name]
+
+    def save(self, path):
+        """Finish writing the UFO and move it to `path`, which must not
+        exist.
+        """
+        writer = self._writer
+        writer.writeInfo(self.info)
+        writer.writeGroups(self.groups)
+        writer.writeKerning(self.kerning)
+        writer.writeLib(self.lib)
+        if self.features.text is not None:
+            writer.writeFeatures(self.features.text)
+        for file_name in self.data.fileNames:
+            writer.writeBytesToPath(os.path.join('data', file_name),
+                                    self.data[file_name])
+        for layer in self.layers:
+            layer._save()
+        writer.writeLayerContents(self.layers.layerOrder)
+        writer.setModificationTime()
+        shutil.move(writer.path, path)
+        self.discard()
+        self.path = path
+
+    def discard(self):
+        """Remove the temporary UFO, if the font was not saved yet."""
+        if os.path.isdir(self._tempdir):
+            shutil.rmtree(self._tempdir)
+
+
+class LayerSet(object):
+
+    def __init__(self, font):
+        self.font = font
+        self._layers = {}
+        self.layerOrder = []
+        self.defaultLayer = self.newLayer('public.default')
+
+    def newLayer(self, name):
+        assert name not in self._layers, name
+        glyph_set = self.font._writer.getGlyphSet(
+            layerName=name, defaultLayer=not self._layers)
+        layer = self._layers[name] = Layer(self, name, glyph_set)
+        self.layerOrder.append(name)
+        return layer
+
+    def __iter__(self):
+        for name in self.layerOrder:
+            yield self._layers[name]
+
+    def __len__(self):
+        return len(self.layerOrder)
+
+    def __contains__(self, name):
+        return name in self._layers
+
+    def __getitem__(self, name):
+        return self._layers[name]
+
+
+class Layer(object):
+    """A layer that writes each glyph once it is complete and only keeps a
+    stub of it.
+    """
+
+    def __init__(self, layer_set, name, glyph_set):
+        self.layerSet = layer_set
+        self.name = name
+        self.color = None
+        self._lib = defcon.Lib()
+        self._glyph_set = glyph_set
+        # Name -> Glyph or _GlyphStub, in the order they were added
+        self._glyphs = {}
+        # The glyph being built, written when the next one is created
+        self._current = None
+
+    @property
+    def font(self):
+        return self.layerSet.font
+
+    def _get_lib(self):
+        return self._lib
+
+    def _set_lib(self, value):
+        self._lib.clear()
+        self._lib.update(value)
+
+    lib = property(_get_lib, _set_lib)
+
+    # Nothing is posted, so there is nothing to observe (the images of the
+    # glyphs try to observe the color of their layer)
+
+    def addObserver(self, observer, methodName, notification):
+        pass
+
+    def removeObserver(self, observer, notification):
+        pass
+
+    def newGlyph(self, name):
+        self._flush()
+        glyph = defcon.Glyph(layer=self)
+        glyph.name = name
+        self._glyphs[name] = self._current = glyph
+        return glyph
+
+    def _flush(self):
+        glyph = self._current
+        if glyph is None or glyph.components:
+            return
+        self._current = None
+        if self._glyphs.get(glyph.name) is not glyph:
+            # Replaced by a new glyph of the same name
+            return
+        self._glyph_set.writeGlyph(glyph.name, glyph, glyph.drawPoints)
+        self._glyphs[glyph.name] = _GlyphStub(glyph)
+
+    def _save(self):
+        for name, glyph in sorted(self._glyphs.items()):
+            if not isinstance(glyph, _GlyphStub):
+                self._glyph_set.writeGlyph(name, glyph, glyph.drawPoints)
+        self._glyph_set.writeContents()
+        self._glyph_set.writeLayerInfo(self)
+
+    def keys(self):
+        return list(self._glyphs)
+
+    def __iter__(self):
+        return iter(list(self._glyphs.values()))
+
+    def __len__(self):
+        return len(self._glyphs)
+
+    def __contains__(self, name):
+        return name in self._glyphs
+
+    def __getitem__(self, name):
+        return self._glyphs[name]
+
+
+class _GlyphStub(object):
+    """What is kept in memory of a glyph that was written to disk."""
+
+    __slots__ = ('name', 'unicodes', 'width', 'anchors', 'lib')
+
+    components = ()
+
+    def __init__(self, glyph):
+        self.name = glyph.name
+        self.unicodes = glyph.unicodes
+        self.width = glyph.width
+        self.anchors = list(glyph.anchors)
+        self.lib = dict(glyph.lib)
+
+    @property
+    def unicode(self):
+        return self.unicodes[0] if self.unicodes else None
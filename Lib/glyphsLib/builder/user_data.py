@@ -72,10 +72,9 @@ def to_ufo_layer_user_data(self, ufo_glyph, layer):
             ufo_glyph.lib[key] = user_data[key]
 
 
-def to_ufo_node_user_data(self, ufo_glyph, node):
+def to_ufo_node_user_data(self, ufo_glyph, node, path_index, node_index):
     user_data = node.userData
     if user_data:
-        path_index, node_index = node._indices()
         key = '{}.{}.{}'.format(NODE_USER_DATA_KEY, path_index, node_index)
         ufo_glyph.lib[key] = dict(user_data)
 
@@ -142,8 +141,7 @@ def to_glyphs_layer_user_data(self, ufo_glyph, layer):
             user_data[key] = value
 
 
-def to_glyphs_node_user_data(self, ufo_glyph, node):
-    path_index, node_index = node._indices()
+def to_glyphs_node_user_data(self, ufo_glyph, node, path_index, node_index):
     key = '{}.{}.{}'.format(NODE_USER_DATA_KEY, path_index, node_index)
     if key in ufo_glyph.lib:
         node.userData = ufo_glyph.lib[key]
@@ -24,13 +24,20 @@ import inspect
 import traceback
 import uuid
 import logging
+from array import array
+from bisect import bisect_left
 import glyphsLib
+from glyphsLib import profiling
 from glyphsLib.types import (
     ValueType, Transform, Point, Rect, Size, parse_datetime, parse_color,
     floatToString, readIntlist, writeIntlist, UnicodesList)
 from glyphsLib.parser import Parser
 from glyphsLib.writer import Writer, escape_string
 from collections import OrderedDict
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
 from fontTools.misc.py23 import unicode, basestring, UnicodeIO, unichr, open
 from glyphsLib.affine import Affine
 
@@ -321,6 +328,32 @@ class GSBase(object):
         return True
 
 
+class _ChangeCountingList(list):
+    """A list that counts the changes made to it, so that an index of its
+    items can tell when it is stale.
+    """
+    changes = 0
+
+
+def _counting_method(name):
+    method = getattr(list, name)
+
+    def counting_method(self, *args):
+        result = method(self, *args)
+        self.changes += 1
+        return result
+    counting_method.__name__ = str(name)
+    return counting_method
+
+
+# __setslice__ and __delslice__ are only in Python 2, clear only in Python 3
+for _name in ('__setitem__', '__delitem__', '__setslice__', '__delslice__',
+              '__iadd__', '__imul__', 'append', 'clear', 'extend', 'insert',
+              'pop', 'remove', 'reverse', 'sort'):
+    if hasattr(list, _name):
+        setattr(_ChangeCountingList, _name, _counting_method(_name))
+
+
 class Proxy(object):
     def __init__(self, owner):
         self._owner = owner
@@ -366,6 +399,7 @@ class Proxy(object):
         if type(values) == list:
             method(values)
         elif (type(values) == tuple or
+                isinstance(values, _ChangeCountingList) or
                 values.__class__.__name__ == "__NSArrayM" or
                 type(values) == type(self)):
             method(list(values))
@@ -402,24 +436,7 @@ class LayersIterator:
     @property
     def orderedLayers(self):
         if not self._orderedLayers:
-            glyphLayerIds = [
-                l.associatedMasterId
-                for l in self._owner._layers.values()
-                if l.associatedMasterId == l.layerId
-            ]
-            masterIds = [m.id for m in self._owner.parent.masters]
-            intersectedLayerIds = set(glyphLayerIds) & set(masterIds)
-            orderedLayers = [
-                self._owner._layers[m.id]
-                for m in self._owner.parent.masters
-                if m.id in intersectedLayerIds
-            ]
-            orderedLayers += [
-                self._owner._layers[l.layerId]
-                for l in self._owner._layers.values()
-                if l.layerId not in intersectedLayerIds
-            ]
-            self._orderedLayers = orderedLayers
+            self._orderedLayers = GlyphLayerProxy(self._owner)._orderedLayers()
         return self._orderedLayers
 
 
@@ -439,9 +456,7 @@ class FontFontMasterProxy(Proxy):
                 Key = self.__len__() + Key
             return self.values()[Key]
         elif isString(Key):
-            for master in self.values():
-                if master.id == Key:
-                    return master
+            return self._owner.masterForId(Key)
         else:
             raise(KeyError)
 
@@ -460,6 +475,7 @@ class FontFontMasterProxy(Proxy):
             self._owner._masters[Index] = FontMaster
         else:
             raise(KeyError)
+        self._owner._mastersChanged()
 
     def __delitem__(self, Key):
         if type(Key) is int:
@@ -478,6 +494,7 @@ class FontFontMasterProxy(Proxy):
         if not FontMaster.id:
             FontMaster.id = str(uuid.uuid4()).upper()
         self._owner._masters.append(FontMaster)
+        self._owner._mastersChanged()
 
         # Cycle through all glyphs and append layer
         for glyph in self._owner.glyphs:
@@ -495,10 +512,12 @@ class FontFontMasterProxy(Proxy):
                     glyph.layers.remove(layer)
 
         self._owner._masters.remove(FontMaster)
+        self._owner._mastersChanged()
 
     def insert(self, Index, FontMaster):
         FontMaster.font = self._owner
         self._owner._masters.insert(Index, FontMaster)
+        self._owner._mastersChanged()
 
     def extend(self, FontMasters):
         for FontMaster in FontMasters:
@@ -510,6 +529,7 @@ class FontFontMasterProxy(Proxy):
         self._owner._masters = values
         for m in self._owner._masters:
             m.font = self._owner
+        self._owner._mastersChanged()
 
 
 class FontGlyphsProxy(Proxy):
@@ -537,12 +557,14 @@ class FontGlyphsProxy(Proxy):
         if type(key) is int:
             self._owner._setupGlyph(glyph)
             self._owner._glyphs[key] = glyph
+            self._owner._componentGraph = None
         else:
             raise KeyError  # TODO: add other access methods
 
     def __delitem__(self, key):
         if type(key) is int:
-            del(self._owner._glyph[key])
+            del(self._owner._glyphs[key])
+            self._owner._componentGraph = None
         else:
             raise KeyError  # TODO: add other access methods
 
@@ -583,11 +605,13 @@ class FontGlyphsProxy(Proxy):
     def append(self, glyph):
         self._owner._setupGlyph(glyph)
         self._owner._glyphs.append(glyph)
+        self._owner._componentGraph = None
 
     def extend(self, objects):
         for glyph in objects:
             self._owner._setupGlyph(glyph)
         self._owner._glyphs.extend(list(objects))
+        self._owner._componentGraph = None
 
     def __len__(self):
         return len(self._owner._glyphs)
@@ -596,6 +620,7 @@ class FontGlyphsProxy(Proxy):
         if isinstance(values, Proxy):
             values = list(values)
         self._owner._glyphs = values
+        self._owner._componentGraph = None
         for g in self._owner._glyphs:
             g.parent = self._owner
             for layer in g.layers.values():
@@ -672,7 +697,7 @@ class GlyphLayerProxy(Proxy):
             return self.values().__getitem__(key)
         elif isinstance(key, int):
             if self._owner.parent:
-                return list(self)[key]
+                return self._orderedLayers()[key]
             return list(self.values())[key]
         elif isString(key):
             if key in self._owner._layers:
@@ -693,6 +718,8 @@ class GlyphLayerProxy(Proxy):
             self._owner._layers[key] = layer
         else:
             raise KeyError
+        self._owner._layersChanged()
+        self._owner._componentsChanged()
 
     def __delitem__(self, key):
         if isinstance(key, int) and self._owner.parent:
@@ -701,6 +728,8 @@ class GlyphLayerProxy(Proxy):
             Layer = self.__getitem__(key)
             key = Layer.layerId
         del(self._owner._layers[key])
+        self._owner._layersChanged()
+        self._owner._componentsChanged()
 
     def __iter__(self):
         return LayersIterator(self._owner)
@@ -726,6 +755,8 @@ class GlyphLayerProxy(Proxy):
             layer.layerId = str(uuid.uuid4()).upper()
         self._owner._setupLayer(layer, layer.layerId)
         self._owner._layers[layer.layerId] = layer
+        self._owner._layersChanged()
+        self._owner._componentsChanged()
 
     def extend(self, layers):
         for layer in layers:
@@ -753,20 +784,60 @@ class GlyphLayerProxy(Proxy):
         for (key, layer) in newLayers.items():
             self._owner._setupLayer(layer, key)
         self._owner._layers = newLayers
+        self._owner._layersChanged()
+        self._owner._componentsChanged()
 
     def _ensureMasterLayers(self):
         # Ensure existence of master-linked layers (even for iteration, len() etc.) if accidentally deleted
-        if not self._owner.parent:
+        font = self._owner.parent
+        if not font:
+            return
+        # Only check again when the layers or the font masters have changed
+        if self._owner._masterLayersChecked == (font, font._mastersVersion):
             return
-        for master in self._owner.parent.masters:
+        for master in font.masters:
             # if (master.id not in self._owner._layers or
             #         self._owner._layers[master.id] is None):
-            if self._owner.parent.masters[master.id] is None:
+            if font.masters[master.id] is None:
                 newLayer = GSLayer()
                 newLayer.associatedMasterId = master.id
                 newLayer.layerId = master.id
                 self._owner._setupLayer(newLayer, master.id)
                 self.__setitem__(master.id, newLayer)
+        self._owner._masterLayersChecked = (font, font._mastersVersion)
+
+    def _orderedLayers(self):
+        """Return the layers of the glyph, with the master layers first in the
+        order of the font masters.
+
+        The list is cached on the glyph until its layers or the font masters
+        change.
+        """
+        owner = self._owner
+        font = owner.parent
+        cache = owner._orderedLayersCache
+        if cache is not None and cache[:2] == (font, font._mastersVersion):
+            return cache[2]
+        glyphLayerIds = [
+            l.associatedMasterId
+            for l in owner._layers.values()
+            if l.associatedMasterId == l.layerId
+        ]
+        masterIds = [m.id for m in font.masters]
+        intersectedLayerIds = set(glyphLayerIds) & set(masterIds)
+        orderedLayers = [
+            owner._layers[m.id]
+            for m in font.masters
+            if m.id in intersectedLayerIds
+        ]
+        orderedLayers += [
+            owner._layers[l.layerId]
+            for l in owner._layers.values()
+            if l.layerId not in intersectedLayerIds
+        ]
+        owner._orderedLayersCache = (font, font._mastersVersion,
+                                     orderedLayers)
+        return orderedLayers
 
     def plistArray(self):
         return list(self._owner._layers.values())
@@ -913,6 +984,36 @@ class LayerComponentsProxy(IndexedObjectsProxy):
     def __init__(self, owner):
         super(LayerComponentsProxy, self).__init__(owner)
 
+    # All mutations are reported to the layer so that the component graph of
+    # the font stays up to date.
+    def __setitem__(self, key, value):
+        super(LayerComponentsProxy, self).__setitem__(key, value)
+        self._owner._componentsChanged()
+
+    def __delitem__(self, key):
+        super(LayerComponentsProxy, self).__delitem__(key)
+        self._owner._componentsChanged()
+
+    def append(self, value):
+        super(LayerComponentsProxy, self).append(value)
+        self._owner._componentsChanged()
+
+    def extend(self, values):
+        super(LayerComponentsProxy, self).extend(values)
+        self._owner._componentsChanged()
+
+    def remove(self, value):
+        super(LayerComponentsProxy, self).remove(value)
+        self._owner._componentsChanged()
+
+    def insert(self, index, value):
+        super(LayerComponentsProxy, self).insert(index, value)
+        self._owner._componentsChanged()
+
+    def setter(self, values):
+        super(LayerComponentsProxy, self).setter(values)
+        self._owner._componentsChanged()
+
 
 class LayerAnnotationProxy(IndexedObjectsProxy):
     _objects_name = "_annotations"
@@ -936,6 +1037,15 @@ class PathNodesProxy(IndexedObjectsProxy):
 
 
 class CustomParametersProxy(Proxy):
+    """The custom parameters of a font, master or instance.
+
+    Several parameters can have the same name. They are indexed by name, in
+    their original order, in the `_customParametersIndex` attribute of the
+    owner. The index is updated by the mutations done through this proxy and
+    by renaming parameters. The list of the owner counts its changes, so
+    that the index is rebuilt when the list from `values()` has been changed
+    directly.
+    """
     def __getitem__(self, key):
         if isinstance(key, slice):
             return self.values().__getitem__(key)
@@ -947,10 +1057,31 @@ class CustomParametersProxy(Proxy):
                 return customParameter.value
         return None
 
+    def _index(self):
+        """Return an OrderedDict of the lists of custom parameters by name."""
+        owner = self._owner
+        parameters = owner._customParameters
+        index = owner._customParametersIndex
+        if (index is None or index[0] is not parameters or
+                index[1] != parameters.changes):
+            byName = OrderedDict()
+            for parameter in parameters:
+                byName.setdefault(parameter.name, []).append(parameter)
+            index = (parameters, parameters.changes, byName)
+            owner._customParametersIndex = index
+        return index[2]
+
+    def _invalidateIndex(self):
+        self._owner._customParametersIndex = None
+
     def _get_parameter_by_key(self, key):
-        for customParameter in self._owner._customParameters:
-            if customParameter.name == key:
-                return customParameter
+        parameters = self._index().get(key)
+        if parameters:
+            return parameters[0]
+
+    def _get_parameters_by_key(self, key):
+        """Return all the custom parameters with the given name."""
+        return list(self._index().get(key, ()))
 
     def __setitem__(self, key, value):
         customParameter = self._get_parameter_by_key(key)
@@ -958,17 +1089,17 @@ class CustomParametersProxy(Proxy):
             customParameter.value = value
         else:
             parameter = GSCustomParameter(name=key, value=value)
-            self._owner._customParameters.append(parameter)
+            self.append(parameter)
 
     def __delitem__(self, key):
         if isinstance(key, int):
             del self._owner._customParameters[key]
         elif isinstance(key, basestring):
-            for parameter in self._owner._customParameters:
-                if parameter.name == key:
-                    self._owner._customParameters.remove(parameter)
+            for parameter in self._get_parameters_by_key(key):
+                self._owner._customParameters.remove(parameter)
         else:
             raise KeyError
+        self._invalidateIndex()
 
     def __contains__(self, item):
         if isString(item):
@@ -980,22 +1111,31 @@ class CustomParametersProxy(Proxy):
             yield self._owner._customParameters[index]
 
     def append(self, parameter):
+        # Keep the index up to date instead of rebuilding it later
+        byName = self._index()
         parameter.parent = self._owner
         self._owner._customParameters.append(parameter)
+        byName.setdefault(parameter.name, []).append(parameter)
+        self._owner._customParametersIndex = (
+            self._owner._customParameters,
+            self._owner._customParameters.changes, byName)
 
     def extend(self, parameters):
         for parameter in parameters:
             parameter.parent = self._owner
         self._owner._customParameters.extend(parameters)
+        self._invalidateIndex()
 
     def remove(self, parameter):
         if isString(parameter):
             parameter = self.__getitem__(parameter)
         self._owner._customParameters.remove(parameter)
+        self._invalidateIndex()
 
     def insert(self, index, parameter):
         parameter.parent = self._owner
         self._owner._customParameters.insert(index, parameter)
+        self._invalidateIndex()
 
     def __len__(self):
         return len(self._owner._customParameters)
@@ -1006,7 +1146,8 @@ class CustomParametersProxy(Proxy):
     def __setter__(self, parameters):
         for parameter in parameters:
             parameter.parent = self._owner
-        self._owner._customParameters = parameters
+        self._owner._customParameters = _ChangeCountingList(parameters)
+        self._invalidateIndex()
 
     def setterMethod(self):
         return self.__setter__
@@ -1123,6 +1264,18 @@ class GSCustomParameter(GSBase):
         return "<%s %s: %s>" % \
             (self.__class__.__name__, self.name, self._value)
 
+    @property
+    def name(self):
+        return self._name
+
+    @name.setter
+    def name(self, name):
+        self._name = name
+        # The parent indexes its custom parameters by name
+        parent = getattr(self, 'parent', None)
+        if parent is not None:
+            parent._customParametersIndex = None
+
     def plistValue(self):
         string = UnicodeIO()
         writer = Writer(string)
@@ -1285,12 +1438,14 @@ class GSFontMaster(GSBase):
         "xHeight"
     )
 
+    _customParametersIndex = None
+
     def __init__(self):
         super(GSFontMaster, self).__init__()
-        self.id = str(uuid.uuid4())
         self.font = None
+        self.id = str(uuid.uuid4())
         self._name = None
-        self._customParameters = []
+        self._customParameters = _ChangeCountingList()
         self.italicAngle = 0.0
         self._userData = None
         self.customName = ''
@@ -1312,6 +1467,18 @@ class GSFontMaster(GSBase):
             return self._name != self.name
         return super(GSFontMaster, self).shouldWriteValueForKey(key)
 
+    @property
+    def id(self):
+        return self._id
+
+    @id.setter
+    def id(self, value):
+        self._id = value
+        # The font indexes its masters by id
+        font = getattr(self, 'font', None)
+        if font is not None:
+            font._mastersChanged()
+
     @property
     def name(self):
         name = self.customParameters['Master Name']
@@ -1394,6 +1561,26 @@ class GSFontMaster(GSBase):
         lambda self, value: UserDataProxy(self).setter(value))
 
 
+def _indexInList(obj, objects):
+    """Return the position of `obj` in the list `objects`.
+
+    The position is remembered in the `_index` attribute of the object, so
+    that finding it again is O(1) as long as the list is not reordered. When
+    the remembered position is outdated, the positions of all the objects in
+    the list are refreshed in a single pass.
+    """
+    index = obj._index
+    if (index is not None and index < len(objects) and
+            objects[index] is obj):
+        return index
+    obj._index = None
+    for index, other in enumerate(objects):
+        other._index = index
+    if obj._index is None:
+        raise ValueError("%r is not in list" % obj)
+    return obj._index
+
+
 class GSNode(GSBase):
     _PLIST_VALUE_RE = re.compile(
         '"([-.e\d]+) ([-.e\d]+) (LINE|CURVE|QCURVE|OFFCURVE|n/a)'
@@ -1404,6 +1591,7 @@ class GSNode(GSBase):
     OFFCURVE = "offcurve"
     QCURVE = "qcurve"
     _parent = None
+    _index = None
 
     def __init__(self, position=(0, 0), nodetype=LINE,
                  smooth=False, name=None):
@@ -1475,25 +1663,27 @@ class GSNode(GSBase):
     @property
     def index(self):
         assert self.parent
-        return self.parent.nodes.index(self)
+        return _indexInList(self, self.parent._nodes)
 
     @property
     def nextNode(self):
         assert self.parent
+        nodes = self.parent._nodes
         index = self.index
-        if index == (len(self.parent.nodes) - 1):
-            return self.parent.nodes[0]
-        elif index < len(self.parent.nodes):
-            return self.parent.nodes[index + 1]
+        if index == (len(nodes) - 1):
+            return nodes[0]
+        elif index < len(nodes):
+            return nodes[index + 1]
 
     @property
     def prevNode(self):
         assert self.parent
+        nodes = self.parent._nodes
         index = self.index
         if index == 0:
-            return self.parent.nodes[-1]
-        elif index < len(self.parent.nodes):
-            return self.parent.nodes[index - 1]
+            return nodes[-1]
+        elif index < len(nodes):
+            return nodes[index - 1]
 
     def makeNodeFirst(self):
         assert self.parent
@@ -1551,12 +1741,11 @@ class GSNode(GSBase):
         """Find the path_index and node_index that identify the given node."""
         path = self.parent
         layer = path.parent
-        for path_index in range(len(layer.paths)):
-            if path == layer.paths[path_index]:
-                for node_index in range(len(path.nodes)):
-                    if self == path.nodes[node_index]:
-                        return Point(path_index, node_index)
-        return None
+        try:
+            return Point(_indexInList(path, layer._paths),
+                         _indexInList(self, path._nodes))
+        except ValueError:
+            return None
 
 
 class GSPath(GSBase):
@@ -1568,6 +1757,7 @@ class GSPath(GSBase):
         "closed": True,
     }
     _parent = None
+    _index = None
 
     def __init__(self):
         super(GSPath, self).__init__()
@@ -1660,9 +1850,8 @@ class GSPath(GSBase):
     @property
     def direction(self):
         direction = 0
-        for i in range(len(self.nodes)):
-            thisNode = self.nodes[i]
-            nextNode = thisNode.nextNode
+        nodes = self._nodes
+        for thisNode, nextNode in zip(nodes, nodes[1:] + nodes[:1]):
             direction += (nextNode.position.x - thisNode.position.x) * (nextNode.position.y + thisNode.position.y)
         if direction < 0:
             return -1
@@ -2308,6 +2497,8 @@ class GSInstance(GSBase):
         "interpolationCustom3": "customValue3",
     }
 
+    _customParametersIndex = None
+
     def interpolateFont():
         pass
 
@@ -2321,7 +2512,7 @@ class GSInstance(GSBase):
         self.visible = True
         self.isBold = False
         self.isItalic = False
-        self._customParameters = []
+        self._customParameters = _ChangeCountingList()
 
     customParameters = property(
         lambda self: CustomParametersProxy(self),
@@ -2606,6 +2797,7 @@ class GSLayer(GSBase):
 
     @layerId.setter
     def layerId(self, value):
+        changed = value != getattr(self, '_layerId', None)
         self._layerId = value
         # Update the layer map in the parent glyph, if any.
         # The "hasattr" is here because this setter is called by the GSBase
@@ -2622,6 +2814,24 @@ class GSLayer(GSBase):
             if not updated:
                 parent_layers[self._layerId] = self
             self.parent._layers = parent_layers
+            self.parent._layersChanged()
+            if changed:
+                self.parent._layerKeysChanged()
+
+    @property
+    def associatedMasterId(self):
+        return self._associatedMasterId
+
+    @associatedMasterId.setter
+    def associatedMasterId(self, value):
+        changed = value != getattr(self, '_associatedMasterId', None)
+        self._associatedMasterId = value
+        # The layer order of the parent glyph depends on this value
+        parent = getattr(self, 'parent', None)
+        if parent is not None:
+            parent._layersChanged()
+            if changed:
+                parent._layerKeysChanged()
 
     @property
     def master(self):
@@ -2650,7 +2860,11 @@ class GSLayer(GSBase):
 
     @name.setter
     def name(self, value):
+        changed = value != getattr(self, '_name', None)
         self._name = value
+        parent = getattr(self, 'parent', None)
+        if changed and parent is not None:
+            parent._layerKeysChanged()
 
     anchors = property(
         lambda self: LayerAnchorsProxy(self),
@@ -2668,6 +2882,13 @@ class GSLayer(GSBase):
         lambda self: LayerComponentsProxy(self),
         lambda self, value: LayerComponentsProxy(self).setter(value))
 
+    def _componentsChanged(self):
+        # The "getattr" is here because the components setter is called by
+        # the GSBase __init__() method before the parent property is set.
+        glyph = getattr(self, 'parent', None)
+        if glyph is not None:
+            glyph._componentsChanged()
+
     guides = property(
         lambda self: LayerGuideLinesProxy(self),
         lambda self, value: LayerGuideLinesProxy(self).setter(value))
@@ -2855,6 +3076,11 @@ class GSGlyph(GSBase):
         "partsSettings",
     )
 
+    _orderedLayersCache = None
+    _masterLayersChecked = None
+    # Incremented when the id, the master id or the name of a layer changes
+    _layerKeysVersion = 0
+
     def __init__(self, name=None):
         super(GSGlyph, self).__init__()
         self._layers = OrderedDict()
@@ -2896,6 +3122,26 @@ class GSGlyph(GSBase):
         for layer in list(self._layers):
             if layer == key:
                 del self._layers[key]
+        self._layersChanged()
+        self._componentsChanged()
+
+    def _layersChanged(self):
+        """Forget the cached layer order and master layers check after the
+        layers of the glyph have changed."""
+        self._orderedLayersCache = None
+        self._masterLayersChecked = None
+
+    def _layerKeysChanged(self):
+        """Note that the id, the master id or the name of one of the layers
+        of the glyph has changed."""
+        self._layerKeysVersion += 1
+
+    def _componentsChanged(self):
+        """Update the component graph of the font after the components of
+        one of the layers have changed."""
+        font = getattr(self, 'parent', None)
+        if font is not None and font._componentGraph is not None:
+            font._componentGraph._updateGlyph(self)
 
     @property
     def string(self):
@@ -2938,6 +3184,423 @@ class GSGlyph(GSBase):
         self._unicodes = UnicodesList(unicodes)
 
 
+class GSComponentGraph(object):
+    """The graph of component references between the glyphs of a font.
+
+    It is built in one pass over the layers of all glyphs (background layers
+    are not included) and is kept up to date when components or layers are
+    added or removed through the usual proxies. Renaming a glyph or a
+    component in place is not tracked; in that case, reset the graph with
+    `font.componentGraph = None` so that it is built again when needed.
+
+    Usage:
+        graph = font.componentGraph
+        graph.components('Aacute')  # ['A', 'acutecomb']
+        graph.usedBy('A')  # ['Aacute', 'Adieresis', ...]
+        graph.componentClosure(['Aacute'])  # {'Aacute', 'A', 'acutecomb'}
+    """
+
+    def __init__(self, font):
+        # Glyph name -> names of the glyphs used as components, in the order
+        # in which they were first found in the layers.
+        self._forward = OrderedDict()
+        # Glyph name -> names of the glyphs that use it as a component.
+        self._reverse = {}
+        for glyph in font._glyphs:
+            self._forward[glyph.name] = ()
+            self._updateGlyph(glyph)
+
+    def _updateGlyph(self, glyph):
+        name = glyph.name
+        for component_name in self._forward.get(name, ()):
+            users = self._reverse[component_name]
+            users.pop(name, None)
+            if not users:
+                del self._reverse[component_name]
+        components = OrderedDict()
+        for layer in glyph._layers.values():
+            for component in layer._components:
+                components[component.name] = None
+        self._forward[name] = tuple(components)
+        for component_name in components:
+            self._reverse.setdefault(component_name, OrderedDict())[name] = None
+
+    def __contains__(self, name):
+        return name in self._forward
+
+    def components(self, name):
+        """Return the names of the glyphs directly used as components by the
+        given glyph, including the ones that are missing from the font."""
+        return list(self._forward.get(name, ()))
+
+    def usedBy(self, name):
+        """Return the names of the glyphs that directly use the given glyph
+        as a component."""
+        return list(self._reverse.get(name, ()))
+
+    def _successors(self, name):
+        return [c for c in self._forward[name] if c in self._forward]
+
+    def componentClosure(self, names):
+        """Return the set of the given glyph names plus all the glyphs that
+        they use as components, recursively. Only glyphs of the font are
+        returned."""
+        return self._closure(names, self._forward)
+
+    def usedByClosure(self, names):
+        """Return the set of the given glyph names plus all the glyphs that
+        use them as components, recursively. Only glyphs of the font are
+        returned."""
+        return self._closure(names, self._reverse)
+
+    def _closure(self, names, edges):
+        result = set()
+        todo = [name for name in names if name in self._forward]
+        while todo:
+            name = todo.pop()
+            if name in result:
+                continue
+            result.add(name)
+            todo.extend(n for n in edges.get(name, ()) if n in self._forward)
+        return result
+
+    def topologicalOrder(self):
+        """Return all glyph names so that each glyph comes after the glyphs
+        that it uses as components. Glyphs that are part of a component cycle
+        (or that use such glyphs) come last, in font order."""
+        pending = {}
+        for name, components in self._forward.items():
+            pending[name] = sum(1 for c in components if c in self._forward)
+        order = [name for name, count in pending.items() if count == 0]
+        i = 0
+        while i < len(order):
+            for user in self._reverse.get(order[i], ()):
+                pending[user] -= 1
+                if pending[user] == 0:
+                    order.append(user)
+            i += 1
+        if len(order) < len(self._forward):
+            done = set(order)
+            order.extend(n for n in self._forward if n not in done)
+        return order
+
+    def cycles(self):
+        """Return the list of component cycles. Each cycle is a list of the
+        names of the glyphs that use each other as components."""
+        # Tarjan's strongly connected components, without recursion
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        result = []
+        for root in self._forward:
+            if root in index:
+                continue
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(self._successors(root)))]
+            while work:
+                name, successors = work[-1]
+                for successor in successors:
+                    if successor not in index:
+                        index[successor] = lowlink[successor] = len(index)
+                        stack.append(successor)
+                        on_stack.add(successor)
+                        work.append(
+                            (successor, iter(self._successors(successor))))
+                        break
+                    elif successor in on_stack:
+                        lowlink[name] = min(lowlink[name], index[successor])
+                else:
+                    work.pop()
+                    if work:
+                        parent = work[-1][0]
+                        lowlink[parent] = min(lowlink[parent], lowlink[name])
+                    if lowlink[name] == index[name]:
+                        component = []
+                        while True:
+                            other = stack.pop()
+                            on_stack.discard(other)
+                            component.append(other)
+                            if other == name:
+                                break
+                        if (len(component) > 1 or
+                                name in self._forward[name]):
+                            result.append(list(reversed(component)))
+        return result
+
+
+class _KerningPairs(object):
+    """The right key ids and values of one left key in one master, in the
+    order in which they were added. The right key ids are also kept sorted,
+    with their positions, to look them up by bisection.
+    """
+    __slots__ = ('rights', 'values', 'sortedRights', 'sortedRows')
+
+    def __init__(self):
+        self.rights = array(str('l'))
+        self.values = array(str('d'))
+        self.sortedRights = array(str('l'))
+        self.sortedRows = array(str('l'))
+
+    def __len__(self):
+        return len(self.rights)
+
+    def _find(self, right):
+        i = bisect_left(self.sortedRights, right)
+        found = i < len(self.sortedRights) and self.sortedRights[i] == right
+        return i, found
+
+    def get(self, right):
+        i, found = self._find(right)
+        if not found:
+            return None
+        return self.values[self.sortedRows[i]]
+
+    def set(self, right, value):
+        i, found = self._find(right)
+        if found:
+            self.values[self.sortedRows[i]] = value
+            return
+        self.sortedRights.insert(i, right)
+        self.sortedRows.insert(i, len(self.rights))
+        self.rights.append(right)
+        self.values.append(value)
+
+    def remove(self, right):
+        """Remove a right key id, raise KeyError if it is not there."""
+        i, found = self._find(right)
+        if not found:
+            raise KeyError(right)
+        row = self.sortedRows.pop(i)
+        del self.sortedRights[i]
+        del self.rights[row]
+        del self.values[row]
+        sortedRows = self.sortedRows
+        for j, other in enumerate(sortedRows):
+            if other > row:
+                sortedRows[j] = other - 1
+
+
+class KerningMapping(MutableMapping):
+    """Base of the dict-like views on the compact kerning storage."""
+
+    def __repr__(self):
+        return repr(OrderedDict(self.items()))
+
+
+class GSKerning(KerningMapping):
+    """Compact storage for the kerning of all the masters of a font.
+
+    Kerning keys (glyph names and class names) are interned in a table
+    shared by all masters. For each master and left key, the right key ids
+    and the values are stored in arrays. It behaves as the usual mapping of
+    master id -> left key -> right key -> value.
+
+    Use `font.compactKerning = True` or `glyphsLib.load(fp,
+    compact_kerning=True)` to store the kerning of a font this way.
+    """
+
+    def __init__(self, kerning=None):
+        self._keys = []
+        self._keyIds = {}
+        # master id -> left key id -> _KerningPairs
+        self._masters = OrderedDict()
+        if kerning:
+            for master_id, master_map in kerning.items():
+                self[master_id] = master_map
+
+    def _keyId(self, key, create=False):
+        keyId = self._keyIds.get(key)
+        if keyId is None and create:
+            keyId = self._keyIds[key] = len(self._keys)
+            self._keys.append(key)
+        return keyId
+
+    def _pairs(self, masterId, leftKey, create=False):
+        lefts = self._masters.get(masterId)
+        if lefts is None:
+            if not create:
+                return None
+            lefts = self._masters[masterId] = OrderedDict()
+        left = self._keyId(leftKey, create)
+        pairs = lefts.get(left)
+        if pairs is None and create:
+            pairs = lefts[left] = _KerningPairs()
+        return pairs
+
+    def valueForPair(self, masterId, leftKey, rightKey):
+        """Return the kerning value of a pair, or None."""
+        pairs = self._pairs(masterId, leftKey)
+        right = self._keyId(rightKey)
+        if pairs is None or right is None:
+            return None
+        return pairs.get(right)
+
+    def setValueForPair(self, masterId, leftKey, rightKey, value):
+        pairs = self._pairs(masterId, leftKey, create=True)
+        pairs.set(self._keyId(rightKey, create=True), float(value))
+
+    def removeValueForPair(self, masterId, leftKey, rightKey):
+        """Remove a pair if it exists, and the left key and the master if
+        they become empty.
+        """
+        pairs = self._pairs(masterId, leftKey)
+        right = self._keyId(rightKey)
+        if pairs is None or right is None:
+            return
+        try:
+            pairs.remove(right)
+        except KeyError:
+            return
+        if not pairs:
+            del self._masters[masterId][self._keyId(leftKey)]
+            self._pruneMaster(masterId)
+
+    def _pruneMaster(self, masterId):
+        """Remove a master that has no kerning left, as
+        GSFont.removeKerningForPair does with the nested dicts.
+        """
+        if not self._masters.get(masterId, True):
+            del self._masters[masterId]
+
+    # Used by the parser to fill the arrays without building nested dicts
+    def classForName(self, name):
+        return lambda: self._newMaster(name)
+
+    def _newMaster(self, masterId):
+        self._masters[masterId] = OrderedDict()
+        return MasterKerningMapping(self, masterId)
+
+    def __getitem__(self, masterId):
+        if masterId not in self._masters:
+            raise KeyError(masterId)
+        return MasterKerningMapping(self, masterId)
+
+    def __setitem__(self, masterId, value):
+        if (isinstance(value, MasterKerningMapping) and
+                value._kerning is self and value._masterId == masterId):
+            return
+        # Read the new pairs first, `value` can be a view on this master
+        items = [(left, list(pairs.items())) for left, pairs in value.items()]
+        self._newMaster(masterId)
+        for left, pairs in items:
+            for right, pairValue in pairs:
+                self.setValueForPair(masterId, left, right, pairValue)
+        self._pruneMaster(masterId)
+
+    def __delitem__(self, masterId):
+        del self._masters[masterId]
+
+    def __iter__(self):
+        return iter(list(self._masters))
+
+    def __len__(self):
+        return len(self._masters)
+
+
+class MasterKerningMapping(KerningMapping):
+    """The kerning of one master in a GSKerning, as a mapping of
+    left key -> right key -> value.
+    """
+
+    def __init__(self, kerning, masterId):
+        self._kerning = kerning
+        self._masterId = masterId
+
+    @property
+    def _lefts(self):
+        # The master is removed from the GSKerning when it becomes empty
+        return self._kerning._masters.get(self._masterId, {})
+
+    def classForName(self, name):
+        return lambda: KerningPairsMapping(self._kerning, self._masterId,
+                                           name)
+
+    def __getitem__(self, leftKey):
+        if self._kerning._keyId(leftKey) not in self._lefts:
+            raise KeyError(leftKey)
+        return KerningPairsMapping(self._kerning, self._masterId, leftKey)
+
+    def __setitem__(self, leftKey, value):
+        if (isinstance(value, KerningPairsMapping) and
+                value._kerning is self._kerning and
+                value._masterId == self._masterId and
+                value._leftKey == leftKey):
+            return
+        items = list(value.items())
+        self._lefts.pop(self._kerning._keyId(leftKey), None)
+        for rightKey, pairValue in items:
+            self._kerning.setValueForPair(
+                self._masterId, leftKey, rightKey, pairValue)
+        self._kerning._pruneMaster(self._masterId)
+
+    def __delitem__(self, leftKey):
+        try:
+            del self._lefts[self._kerning._keyId(leftKey)]
+        except KeyError:
+            raise KeyError(leftKey)
+        self._kerning._pruneMaster(self._masterId)
+
+    def __iter__(self):
+        keys = self._kerning._keys
+        return iter([keys[left] for left in self._lefts])
+
+    def __len__(self):
+        return len(self._lefts)
+
+
+class KerningPairsMapping(KerningMapping):
+    """The kerning of one left key in one master of a GSKerning, as a
+    mapping of right key -> value.
+    """
+
+    def __init__(self, kerning, masterId, leftKey):
+        self._kerning = kerning
+        self._masterId = masterId
+        self._leftKey = leftKey
+
+    def _pairs(self):
+        pairs = self._kerning._pairs(self._masterId, self._leftKey)
+        if pairs is None:
+            return _KerningPairs()
+        return pairs
+
+    def classForName(self, name):
+        return float
+
+    def __getitem__(self, rightKey):
+        value = self._kerning.valueForPair(
+            self._masterId, self._leftKey, rightKey)
+        if value is None:
+            raise KeyError(rightKey)
+        return value
+
+    def __setitem__(self, rightKey, value):
+        self._kerning.setValueForPair(
+            self._masterId, self._leftKey, rightKey, value)
+
+    def __delitem__(self, rightKey):
+        if rightKey not in self:
+            raise KeyError(rightKey)
+        self._kerning.removeValueForPair(
+            self._masterId, self._leftKey, rightKey)
+
+    def __iter__(self):
+        keys = self._kerning._keys
+        return iter([keys[right] for right in self._pairs().rights])
+
+    def __len__(self):
+        return len(self._pairs())
+
+    def items(self):
+        keys = self._kerning._keys
+        pairs = self._pairs()
+        return [(keys[right], value)
+                for right, value in zip(pairs.rights, pairs.values)]
+
+
 class GSFont(GSBase):
     _classesForName = {
         ".appVersion": str,
@@ -2986,6 +3649,13 @@ class GSFont(GSBase):
         "kerning": OrderedDict(),
         "keyboardIncrement": 1,
     }
+    _componentGraph = None
+    # Incremented whenever the list of masters or their ids change, to
+    # invalidate what the glyphs cache about their master layers
+    _mastersVersion = 0
+    # The masters by id, rebuilt on demand after the masters change
+    _masterIndex = None
+    _customParametersIndex = None
 
     def __init__(self, path=None):
         super(GSFont, self).__init__()
@@ -2997,7 +3667,7 @@ class GSFont(GSBase):
         self._glyphs = []
         self._masters = []
         self._instances = []
-        self._customParameters = []
+        self._customParameters = _ChangeCountingList()
         self._classes = []
         self.filepath = None
         self._userData = None
@@ -3015,7 +3685,8 @@ class GSFont(GSBase):
             with open(path, 'r', encoding='utf-8') as fp:
                 p = Parser()
                 logger.info('Parsing "%s" file into <GSFont>' % path)
-                p.parse_into_object(self, fp.read())
+                with profiling.stage('parse'):
+                    p.parse_into_object(self, fp.read())
             self.filepath = path
             for master in self.masters:
                 master.font = self
@@ -3052,6 +3723,24 @@ class GSFont(GSBase):
     glyphs = property(lambda self: FontGlyphsProxy(self),
                       lambda self, value: FontGlyphsProxy(self).setter(value))
 
+    @property
+    def componentGraph(self):
+        """The GSComponentGraph of this font, built on first access."""
+        if self._componentGraph is None:
+            self._componentGraph = GSComponentGraph(self)
+        return self._componentGraph
+
+    @componentGraph.setter
+    def componentGraph(self, value):
+        """Only None is accepted, to force a rebuild on next access."""
+        if value is not None:
+            raise ValueError("The component graph can only be reset to None")
+        self._componentGraph = None
+
+    def _mastersChanged(self):
+        self._mastersVersion += 1
+        self._masterIndex = None
+
     def _setupGlyph(self, glyph):
         glyph.parent = self
         for layer in glyph.layers:
@@ -3076,10 +3765,13 @@ class GSFont(GSBase):
                        lambda self, value: FontFontMasterProxy(self).setter(value))
 
     def masterForId(self, key):
-        for master in self._masters:
-            if master.id == key:
-                return master
-        return None
+        masters = self._masterIndex
+        if masters is None:
+            masters = {}
+            for master in self._masters:
+                masters.setdefault(master.id, master)
+            self._masterIndex = masters
+        return masters.get(key)
 
     # FIXME: (jany) Why is this not a FontInstanceProxy?
     @property
@@ -3104,18 +3796,49 @@ class GSFont(GSBase):
         lambda self: UserDataProxy(self),
         lambda self, value: UserDataProxy(self).setter(value))
 
+    def classForName(self, name):
+        if name == "kerning" and self.compactKerning:
+            return GSKerning
+        return super(GSFont, self).classForName(name)
+
     @property
     def kerning(self):
         return self._kerning
 
     @kerning.setter
     def kerning(self, kerning):
+        if isinstance(kerning, GSKerning):
+            self._kerning = kerning
+            return
+        if self.compactKerning:
+            self._kerning = GSKerning(kerning)
+            return
         self._kerning = kerning
         for master_id, master_map in kerning.items():
             for left_glyph, glyph_map in master_map.items():
                 for right_glyph, value in glyph_map.items():
                     glyph_map[right_glyph] = float(value)
 
+    @property
+    def compactKerning(self):
+        """Whether the kerning is stored in a compact GSKerning instead of
+        nested dicts.
+        """
+        return isinstance(getattr(self, "_kerning", None), GSKerning)
+
+    @compactKerning.setter
+    def compactKerning(self, value):
+        if value == self.compactKerning:
+            return
+        if value:
+            self._kerning = GSKerning(self._kerning)
+        else:
+            self._kerning = OrderedDict(
+                (master_id, OrderedDict(
+                    (left, OrderedDict(pairs.items()))
+                    for left, pairs in master_map.items()))
+                for master_id, master_map in self._kerning.items())
+
     @property
     def selection(self):
         return (glyph for glyph in self.glyphs if glyph.selected)
@@ -3143,6 +3866,11 @@ class GSFont(GSBase):
 
     def kerningForPair(self, fontMasterId, leftKey, rightKey, direction=LTR):
         # TODO: (jany) understand and use the direction parameter
+        if isinstance(self._kerning, GSKerning):
+            value = self._kerning.valueForPair(fontMasterId, leftKey, rightKey)
+            if value is None:
+                return self.EMPTY_KERNING_VALUE
+            return value
         if not self._kerning:
             return self.EMPTY_KERNING_VALUE
         try:
@@ -3153,6 +3881,10 @@ class GSFont(GSBase):
     def setKerningForPair(self, fontMasterId, leftKey, rightKey, value,
                           direction=LTR):
         # TODO: (jany) understand and use the direction parameter
+        if isinstance(self._kerning, GSKerning):
+            self._kerning.setValueForPair(
+                fontMasterId, leftKey, rightKey, value)
+            return
         if not self._kerning:
             self._kerning = {}
         if fontMasterId not in self._kerning:
@@ -3164,6 +3896,9 @@ class GSFont(GSBase):
     def removeKerningForPair(self, fontMasterId, leftKey, rightKey,
                              direction=LTR):
         # TODO: (jany) understand and use the direction parameter
+        if isinstance(self._kerning, GSKerning):
+            self._kerning.removeValueForPair(fontMasterId, leftKey, rightKey)
+            return
         if not self._kerning:
             return
         if fontMasterId not in self._kerning:
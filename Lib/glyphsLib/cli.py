@@ -15,10 +15,15 @@
 from __future__ import print_function, division, absolute_import, unicode_literals
 
 import argparse
+from contextlib import contextmanager
+import io
+import json
 import os
 import sys
+import time
 
 import glyphsLib
+from glyphsLib import profiling
 
 
 def main(args=None):
@@ -59,44 +64,35 @@ def main(args=None):
             "file."
         ),
     )
-    group = parser_glyphs2ufo.add_argument_group(
-        "Roundtripping between Glyphs and UFOs"
-    )
-    group.add_argument(
-        "--no-preserve-glyphsapp-metadata",
-        action="store_false",
+    parser_glyphs2ufo.add_argument(
+        "--subset",
+        default=None,
+        metavar="GLYPHS",
         help=(
-            "Skip preserving Glyphs metadata in master UFOs and designspace "
-            "file, which would be used to minimize differences when "
-            "roundtripping between Glyphs and UFOs."
+            "Only convert these glyphs, given as a comma- or space-separated "
+            "list of glyph names, plus the glyphs they use as components."
         ),
     )
-    group.add_argument(
-        "--propagate-anchors",
+    parser_glyphs2ufo.add_argument(
+        "--stream",
         action="store_true",
         help=(
-            "Copy anchors from underlying components to actual "
-            "glyph. Glyphs would do this implicitly, only use if you need "
-            "full control over all anchors."
-        ),
-    )
-    group.add_argument(
-        "--no-normalize-ufos",
-        action="store_false",
-        help=(
-            "Skip normalizing UFOs with ufonormalizer, which would avoid "
-            "differences due to spacing, reordering of keys, etc."
+            "Write the glyphs to disk as soon as they are converted instead "
+            "of keeping whole UFOs in memory. The output is the same, faster "
+            "and with less memory on large fonts."
         ),
     )
-    group.add_argument(
-        "--create-background-layers",
+    parser_glyphs2ufo.add_argument(
+        "--watch",
         action="store_true",
         help=(
-            "Create background layers for all glyphs unless present, "
-            "this can help in a workflow with multiple tools that "
-            "may create background layers automatically."
+            "Keep running and update the UFOs whenever the Glyphs file is "
+            "saved. Only the glyphs that changed are converted again, and "
+            "only the files that changed are written. Stop with Ctrl-C."
         ),
     )
+    _add_profile_arguments(parser_glyphs2ufo)
+    _add_glyphs2ufo_roundtrip_arguments(parser_glyphs2ufo)
 
     parser_ufo2glyphs = subparsers.add_parser("ufo2glyphs", help=ufo2glyphs.__doc__)
     parser_ufo2glyphs.set_defaults(func=ufo2glyphs)
@@ -115,6 +111,7 @@ def main(args=None):
     parser_ufo2glyphs.add_argument(
         "--output-path", help="The path to write the Glyphs file to."
     )
+    _add_profile_arguments(parser_ufo2glyphs)
     group = parser_ufo2glyphs.add_argument_group(
         "Roundtripping between UFOs and Glyphs"
     )
@@ -138,14 +135,199 @@ def main(args=None):
         help="Enable automatic alignment of components in glyphs.",
     )
 
+    parser_batch = subparsers.add_parser("batch", help=batch.__doc__)
+    parser_batch.set_defaults(func=batch)
+    parser_batch.add_argument(
+        "glyphs_files",
+        nargs="*",
+        metavar="GLYPHS_FILE",
+        help="Glyphs files to convert.",
+    )
+    parser_batch.add_argument(
+        "--manifest",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help=(
+            "Also convert the Glyphs files listed in PATH, one per line, "
+            "relative to the directory of PATH. Lines starting with '#' are "
+            "ignored. Can be given several times."
+        ),
+    )
+    parser_batch.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=None,
+        help="Number of worker processes. (default: number of CPUs)",
+    )
+    parser_batch.add_argument(
+        "-m",
+        "--output-dir",
+        default=None,
+        help=(
+            "Output directory of masters and designspace files. (default: "
+            "directory of each Glyphs file). The fonts written to the same "
+            "directory must have different family or style names."
+        ),
+    )
+    parser_batch.add_argument(
+        "--stream",
+        action="store_true",
+        help="Write the glyphs to disk as soon as they are converted.",
+    )
+    _add_glyphs2ufo_roundtrip_arguments(parser_batch)
+
+    parser_serve = subparsers.add_parser("serve", help=serve.__doc__)
+    parser_serve.set_defaults(func=serve)
+    parser_serve.add_argument(
+        "-p",
+        "--port",
+        type=int,
+        default=8420,
+        help="Port to listen to on localhost. (default: 8420)",
+    )
+    parser_serve.add_argument(
+        "--socket",
+        default=None,
+        metavar="PATH",
+        help="Listen to the Unix socket PATH instead of a port.",
+    )
+    parser_serve.add_argument(
+        "--max-fonts",
+        type=int,
+        default=4,
+        help=(
+            "Number of Glyphs files to keep in memory, with their UFOs. "
+            "(default: 4)"
+        ),
+    )
+
+    parser_diff = subparsers.add_parser("diff", help=diff.__doc__)
+    parser_diff.set_defaults(func=diff)
+    parser_diff.add_argument(
+        "old_file", metavar="OLD_GLYPHS_FILE", help="Glyphs file to compare from."
+    )
+    parser_diff.add_argument(
+        "new_file", metavar="NEW_GLYPHS_FILE", help="Glyphs file to compare to."
+    )
+    parser_diff.add_argument(
+        "--json",
+        action="store_true",
+        help=(
+            "Print each change as a JSON object on its own line, with its kind, "
+            "path, old value and new value."
+        ),
+    )
+
+    parser_merge = subparsers.add_parser("merge", help=merge.__doc__)
+    parser_merge.set_defaults(func=merge)
+    parser_merge.add_argument(
+        "base_file", metavar="BASE", help="Glyphs file both versions were edited from."
+    )
+    parser_merge.add_argument(
+        "ours_file", metavar="OURS", help="Glyphs file to merge the changes into."
+    )
+    parser_merge.add_argument(
+        "theirs_file", metavar="THEIRS", help="Glyphs file to merge the changes from."
+    )
+    parser_merge.add_argument(
+        "-o",
+        "--output-path",
+        default=None,
+        help=(
+            "The path to write the merged Glyphs file to, which can be one of the "
+            "merged files. (default: standard output)"
+        ),
+    )
+
     options = parser.parse_args(args)
 
     if "func" in vars(options):
-        return options.func(options)
+        with _profile(options):
+            return options.func(options)
     else:
         parser.print_help()
 
 
+def _add_glyphs2ufo_roundtrip_arguments(parser):
+    group = parser.add_argument_group("Roundtripping between Glyphs and UFOs")
+    group.add_argument(
+        "--no-preserve-glyphsapp-metadata",
+        action="store_false",
+        help=(
+            "Skip preserving Glyphs metadata in master UFOs and designspace "
+            "file, which would be used to minimize differences when "
+            "roundtripping between Glyphs and UFOs."
+        ),
+    )
+    group.add_argument(
+        "--propagate-anchors",
+        action="store_true",
+        help=(
+            "Copy anchors from underlying components to actual "
+            "glyph. Glyphs would do this implicitly, only use if you need "
+            "full control over all anchors."
+        ),
+    )
+    group.add_argument(
+        "--no-normalize-ufos",
+        action="store_false",
+        help=(
+            "Skip normalizing UFOs with ufonormalizer, which would avoid "
+            "differences due to spacing, reordering of keys, etc."
+        ),
+    )
+    group.add_argument(
+        "--create-background-layers",
+        action="store_true",
+        help=(
+            "Create background layers for all glyphs unless present, "
+            "this can help in a workflow with multiple tools that "
+            "may create background layers automatically."
+        ),
+    )
+
+
+def _add_profile_arguments(parser):
+    group = parser.add_argument_group("Profiling")
+    group.add_argument(
+        "--profile",
+        metavar="PATH",
+        default=None,
+        help=(
+            "Record the wall time and call counts of each stage of the "
+            "conversion, in total and per master, and write them to PATH."
+        ),
+    )
+    group.add_argument(
+        "--profile-format",
+        choices=("json", "chrome"),
+        default="json",
+        help=(
+            "Write the profile as a JSON summary, or as a Chrome trace of "
+            "every call for chrome://tracing. (default: json)"
+        ),
+    )
+
+
+@contextmanager
+def _profile(options):
+    """Profile the `with` block if the --profile option was given."""
+    if not getattr(options, "profile", None):
+        yield
+        return
+    trace = options.profile_format == "chrome"
+    with profiling.profile(trace=trace) as profiler:
+        try:
+            yield
+        finally:
+            if trace:
+                profiler.write_chrome_trace(options.profile)
+            else:
+                profiler.write_json(options.profile)
+
+
 def glyphs2ufo(options):
     """Converts a Glyphs.app source file into UFO masters and a designspace file."""
     if options.output_dir is None:
@@ -157,6 +339,16 @@ def glyphs2ufo(options):
             os.path.basename(os.path.splitext(options.glyphs_file)[0]) + ".designspace",
         )
 
+    subset = None
+    if options.subset is not None:
+        subset = options.subset.replace(",", " ").split()
+
+    if options.watch:
+        if subset is not None or options.stream:
+            print("--watch cannot be used with --subset or --stream.", file=sys.stderr)
+            return 2
+        return _watch(options)
+
     # If options.instance_dir is None, instance UFO paths in the designspace
     # file will either use the value in customParameter's FULL_FILENAME_KEY or be
     # made relative to "instance_ufos/".
@@ -169,8 +361,195 @@ def glyphs2ufo(options):
         propagate_anchors=options.propagate_anchors,
         normalize_ufos=options.no_normalize_ufos,
         create_background_layers=options.create_background_layers,
+        subset=subset,
+        stream=options.stream,
+    )
+
+
+def _watch(options):
+    from glyphsLib.watch import GlyphsWatcher
+
+    watcher = GlyphsWatcher(
+        options.glyphs_file,
+        options.output_dir,
+        options.instance_dir,
+        designspace_path=options.designspace_path,
+        minimize_glyphs_diffs=options.no_preserve_glyphsapp_metadata,
+        propagate_anchors=options.propagate_anchors,
+        normalize_ufos=options.no_normalize_ufos,
+        create_background_layers=options.create_background_layers,
     )
 
+    def report(written, seconds):
+        print("{} files updated in {:.2f}s".format(len(written), seconds))
+        sys.stdout.flush()
+
+    print("Watching {} for changes, press Ctrl-C to stop.".format(options.glyphs_file))
+    sys.stdout.flush()
+    try:
+        watcher.watch(callback=report)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def batch(options):
+    """Converts many Glyphs.app source files at once, with a pool of processes."""
+    from glyphsLib.batch import BatchJob, build_masters_batch, read_manifest
+
+    glyphs_files = list(options.glyphs_files)
+    for manifest in options.manifest:
+        glyphs_files.extend(read_manifest(manifest))
+    if not glyphs_files:
+        print("No Glyphs files to convert.", file=sys.stderr)
+        return 2
+
+    jobs = []
+    designspace_paths = set()
+    for glyphs_file in glyphs_files:
+        output_dir = options.output_dir
+        if output_dir is None:
+            output_dir = os.path.dirname(glyphs_file) or os.curdir
+        designspace_path = os.path.join(
+            output_dir,
+            os.path.basename(os.path.splitext(glyphs_file)[0]) + ".designspace",
+        )
+        # The jobs run at the same time, they must not write the same files
+        key = os.path.normcase(os.path.abspath(designspace_path))
+        if key in designspace_paths:
+            print(
+                "Several Glyphs files would be written to {}.".format(designspace_path),
+                file=sys.stderr,
+            )
+            return 2
+        designspace_paths.add(key)
+        jobs.append(BatchJob(glyphs_file, output_dir, None, designspace_path))
+
+    start = time.time()
+    work = 0.0
+    failed = 0
+    results = build_masters_batch(
+        jobs,
+        processes=options.jobs,
+        minimize_glyphs_diffs=options.no_preserve_glyphsapp_metadata,
+        propagate_anchors=options.propagate_anchors,
+        normalize_ufos=options.no_normalize_ufos,
+        create_background_layers=options.create_background_layers,
+        stream=options.stream,
+    )
+    for index, result in enumerate(results, 1):
+        work += result.seconds
+        print(
+            "[{}/{}] {:<6} {:8.2f}s  {}".format(
+                index, len(jobs), result.status, result.seconds, result.job.glyphs_file
+            )
+        )
+        if result.error is not None:
+            failed += 1
+            print(result.error, file=sys.stderr)
+        sys.stdout.flush()
+    print(
+        "{} files converted, {} failed, in {:.2f}s ({:.2f}s of work)".format(
+            len(jobs) - failed, failed, time.time() - start, work
+        )
+    )
+    return 1 if failed else 0
+
+
+def serve(options):
+    """Runs a conversion server that keeps Glyphs files and UFOs in memory."""
+    from glyphsLib.server import ConversionService, FontCache, make_server
+
+    service = ConversionService(FontCache(max_fonts=options.max_fonts))
+    server = make_server(service, port=options.port, socket_path=options.socket)
+    if options.socket:
+        print("Serving on {}".format(options.socket))
+    else:
+        print("Serving on http://127.0.0.1:{}".format(server.server_address[1]))
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if options.socket and os.path.exists(options.socket):
+            os.remove(options.socket)
+    return 0
+
+
+def diff(options):
+    """Lists the structural differences between two Glyphs.app source files."""
+    from glyphsLib.diffing import diff as diff_fonts
+
+    changes = diff_fonts(options.old_file, options.new_file)
+    for change in changes:
+        if options.json:
+            print(json.dumps(change._asdict(), default=_json_default))
+            continue
+        path = "/".join(str(key) for key in change.path)
+        if change.kind == "added":
+            print("+ " + path)
+        elif change.kind == "removed":
+            print("- " + path)
+        elif change.kind == "reordered":
+            print("~ {} (reordered)".format(path))
+        else:
+            print(
+                "~ {}: {} -> {}".format(
+                    path, _format_value(change.old), _format_value(change.new)
+                )
+            )
+    return 1 if changes else 0
+
+
+def merge(options):
+    """Merges the changes between two Glyphs.app source files into a third one."""
+    from glyphsLib.merging import merge_to_file
+
+    # Read all the files first, the output can be one of them
+    texts = []
+    for path in (options.base_file, options.ours_file, options.theirs_file):
+        with io.open(path, "r", encoding="utf-8") as fp:
+            texts.append(io.StringIO(fp.read()))
+    if options.output_path is None:
+        conflicts = merge_to_file(*texts, fp=sys.stdout)
+    else:
+        with io.open(options.output_path, "w", encoding="utf-8") as fp:
+            conflicts = merge_to_file(*texts, fp=fp)
+
+    for conflict in conflicts:
+        print(
+            "Conflict in {}: base {}, ours {}, theirs {}".format(
+                "/".join(str(key) for key in conflict.path),
+                _format_value(conflict.base),
+                _format_value(conflict.ours),
+                _format_value(conflict.theirs),
+            ),
+            file=sys.stderr,
+        )
+    return 1 if conflicts else 0
+
+
+def _format_value(value):
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, default=_json_default)
+    return value
+
+
+def _json_default(value):
+    # Binary data
+    return value.plistValue()
+
+
+def _merge_driver_entry_point():
+    """Provides entry point for a git merge driver, called with %O %A %B."""
+    args = sys.argv[1:]
+    if len(args) != 3:
+        print("usage: glyphs-merge-driver BASE OURS THEIRS", file=sys.stderr)
+        return 2
+    return main(["merge"] + args + ["-o", args[1]])
+
 
 def _glyphs2ufo_entry_point():
     """Provides entry point for a script to keep argparsing in main()."""
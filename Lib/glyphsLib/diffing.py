@@ -0,0 +1,257 @@
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Structural comparison of two versions of a .glyphs file.
+
+    for change in glyphsLib.diff('old/MyFont.glyphs', 'MyFont.glyphs'):
+        print(change.kind, '/'.join(change.path), change.old, change.new)
+
+The fonts are compared as the data of their .glyphs files: glyphs by name,
+layers by id, anchors and custom parameters by name, paths and nodes by
+position, kerning by master and pair... Each difference is a Change, whose
+`path` leads from the font to the value that differs, e.g.
+('glyphs', 'A', 'layers', 'master01', 'paths', 0, 'nodes', 2).
+
+The glyphs are not parsed to be compared: each one is hashed from its text,
+found by glyphsLib.parser.split_glyphs, and only the glyphs whose hashes
+differ are parsed. Comparing two versions of a large font with a few edits
+takes a small part of the time it takes to load them.
+"""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+from collections import OrderedDict, namedtuple
+from difflib import SequenceMatcher
+import hashlib
+from io import open
+
+from fontTools.misc.py23 import tounicode, unicode
+
+from glyphsLib.parser import Parser, split_glyphs
+
+__all__ = ['Change', 'diff']
+
+# `kind` is 'added', 'removed', 'changed' or 'reordered'. `old` is None for
+# an added value and `new` is None for a removed one. A 'reordered' change
+# means that the items of the list at `path` that are in both versions are
+# not in the same order, with `old` and `new` None.
+Change = namedtuple('Change', ['kind', 'path', 'old', 'new'])
+
+# The key of the items of the lists of dictionaries that are matched by key
+# instead of by position, by the name of the list. Lists that have several
+# items with the same key are matched by position.
+LIST_KEYS = {
+    'anchors': 'name',
+    'classes': 'name',
+    'components': 'name',
+    'customParameters': 'name',
+    'featurePrefixes': 'name',
+    'features': 'name',
+    'fontMaster': 'id',
+    'instances': 'name',
+    'layers': 'layerId',
+}
+
+
+def diff(font_a, font_b):
+    """Return the list of Changes that turn `font_a` into `font_b`.
+
+    The fonts can be GSFont objects, paths of .glyphs files or file objects.
+    """
+    text_a = read_text(font_a)
+    text_b = read_text(font_b)
+    if text_a == text_b:
+        return []
+    return list(diff_texts(GlyphsText(text_a), GlyphsText(text_b)))
+
+
+def diff_texts(a, b):
+    """Yield the Changes that turn the GlyphsText `a` into `b`, the font
+    data first and then the glyphs, in the order of `b`.
+    """
+    if a.font_text != b.font_text:
+        for change in diff_values((), a.font_data(), b.font_data()):
+            yield change
+
+    for name in a.glyph_order:
+        if name not in b.digests:
+            yield Change('removed', ('glyphs', name), a.glyph_data(name),
+                         None)
+    for name in b.glyph_order:
+        digest = a.digests.get(name)
+        if digest is None:
+            yield Change('added', ('glyphs', name), None, b.glyph_data(name))
+        elif digest != b.digests[name]:
+            for change in diff_values(('glyphs', name), a.glyph_data(name),
+                                      b.glyph_data(name)):
+                yield change
+    if _common_order(a.glyph_order, b.digests) != _common_order(
+            b.glyph_order, a.digests):
+        yield Change('reordered', ('glyphs',), None, None)
+
+
+class GlyphsText(object):
+    """The text of a .glyphs file, with the hash of the text of each glyph.
+
+    The glyphs list is text[list_start:list_end], and `font_text` is the
+    text without it. The glyphs and the rest of the font are only parsed
+    when their data is asked for.
+    """
+
+    def __init__(self, text):
+        self.text = text = tounicode(text, encoding='utf-8')
+        spans = split_glyphs(text)
+        self.list_start = spans.list_start
+        self.list_end = spans.list_end
+        self.font_text = text[:spans.list_start] + text[spans.list_end:]
+        self.glyph_order = []
+        self.spans = {}
+        self.digests = {}
+        for span in spans.glyphs:
+            if span.name not in self.spans:
+                self.glyph_order.append(span.name)
+            self.spans[span.name] = span
+            self.digests[span.name] = hashlib.sha1(
+                text[span.start:span.end].encode('utf-8')).digest()
+
+    def glyph_text(self, name):
+        span = self.spans[name]
+        return self.text[span.start:span.end]
+
+    def glyph_data(self, name):
+        """Return the glyph `name` as plain data (see `parse_plain`)."""
+        return parse_plain(self.glyph_text(name))
+
+    def font_data(self):
+        """Return the font without its glyphs as plain data."""
+        data = parse_plain(self.font_text)
+        data.pop('glyphs', None)
+        return data
+
+
+class _PlainParser(Parser):
+    """Keep the values as they are written, instead of guessing numbers:
+    unicode values like 00E9 are not numbers.
+    """
+
+    def _guess_current_type(self, parsed, value):
+        return unicode
+
+
+def parse_plain(text):
+    """Parse the text of a .glyphs file or of a part of it into
+    OrderedDicts, lists and strings.
+    """
+    return _PlainParser().parse(text)
+
+
+def diff_values(path, old, new):
+    """Yield the Changes between the plain data `old` and `new`, found at
+    `path`.
+    """
+    if old == new:
+        return
+    if isinstance(old, dict) and isinstance(new, dict):
+        for change in _diff_dicts(path, old, new):
+            yield change
+    elif isinstance(old, list) and isinstance(new, list):
+        key = LIST_KEYS.get(path[-1]) if path else None
+        keyed_old = _keyed_items(old, key)
+        keyed_new = _keyed_items(new, key)
+        if keyed_old is not None and keyed_new is not None:
+            changes = _diff_dicts(path, keyed_old, keyed_new, ordered=True)
+        else:
+            changes = _diff_lists(path, old, new)
+        for change in changes:
+            yield change
+    else:
+        yield Change('changed', path, old, new)
+
+
+def _diff_dicts(path, old, new, ordered=False):
+    for key, old_value in old.items():
+        if key not in new:
+            yield Change('removed', path + (key,), old_value, None)
+        else:
+            for change in diff_values(path + (key,), old_value, new[key]):
+                yield change
+    for key, new_value in new.items():
+        if key not in old:
+            yield Change('added', path + (key,), None, new_value)
+    if ordered and _common_order(old, new) != _common_order(new, old):
+        yield Change('reordered', path, None, None)
+
+
+def _diff_lists(path, old, new):
+    """Match the items of the lists by position, around the runs of equal
+    items. Removed items are indexed in `old`, and the others in `new`.
+    """
+    matcher = SequenceMatcher(None, [_hashable(item) for item in old],
+                              [_hashable(item) for item in new],
+                              autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == 'equal':
+            continue
+        if tag == 'replace' and i2 - i1 == j2 - j1:
+            for i, j in zip(range(i1, i2), range(j1, j2)):
+                for change in diff_values(path + (j,), old[i], new[j]):
+                    yield change
+            continue
+        for i in range(i1, i2):
+            yield Change('removed', path + (i,), old[i], None)
+        for j in range(j1, j2):
+            yield Change('added', path + (j,), None, new[j])
+
+
+def _keyed_items(items, key):
+    """Return an OrderedDict of the dictionaries `items` by their `key`, or
+    None if they cannot be matched by key.
+    """
+    if key is None:
+        return None
+    keyed = OrderedDict()
+    for item in items:
+        if not isinstance(item, dict) or key not in item:
+            return None
+        value = item[key]
+        if not isinstance(value, unicode) or value in keyed:
+            return None
+        keyed[value] = item
+    return keyed
+
+
+def _hashable(value):
+    if isinstance(value, dict):
+        return tuple((key, _hashable(item)) for key, item in value.items())
+    if isinstance(value, list):
+        return ('(',) + tuple(_hashable(item) for item in value)
+    return value
+
+
+def _common_order(keys, others):
+    return [key for key in keys if key in others]
+
+
+def read_text(font):
+    """Return the text of a .glyphs file given as a GSFont, a path or a file
+    object.
+    """
+    if hasattr(font, 'read'):
+        return font.read()
+    if hasattr(font, 'glyphs'):
+        from glyphsLib.writer import dumps
+        return dumps(font)
+    with open(font, 'r', encoding='utf-8') as fp:
+        return fp.read()
@@ -20,6 +20,7 @@ from collections import namedtuple
 from fontTools import agl
 from fontTools.misc.py23 import unichr
 from glyphsLib import glyphdata_generated
+from glyphsLib.util import LRUCache
 import sys
 import struct
 import unicodedata
@@ -30,6 +31,12 @@ NARROW_PYTHON_BUILD = sys.maxunicode < 0x10FFFF
 # FIXME: (jany) Shouldn't this be the class GSGlyphInfo?
 Glyph = namedtuple("Glyph", "name,production_name,unicode,category,subCategory")
 
+# Glyph name -> Glyph, from the included data. The builder looks up each glyph
+# once per master, and a long-running process (see glyphsLib.server) once per
+# conversion. Large enough to hold every glyph of the largest fonts, because
+# the lookups go through all the glyphs in a cycle.
+_glyph_cache = LRUCache(1 << 16)
+
 
 def get_glyph(glyph_name, data=glyphdata_generated):
     """Return a named tuple (Glyph) containing information derived from a glyph
@@ -38,6 +45,15 @@ def get_glyph(glyph_name, data=glyphdata_generated):
     The information is derived from an included copy of GlyphsData.xml,
     going purely by the glyph name.
     """
+    if data is not glyphdata_generated:
+        return _get_glyph(glyph_name, data)
+    glyph = _glyph_cache.get(glyph_name)
+    if glyph is None:
+        glyph = _glyph_cache[glyph_name] = _get_glyph(glyph_name, data)
+    return glyph
+
+
+def _get_glyph(glyph_name, data):
 
     # First, get the base name of the glyph. .notdef and .null are exceptions.
     # Periods denote glyph variants as per the AGLFN convention, which should
@@ -0,0 +1,213 @@
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Effective kerning of a GSFont at arbitrary design locations.
+
+The kerning of each master is flattened to glyph pairs over a shared index
+of the glyph pairs kerned in any master, and the masters are then
+interpolated with the same axis model as the designspace. When several
+rules of a master apply to a glyph pair, the most specific one wins, in
+this order:
+
+    glyph, glyph > glyph, class > class, glyph > class, class
+
+which is the order used by UFO kerning. A pair that a master does not kern
+at all counts as 0: an exception defined in one master keeps the class
+value of the other masters there.
+
+NumPy is used when it is available, to interpolate and flatten the whole
+set of pairs at once.
+"""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+from array import array
+from collections import OrderedDict
+
+from fontTools.varLib.models import VariationModel, normalizeLocation
+
+from glyphsLib.builder.axes import get_axis_definitions, get_regular_master
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+__all__ = ["flatten", "KerningFlattener"]
+
+LEFT_CLASS_PREFIX = '@MMK_L_'
+RIGHT_CLASS_PREFIX = '@MMK_R_'
+
+GLYPH_GLYPH, GLYPH_CLASS, CLASS_GLYPH, CLASS_CLASS = range(4)
+
+
+def flatten(font, location):
+    """Return the kerning of `font` at the design `location`, flattened to
+    glyph pairs, as an OrderedDict of (left glyph, right glyph) -> value.
+
+    `location` maps axis names or tags to design locations (the same values
+    as `GSFontMaster.weightValue` etc.). Missing axes are at the location of
+    the regular master.
+
+    Use a KerningFlattener to flatten the same font at several locations.
+    """
+    return KerningFlattener(font).flatten(location)
+
+
+class KerningFlattener(object):
+    """Flatten the kerning of a GSFont at any design location.
+
+    The expansion of classes to glyph pairs and the flattened kerning of
+    each master are computed once, so that each call to `flatten` only has
+    to interpolate the masters.
+    """
+
+    def __init__(self, font):
+        self.font = font
+        self.masters = list(font.masters)
+        self._init_model()
+        self._init_rules()
+        self._init_glyph_pairs()
+
+    def _init_model(self):
+        axes = get_axis_definitions(self.font)
+        regular = get_regular_master(self.font)
+        self._axes = OrderedDict()
+        self._axis_tags = {}
+        for axis in axes:
+            locs = [axis.get_design_loc(m) for m in self.masters]
+            self._axes[axis.tag] = (min(locs), axis.get_design_loc(regular),
+                                    max(locs))
+            self._axis_tags[axis.tag] = axis.tag
+            self._axis_tags[axis.name] = axis.tag
+
+        # Masters at the same location cannot be told apart by the model:
+        # the first one wins, the others get no weight.
+        locations = []
+        self._model_masters = []
+        for index, master in enumerate(self.masters):
+            location = self._normalize(OrderedDict(
+                (axis.tag, axis.get_design_loc(master)) for axis in axes))
+            if location not in locations:
+                locations.append(location)
+                self._model_masters.append(index)
+        self._model = VariationModel(locations, axisOrder=list(self._axes))
+
+    def _normalize(self, location):
+        normalized = normalizeLocation(location, self._axes)
+        return {tag: value for tag, value in normalized.items() if value}
+
+    def _init_rules(self):
+        # Shared index of the (left key, right key) rules over all the
+        # masters, and the value of each rule in each master, None where
+        # the master does not have the rule
+        self.pairs = []
+        pair_index = {}
+        for master_kerning in self.font.kerning.values():
+            for left, pairs in master_kerning.items():
+                for right in pairs:
+                    if (left, right) not in pair_index:
+                        pair_index[left, right] = len(self.pairs)
+                        self.pairs.append((left, right))
+
+        self._rule_values = []
+        for master in self.masters:
+            values = [None] * len(self.pairs)
+            master_kerning = self.font.kerning.get(master.id, {})
+            for left, pairs in master_kerning.items():
+                for right, value in pairs.items():
+                    values[pair_index[left, right]] = value
+            self._rule_values.append(values)
+
+    def _init_glyph_pairs(self):
+        # Kerning class name -> glyph names, from the glyph kerning groups
+        left_classes = {}
+        right_classes = {}
+        for glyph in self.font.glyphs:
+            if glyph.rightKerningGroup:
+                left_classes.setdefault(
+                    LEFT_CLASS_PREFIX + glyph.rightKerningGroup,
+                    []).append(glyph.name)
+            if glyph.leftKerningGroup:
+                right_classes.setdefault(
+                    RIGHT_CLASS_PREFIX + glyph.leftKerningGroup,
+                    []).append(glyph.name)
+
+        # Glyph pair -> the rule index of each rank that applies to it
+        rules = OrderedDict()
+        for index, (left, right) in enumerate(self.pairs):
+            left_is_class = left.startswith(LEFT_CLASS_PREFIX)
+            right_is_class = right.startswith(RIGHT_CLASS_PREFIX)
+            rank = (CLASS_GLYPH if left_is_class else GLYPH_GLYPH) + (
+                1 if right_is_class else 0)
+            lefts = left_classes.get(left, ()) if left_is_class else (left,)
+            rights = (right_classes.get(right, ()) if right_is_class
+                      else (right,))
+            for left_glyph in lefts:
+                for right_glyph in rights:
+                    ranked = rules.setdefault((left_glyph, right_glyph),
+                                              [None] * 4)
+                    if ranked[rank] is None:
+                        ranked[rank] = index
+
+        self.glyph_pairs = list(rules)
+        # In each master, the most specific rule that the master has
+        candidates = [[index for index in ranked if index is not None]
+                      for ranked in rules.values()]
+        self._columns = []
+        for values in self._rule_values:
+            column = array(str('d'), [0.0]) * len(candidates)
+            for i, indices in enumerate(candidates):
+                for index in indices:
+                    if values[index] is not None:
+                        column[i] = values[index]
+                        break
+            self._columns.append(column)
+        if numpy is not None:
+            self._matrix = numpy.vstack([
+                numpy.frombuffer(column, dtype=numpy.float64)
+                for column in self._columns])
+
+    def master_weights(self, location):
+        """Return the weight of each master at the design `location`."""
+        tagged = OrderedDict()
+        for axis, value in location.items():
+            if axis not in self._axis_tags:
+                raise ValueError('Unknown axis: %s' % axis)
+            tagged[self._axis_tags[axis]] = value
+        normalized = self._normalize(tagged)
+        count = len(self._model_masters)
+        weights = [0.0] * len(self.masters)
+        for i, master_index in enumerate(self._model_masters):
+            unit = [0.0] * count
+            unit[i] = 1.0
+            weights[master_index] = self._model.interpolateFromMasters(
+                normalized, unit)
+        return weights
+
+    def flatten(self, location):
+        """Return the flattened kerning at the design `location`, as an
+        OrderedDict of (left glyph, right glyph) -> value.
+        """
+        weights = self.master_weights(location)
+        if numpy is not None:
+            values = numpy.dot(weights, self._matrix).tolist()
+        else:
+            values = [0.0] * len(self.glyph_pairs)
+            for weight, column in zip(weights, self._columns):
+                if weight:
+                    for i, value in enumerate(column):
+                        values[i] += weight * value
+        return OrderedDict(zip(self.glyph_pairs, values))
@@ -0,0 +1,311 @@
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Three-way merge of .glyphs files.
+
+    text, conflicts = glyphsLib.merge('base.glyphs', 'ours.glyphs',
+                                      'theirs.glyphs')
+
+Two versions of a font that were edited from the same base version are
+merged as data, like glyphsLib.diff compares them: glyphs by name, layers by
+id, custom parameters by name, kerning by master and pair... A value that
+was only changed on one side takes the new value. A value that was changed
+differently on both sides is a MergeConflict, and keeps the value of `ours`.
+
+Each glyph is hashed from its text, and the glyphs that only changed on one
+side are copied as they are. Only the glyphs that changed on both sides are
+parsed and merged, one at a time, and `merge_to_file` writes the glyphs as
+soon as they are merged.
+
+To let git merge .glyphs files this way, declare the merge driver in
+.gitattributes:
+
+    *.glyphs merge=glyphs
+
+and in the git configuration:
+
+    [merge "glyphs"]
+        name = Glyphs source merge
+        driver = glyphs-merge-driver %O %A %B
+"""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+from collections import OrderedDict, namedtuple
+
+from fontTools.misc.py23 import UnicodeIO, unicode
+
+from glyphsLib.diffing import LIST_KEYS, GlyphsText, read_text
+from glyphsLib.parser import Parser, split_glyphs
+from glyphsLib.writer import escape_string
+
+__all__ = ['MergeConflict', 'MergeResult', 'merge', 'merge_to_file']
+
+# `path` leads from the font to the value, like the path of a diffing.Change.
+# The values are the data of each version as parsed by `parse_raw` (strings
+# keep their quotes), None where it is missing.
+MergeConflict = namedtuple('MergeConflict', ['path', 'base', 'ours', 'theirs'])
+
+MergeResult = namedtuple('MergeResult', ['text', 'conflicts'])
+
+# A value that is not in a version
+_MISSING = object()
+
+# A glyph that changed on both sides
+_MERGE = object()
+
+
+def merge(base, ours, theirs):
+    """Merge the changes from `base` to `theirs` into `ours`, and return a
+    MergeResult with the text of the merged .glyphs file and the list of
+    MergeConflicts.
+
+    The fonts can be GSFont objects, paths of .glyphs files or file objects.
+    """
+    fp = UnicodeIO()
+    conflicts = merge_to_file(base, ours, theirs, fp)
+    return MergeResult(fp.getvalue(), conflicts)
+
+
+def merge_to_file(base, ours, theirs, fp):
+    """Like `merge`, but write the merged .glyphs file to the file object
+    `fp`, glyph by glyph, and return the list of MergeConflicts.
+
+    The three versions are read before anything is written.
+    """
+    versions = [GlyphsText(read_text(font)) for font in (base, ours, theirs)]
+    conflicts = []
+
+    prefix, suffix = _merge_font(versions, conflicts)
+    fp.write(prefix)
+    fp.write('\n')
+    base, ours, theirs = versions
+    sources = {}
+    for name in set(base.spans) | set(ours.spans) | set(theirs.spans):
+        source = _glyph_source(versions, name)
+        if source is not None:
+            sources[name] = source
+    first = True
+    for name in _merge_order(base.glyph_order, ours.glyph_order,
+                             theirs.glyph_order, keep=sources):
+        source = sources[name]
+        if source is _MERGE:
+            data = _merge_values(
+                ('glyphs', name),
+                *[_glyph_data(version, name) for version in versions],
+                conflicts=conflicts)
+            if data is _MISSING:
+                continue
+            glyph_text = write_raw(data)
+        else:
+            glyph_text = source.glyph_text(name)
+        if not first:
+            fp.write(',\n')
+        first = False
+        fp.write(glyph_text)
+    if not first:
+        fp.write('\n')
+    fp.write(suffix)
+    return conflicts
+
+
+def _glyph_source(versions, name):
+    """Return the GlyphsText whose glyph `name` is the merged one, None if
+    the glyph is not in the merged font, or _MERGE if the versions of the
+    glyph must be merged.
+    """
+    base, ours, theirs = [version.digests.get(name) for version in versions]
+    if ours == theirs or theirs == base:
+        source = versions[1]
+        digest = ours
+    elif ours == base:
+        source = versions[2]
+        digest = theirs
+    else:
+        return _MERGE
+    return source if digest is not None else None
+
+
+def _glyph_data(version, name):
+    if name not in version.spans:
+        return _MISSING
+    return parse_raw(version.glyph_text(name))
+
+
+def _merge_font(versions, conflicts):
+    """Return the text of the merged font before and after the glyphs."""
+    base, ours, theirs = versions
+    if (ours.font_text == theirs.font_text or
+            theirs.font_text == base.font_text):
+        source = ours
+    elif ours.font_text == base.font_text:
+        source = theirs
+    else:
+        data = _merge_values(
+            (), *[parse_raw(version.font_text) for version in versions],
+            conflicts=conflicts)
+        text = write_raw(data) + '\n'
+        spans = split_glyphs(text)
+        return text[:spans.list_start], text[spans.list_end:]
+    return (source.text[:source.list_start],
+            source.text[source.list_end:])
+
+
+def _merge_values(path, base, ours, theirs, conflicts):
+    """Return the merge of the raw data `ours` and `theirs`, changed from
+    `base`, or _MISSING if the value was removed. Record a MergeConflict in
+    `conflicts` and keep `ours` where they changed differently.
+    """
+    if ours == theirs or theirs == base:
+        return ours
+    if ours == base:
+        return theirs
+    if all(isinstance(value, dict) for value in (ours, theirs)):
+        if base is _MISSING or isinstance(base, dict):
+            return _merge_dicts(path, {} if base is _MISSING else base,
+                                ours, theirs, conflicts)
+    elif all(isinstance(value, list) for value in (ours, theirs)):
+        if base is _MISSING or isinstance(base, list):
+            merged = _merge_lists(path, [] if base is _MISSING else base,
+                                  ours, theirs, conflicts)
+            if merged is not None:
+                return merged
+    conflicts.append(MergeConflict(path, _present(base), _present(ours),
+                                   _present(theirs)))
+    return ours
+
+
+def _merge_dicts(path, base, ours, theirs, conflicts):
+    merged = OrderedDict()
+    for key in _merge_order(list(base), list(ours), list(theirs)):
+        value = _merge_values(
+            path + (key,), base.get(key, _MISSING), ours.get(key, _MISSING),
+            theirs.get(key, _MISSING), conflicts)
+        if value is not _MISSING:
+            merged[key] = value
+    return merged
+
+
+def _merge_lists(path, base, ours, theirs, conflicts):
+    """Merge lists of items with a key by key, and other lists item by item
+    if they have the same length. Return None if they cannot be merged.
+    """
+    key = LIST_KEYS.get(path[-1]) if path else None
+    keyed = [_keyed_items(items, key) for items in (base, ours, theirs)]
+    if all(items is not None for items in keyed):
+        return list(_merge_dicts(path, *keyed, conflicts=conflicts).values())
+    if len(base) == len(ours) == len(theirs):
+        return [_merge_values(path + (index,), *items, conflicts=conflicts)
+                for index, items in enumerate(zip(base, ours, theirs))]
+    return None
+
+
+def _keyed_items(items, key):
+    """Return an OrderedDict of the dictionaries `items` by the unquoted value
+    of their `key`, or None if they cannot be matched by key.
+    """
+    if key is None:
+        return None
+    keyed = OrderedDict()
+    for item in items:
+        if (not isinstance(item, dict) or
+                not isinstance(item.get(key), unicode)):
+            return None
+        value = _unquote(item[key])
+        if value in keyed:
+            return None
+        keyed[value] = item
+    return keyed
+
+
+def _merge_order(base, ours, theirs, keep=None):
+    """Return the keys of the merged data in order: the order of `theirs` if
+    only `theirs` changed the order of the keys of `base`, the order of
+    `ours` otherwise, with the keys that are only in the other version after
+    the key that they follow there. Only the keys in `keep` are returned, if
+    given.
+    """
+    base_keys = set(base)
+    our_keys = set(ours)
+    if ([key for key in ours if key in base_keys] ==
+            [key for key in base if key in our_keys]):
+        first, second = theirs, ours
+    else:
+        first, second = ours, theirs
+    placed = set(first)
+    # Key -> keys of the second version to put after it, None for the start
+    after = {}
+    previous = None
+    for key in second:
+        if key in placed:
+            previous = key
+        else:
+            after.setdefault(previous, []).append(key)
+    order = after.get(None, [])
+    for key in first:
+        order.append(key)
+        order.extend(after.get(key, ()))
+    if keep is not None:
+        order = [key for key in order if key in keep]
+    return order
+
+
+def _present(value):
+    return None if value is _MISSING else value
+
+
+class _RawParser(Parser):
+    """Keep the values as they are written, with their quotes, so that they
+    can be written back the same.
+    """
+
+    def _guess_current_type(self, parsed, value):
+        raw = parsed.strip()
+        return lambda _: raw
+
+
+def parse_raw(text):
+    """Parse the text of a .glyphs file or of a part of it into
+    OrderedDicts, lists and the strings that the values are written with.
+    """
+    return _RawParser().parse(text)
+
+
+def write_raw(value, key=None):
+    """Return the text of the data `value`, parsed by `parse_raw`, as it is
+    written in a .glyphs file.
+    """
+    if isinstance(value, dict):
+        return '{\n%s}' % ''.join(
+            '%s = %s;\n' % (escape_string(item_key), write_raw(item, item_key))
+            for item_key, item in value.items())
+    if isinstance(value, list):
+        if key == 'unicode':
+            return ','.join(value)
+        if key == 'color':
+            # Color tuples are written on one line
+            return '(%s)' % ', '.join(value)
+        return '(\n%s%s)' % (',\n'.join(write_raw(item) for item in value),
+                             '\n' if value else '')
+    if hasattr(value, 'plistValue'):
+        # Binary data
+        return value.plistValue()
+    return value
+
+
+def _unquote(value):
+    if value.startswith('"'):
+        return Parser()._trim_value(value)
+    return value
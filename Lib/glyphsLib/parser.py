@@ -16,13 +16,14 @@ from __future__ import (print_function, division, absolute_import,
                         unicode_literals)
 from fontTools.misc.py23 import tounicode, unichr, unicode
 
-from collections import OrderedDict
+from collections import OrderedDict, namedtuple
 from io import open
 import re
 import logging
 import sys
 
 import glyphsLib
+from glyphsLib import profiling
 
 logger = logging.getLogger(__name__)
 
@@ -242,24 +243,137 @@ class Parser(object):
         raise ValueError('%s:\n%s' % (message, text[i:i + 79]))
 
 
-def load(fp):
+def load(fp, compact_kerning=False):
     """Read a .glyphs file. 'fp' should be (readable) file object.
     Return a GSFont object.
     """
-    return loads(fp.read())
+    return loads(fp.read(), compact_kerning=compact_kerning)
 
 
-def loads(s):
+def loads(s, compact_kerning=False):
     """Read a .glyphs file from a (unicode) str object, or from
     a UTF-8 encoded bytes object.
     Return a GSFont object.
+
+    If compact_kerning is True, the kerning is read directly into a compact
+    GSKerning instead of nested dicts.
     """
-    p = Parser(current_type=glyphsLib.classes.GSFont)
     logger.info('Parsing .glyphs file')
-    data = p.parse(s)
+    with profiling.stage('parse'):
+        if compact_kerning:
+            font = glyphsLib.classes.GSFont()
+            font.compactKerning = True
+            Parser().parse_into_object(font, s)
+            return font
+        p = Parser(current_type=glyphsLib.classes.GSFont)
+        data = p.parse(s)
     return data
 
 
+# The glyph named `name` is text[start:end] in the text of a .glyphs file
+GlyphSpan = namedtuple('GlyphSpan', ['name', 'start', 'end'])
+
+# The glyphs list of a .glyphs file is text[list_start:list_end], and
+# `glyphs` the GlyphSpans of its items
+GlyphsListSpan = namedtuple('GlyphsListSpan', [
+    'list_start', 'list_end', 'glyphs'])
+
+# The braces and parentheses, and the quoted strings that contain some (in
+# which they do not count), each with the text before it: the other quoted
+# strings are skipped by the regular expression, which is much faster than
+# going through them one by one
+_structure_re = re.compile(
+    r'[^"{}()]*(?:"(?:[^"\\{}()]|\\.)*"[^"{}()]*)*'
+    r'([{}()]|"(?:[^"\\]|\\.)*")')
+_glyphs_key_re = re.compile(r'^glyphs\s*=\s*\(', re.MULTILINE)
+_glyphname_re = re.compile(
+    r'[{;\s]glyphname\s*=\s*("(?:[^"\\]|\\.)*"|[^;\s]+)\s*;')
+
+
+def _structure_tokens(text, pos):
+    """Yield the matches of _structure_re from `pos`, one after the other,
+    until the end of the text or the first unterminated string.
+    """
+    match = _structure_re.match
+    while True:
+        m = match(text, pos)
+        if m is None:
+            return
+        yield m
+        pos = m.end()
+
+
+def split_glyphs(text):
+    """Find the glyphs in the text of a .glyphs file, without parsing them.
+
+    Only the braces, parentheses and quoted strings are scanned, which is
+    much faster than parsing. Return a GlyphsListSpan. Raise ValueError if
+    the text has no glyphs list.
+    """
+    text = tounicode(text, encoding='utf-8')
+    tokens = _structure_tokens(text, 0)
+    depth = 0
+    token = next(tokens, None)
+    for key_match in _glyphs_key_re.finditer(text):
+        # The key must be in the top-level dictionary, not in a string or
+        # a nested dictionary: its parenthesis must be a token at depth 1
+        paren = key_match.end() - 1
+        while token is not None and token.start(1) < paren:
+            if token.group(1) in '{(':
+                depth += 1
+            elif token.group(1) in '})':
+                depth -= 1
+            token = next(tokens, None)
+        if token is None:
+            break
+        if token.start(1) == paren and depth == 1:
+            list_start = key_match.end()
+            glyphs, list_end = scan_glyphs(text, list_start)
+            return GlyphsListSpan(list_start, list_end, glyphs)
+    raise ValueError('No glyphs list found')
+
+
+def scan_glyphs(text, start, stop=None):
+    """Return the GlyphSpans of the glyph dictionaries in `text` from
+    `start`, which must be in the glyphs list but not inside a glyph, and the
+    position after the last glyph found.
+
+    The scan ends at the end of the glyphs list, or after the first glyph
+    that ends at or after `stop` if given.
+    """
+    glyphs = []
+    depth = 0
+    glyph_start = None
+    for m in _structure_tokens(text, start):
+        token = m.group(1)
+        if token in '{(':
+            if depth == 0:
+                glyph_start = m.start(1)
+            depth += 1
+        elif token in '})':
+            if depth == 0:
+                # The end of the glyphs list
+                return glyphs, m.start(1)
+            depth -= 1
+            if depth == 0:
+                glyphs.append(_glyph_span(text, glyph_start, m.end()))
+                if stop is not None and m.end() >= stop:
+                    return glyphs, m.end()
+    raise ValueError('Unterminated glyphs list')
+
+
+def _glyph_span(text, start, end):
+    m = _glyphname_re.search(text, start, end)
+    if m is None:
+        raise ValueError('Glyph without a name:\n%s' % text[start:start + 79])
+    return GlyphSpan(Parser()._trim_value(m.group(1)), start, end)
+
+
+def parse_glyph(text):
+    """Parse the text of one glyph dictionary into a GSGlyph."""
+    return Parser(current_type=glyphsLib.classes.GSGlyph).parse(text)
+
+
 def main(args=None):
     """Roundtrip the .glyphs file given as an argument."""
     for arg in args:
@@ -0,0 +1,219 @@
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Timings and counters of the stages of glyphsLib.
+
+The parser, the writer and the builders report what they do into the active
+profilers, if there are any:
+
+    from glyphsLib import profiling
+
+    with profiling.profile() as profiler:
+        glyphsLib.build_masters('MyFont.glyphs', 'master_ufo')
+    profiler.write_json('profile.json')
+    profiler.write_chrome_trace('trace.json')  # needs profile(trace=True)
+
+Each stage is recorded with its wall time and number of calls, in total and
+per master. Counters record numbers of objects (glyphs, paths, kerning
+pairs...), also per master.
+
+When no profiler is active, `stage` returns a shared no-op context manager
+and `count` returns at once, so that the instrumentation costs next to
+nothing.
+"""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from io import open
+import json
+import os
+import time
+
+__all__ = ["profile", "stage", "count", "active", "Profiler"]
+
+_timer = getattr(time, 'perf_counter', time.time)
+
+# The active profilers, innermost last
+_profilers = []
+
+
+class _NullStage(object):
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage(object):
+
+    __slots__ = ('profilers', 'name', 'master', 'start')
+
+    def __init__(self, profilers, name, master):
+        self.profilers = profilers
+        self.name = name
+        self.master = master
+
+    def __enter__(self):
+        self.start = _timer()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        end = _timer()
+        for profiler in self.profilers:
+            profiler.add_time(self.name, self.master, self.start, end)
+        return False
+
+
+def active():
+    """Return True if a profiler is recording, so that callers can skip
+    computing counts that nobody will read.
+    """
+    return bool(_profilers)
+
+
+def stage(name, master=None):
+    """Return a context manager that times the stage `name`, for the master
+    id `master` if given, in the active profilers.
+    """
+    if not _profilers:
+        return _NULL_STAGE
+    return _Stage(list(_profilers), name, master)
+
+
+def count(name, value=1, master=None):
+    """Add `value` to the counter `name`, for the master id `master` if
+    given, in the active profilers.
+    """
+    if not _profilers:
+        return
+    for profiler in _profilers:
+        profiler.add_count(name, master, value)
+
+
+@contextmanager
+def profile(trace=False):
+    """Record the stages reported within the `with` block into a new
+    Profiler, which is returned by the context manager.
+
+    If `trace` is True, every call of every stage is also kept, for
+    `Profiler.write_chrome_trace`.
+    """
+    profiler = Profiler(trace=trace)
+    _profilers.append(profiler)
+    try:
+        yield profiler
+    finally:
+        _profilers.remove(profiler)
+
+
+class Profiler(object):
+    """The timings and counters recorded during `profile`."""
+
+    def __init__(self, trace=False):
+        self.origin = _timer()
+        # Name -> [calls, seconds, OrderedDict(master -> [calls, seconds])]
+        self.stages = OrderedDict()
+        # Name -> [total, OrderedDict(master -> total)]
+        self.counters = OrderedDict()
+        # (name, master, start, end) of each call, if tracing
+        self.events = [] if trace else None
+
+    def add_time(self, name, master, start, end):
+        record = self.stages.get(name)
+        if record is None:
+            record = self.stages[name] = [0, 0.0, OrderedDict()]
+        record[0] += 1
+        record[1] += end - start
+        if master is not None:
+            master_record = record[2].get(master)
+            if master_record is None:
+                master_record = record[2][master] = [0, 0.0]
+            master_record[0] += 1
+            master_record[1] += end - start
+        if self.events is not None:
+            self.events.append((name, master, start, end))
+
+    def add_count(self, name, master, value):
+        record = self.counters.get(name)
+        if record is None:
+            record = self.counters[name] = [0, OrderedDict()]
+        record[0] += value
+        if master is not None:
+            record[1][master] = record[1].get(master, 0) + value
+
+    def as_dict(self):
+        """Return the stages and counters as plain data, ready for JSON."""
+        stages = OrderedDict()
+        for name, (calls, seconds, masters) in self.stages.items():
+            entry = stages[name] = OrderedDict([
+                ('calls', calls), ('seconds', seconds)])
+            if masters:
+                entry['masters'] = OrderedDict(
+                    (master, OrderedDict([('calls', master_calls),
+                                          ('seconds', master_seconds)]))
+                    for master, (master_calls, master_seconds)
+                    in masters.items())
+        counters = OrderedDict()
+        for name, (total, masters) in self.counters.items():
+            counter = counters[name] = OrderedDict([('total', total)])
+            if masters:
+                counter['masters'] = OrderedDict(masters)
+        return OrderedDict([('stages', stages), ('counters', counters)])
+
+    def as_chrome_trace(self):
+        """Return the recorded calls in the Chrome trace event format, which
+        can be loaded in chrome://tracing or https://ui.perfetto.dev.
+        """
+        if self.events is None:
+            raise ValueError('The profiler was not created with trace=True')
+        pid = os.getpid()
+        events = []
+        for name, master, start, end in self.events:
+            event = OrderedDict([
+                ('name', name), ('cat', 'glyphsLib'), ('ph', 'X'),
+                ('ts', (start - self.origin) * 1e6),
+                ('dur', (end - start) * 1e6),
+                ('pid', pid), ('tid', 0)])
+            if master is not None:
+                event['args'] = {'master': master}
+            events.append(event)
+        # Complete events must be sorted by start time for the viewers to
+        # nest them correctly; the enclosing stage ends last but starts first.
+        events.sort(key=lambda event: (event['ts'], -event['dur']))
+        counters = self.as_dict()['counters']
+        return OrderedDict([
+            ('traceEvents', events), ('displayTimeUnit', 'ms'),
+            ('otherData', {'counters': counters})])
+
+    def write_json(self, path):
+        _write_json(self.as_dict(), path)
+
+    def write_chrome_trace(self, path):
+        _write_json(self.as_chrome_trace(), path)
+
+
+def _write_json(data, path):
+    text = json.dumps(data, indent=2)
+    if not isinstance(text, type(u'')):
+        text = text.decode('utf-8')
+    with open(path, 'w', encoding='utf-8') as fp:
+        fp.write(text)
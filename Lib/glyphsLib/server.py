@@ -0,0 +1,457 @@
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""A long-running conversion server that keeps fonts in memory.
+
+`python -m glyphsLib serve` answers requests from editors and preview tools
+over HTTP on localhost, or over a Unix socket. It keeps the parsed GSFonts
+and the UFOs built from them in memory, least recently used first out, so
+that asking again about the same family only costs the lookup. A font is
+parsed again when its file changes: if the modification time or the size of
+the file changed, its contents are hashed and compared with the cached ones.
+
+Each request is a POST of a JSON object to one of these paths, answered
+with a JSON object:
+
+    /convert  {"file": F, "output_dir": D, "designspace_path": P,
+               "instance_dir": I}
+        Write the master UFOs and the designspace of F, like glyphs2ufo.
+        Only "file" is needed. Nothing is written again if the files are
+        still the ones written for the same version of F.
+        -> {"designspace": P, "masters": [UFO paths], "written": bool}
+    /master   {"file": F, "master": M, "path": U}
+        Write the UFO of the master M of F (its id or name) to U.
+        -> {"path": U}
+    /glyph    {"file": F, "glyph": G}
+        -> {"glyph": G, "masters": [{"id": .., "name": .., "glif": ..}]}
+        The GLIF of the glyph G in each master, in the order of the masters.
+
+All the requests also take the options of glyphs2ufo that change the UFOs:
+"minimize_glyphs_diffs", "propagate_anchors", "normalize_ufos" and
+"create_background_layers". GET /stats returns the cache statistics.
+Errors are answered with a 4xx or 5xx status and {"error": message}.
+
+The requests must have the Content-Type application/json and, over HTTP,
+a Host header naming localhost or 127.0.0.1: a web page cannot send such
+requests to the server without its permission, so that opening a page in
+a browser cannot make the server write files.
+
+The requests are handled one at a time, in the order they arrive.
+"""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import os
+import shutil
+import socket
+import tempfile
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import UnixStreamServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import UnixStreamServer
+
+from fontTools.misc.py23 import tounicode
+from ufoLib import UFOWriter
+from ufoLib.glifLib import writeGlyphToString
+
+from glyphsLib.builder import to_designspace
+from glyphsLib.parser import loads
+from glyphsLib.util import (
+    LRUCache, clean_ufo, ufo_create_background_layer_for_all_glyphs)
+
+__all__ = ['ConversionService', 'FontCache', 'make_server']
+
+logger = logging.getLogger(__name__)
+
+# The options of a request that change the UFOs, with their default values
+BUILD_OPTIONS = OrderedDict([
+    ('minimize_glyphs_diffs', False),
+    ('propagate_anchors', True),
+    ('normalize_ufos', False),
+    ('create_background_layers', False),
+])
+
+
+class RequestError(Exception):
+    """An invalid request, answered with the HTTP `status`."""
+
+    def __init__(self, message, status=400):
+        super(RequestError, self).__init__(message)
+        self.status = status
+
+
+class FontCache(object):
+    """The parsed fonts of the most recently used `max_fonts` .glyphs files,
+    each with the designspaces built from it.
+    """
+
+    def __init__(self, max_fonts=4, max_builds=2):
+        self.max_builds = max_builds
+        self._fonts = LRUCache(max_fonts)
+        self.stats = OrderedDict([
+            ('hits', 0), ('parses', 0), ('builds', 0), ('build_hits', 0)])
+
+    def get(self, path):
+        """Return the CachedFont of the .glyphs file `path`, parsing it if it
+        is not cached or changed since.
+        """
+        path = os.path.abspath(path)
+        try:
+            stat = os.stat(path)
+        except OSError as e:
+            raise RequestError('Cannot read %s: %s' % (path, e), status=404)
+        signature = (stat.st_mtime, stat.st_size)
+        cached = self._fonts.get(path)
+        if cached is not None and cached.signature == signature:
+            self.stats['hits'] += 1
+            return cached
+
+        with open(path, 'rb') as fp:
+            data = fp.read()
+        digest = hashlib.sha1(data).hexdigest()
+        if cached is not None and cached.digest == digest:
+            # Touched but not changed
+            cached.signature = signature
+            self.stats['hits'] += 1
+            return cached
+
+        logger.info('Parsing %s', path)
+        font = loads(data)
+        font.filepath = path
+        self.stats['parses'] += 1
+        cached = self._fonts[path] = CachedFont(
+            self, path, font, signature, digest)
+        return cached
+
+    def __len__(self):
+        return len(self._fonts)
+
+
+class CachedFont(object):
+    """A parsed .glyphs file and the designspaces built from it."""
+
+    def __init__(self, cache, path, font, signature, digest):
+        self.cache = cache
+        self.path = path
+        self.font = font
+        self.signature = signature
+        self.digest = digest
+        # (build options, instance dir) -> designspace
+        self._designspaces = LRUCache(cache.max_builds)
+        # Output designspace path -> what was written there, see `convert`
+        self.outputs = {}
+
+    def designspace(self, options, instance_dir=None):
+        """Return the designspace built with the `options` (a tuple of the
+        values of BUILD_OPTIONS) and `instance_dir` (relative to the masters),
+        with the master UFOs in memory.
+        """
+        key = (options, instance_dir)
+        designspace = self._designspaces.get(key)
+        if designspace is not None:
+            self.cache.stats['build_hits'] += 1
+            return designspace
+        kwargs = dict(zip(BUILD_OPTIONS, options))
+        logger.info('Building %s', self.path)
+        designspace = to_designspace(
+            self.font,
+            propagate_anchors=kwargs['propagate_anchors'],
+            minimize_glyphs_diffs=kwargs['minimize_glyphs_diffs'],
+            instance_dir=instance_dir)
+        if kwargs['create_background_layers']:
+            for source in designspace.sources:
+                ufo_create_background_layer_for_all_glyphs(source.font)
+        self.cache.stats['builds'] += 1
+        self._designspaces[key] = designspace
+        return designspace
+
+
+class ConversionService(object):
+    """The requests of the server, as methods that take and return plain
+    data, on top of a FontCache.
+    """
+
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else FontCache()
+
+    def handle(self, name, request):
+        """Answer the `request` (a dict) to the path `name`."""
+        method = self._methods.get(name)
+        if method is None:
+            raise RequestError('Unknown request: %s' % name, status=404)
+        if not isinstance(request, dict):
+            raise RequestError('The request must be a JSON object')
+        return method(self, request)
+
+    def convert(self, request):
+        cached, options = self._font(request)
+        output_dir = request.get('output_dir') or os.path.dirname(cached.path)
+        designspace_path = request.get('designspace_path') or os.path.join(
+            output_dir,
+            os.path.splitext(os.path.basename(cached.path))[0] +
+            '.designspace')
+        designspace_path = os.path.abspath(designspace_path)
+        instance_dir = request.get('instance_dir')
+        if instance_dir is not None:
+            instance_dir = os.path.relpath(instance_dir, output_dir)
+        normalize = dict(zip(BUILD_OPTIONS, options))['normalize_ufos']
+
+        designspace = cached.designspace(options, instance_dir)
+        ufo_paths = [os.path.abspath(os.path.join(output_dir, source.filename))
+                     for source in designspace.sources]
+        key = (options, instance_dir, tuple(ufo_paths))
+        written = cached.outputs.get(designspace_path)
+        if (written is not None and written[0] == key and
+                written[1] == _output_stamps(designspace_path, ufo_paths)):
+            return OrderedDict([
+                ('designspace', designspace_path), ('masters', ufo_paths),
+                ('written', False)])
+
+        for source, ufo_path in zip(designspace.sources, ufo_paths):
+            _save_ufo(source.font, ufo_path, normalize)
+        designspace.write(designspace_path)
+        cached.outputs[designspace_path] = (
+            key, _output_stamps(designspace_path, ufo_paths))
+        return OrderedDict([
+            ('designspace', designspace_path), ('masters', ufo_paths),
+            ('written', True)])
+
+    def master(self, request):
+        cached, options = self._font(request)
+        path = _required(request, 'path')
+        ufo = self._master_ufo(cached, options, _required(request, 'master'))
+        normalize = dict(zip(BUILD_OPTIONS, options))['normalize_ufos']
+        _save_ufo(ufo, os.path.abspath(path), normalize)
+        return OrderedDict([('path', os.path.abspath(path))])
+
+    def glyph(self, request):
+        cached, options = self._font(request)
+        name = _required(request, 'glyph')
+        designspace = cached.designspace(options)
+        masters = []
+        for master, source in zip(cached.font.masters, designspace.sources):
+            if name not in source.font:
+                raise RequestError('No glyph %s in %s' % (name, cached.path),
+                                   status=404)
+            glyph = source.font[name]
+            masters.append(OrderedDict([
+                ('id', master.id), ('name', master.name),
+                ('glif', tounicode(writeGlyphToString(
+                    name, glyph, glyph.drawPoints), 'utf-8'))]))
+        return OrderedDict([('glyph', name), ('masters', masters)])
+
+    def stats(self, request):
+        stats = OrderedDict(self.cache.stats)
+        stats['fonts'] = len(self.cache)
+        return stats
+
+    _methods = {
+        'convert': convert,
+        'master': master,
+        'glyph': glyph,
+        'stats': stats,
+    }
+
+    def _font(self, request):
+        cached = self.cache.get(_required(request, 'file'))
+        options = tuple(bool(request.get(name, default))
+                        for name, default in BUILD_OPTIONS.items())
+        return cached, options
+
+    def _master_ufo(self, cached, options, master_key):
+        designspace = cached.designspace(options)
+        for master, source in zip(cached.font.masters, designspace.sources):
+            if master_key in (master.id, master.name):
+                return source.font
+        raise RequestError('No master %s in %s' % (master_key, cached.path),
+                           status=404)
+
+
+def _required(request, key):
+    value = request.get(key)
+    if not value:
+        raise RequestError('Missing "%s" in the request' % key)
+    return value
+
+
+def _save_ufo(ufo, path, normalize):
+    """Write the whole defcon `ufo` to `path`, replacing what is there.
+
+    The UFO is written with the same ufoLib calls as `defcon.Font.save`, but
+    without `ufo.save`: once saved, a defcon font only writes what changed
+    when it is saved again to the same path, and it relies on its previous
+    UFO to still exist when it is saved elsewhere.
+    """
+    directory = os.path.dirname(path)
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    tempdir = tempfile.mkdtemp(dir=directory, suffix='.tmp')
+    try:
+        temp_path = os.path.join(tempdir, os.path.basename(path))
+        _write_ufo(ufo, temp_path)
+        if normalize:
+            import ufonormalizer
+            ufonormalizer.normalizeUFO(temp_path, writeModTimes=False)
+        clean_ufo(path)
+        os.rename(temp_path, path)
+    finally:
+        shutil.rmtree(tempdir)
+
+
+def _write_ufo(ufo, path):
+    writer = UFOWriter(path, formatVersion=3)
+    writer.writeInfo(ufo.info)
+    writer.writeGroups(ufo.groups)
+    writer.writeKerning(ufo.kerning)
+    writer.writeLib(ufo.lib)
+    if ufo.features.text is not None:
+        writer.writeFeatures(ufo.features.text)
+    for file_name in ufo.images.fileNames:
+        writer.writeImage(file_name, ufo.images[file_name])
+    for file_name in ufo.data.fileNames:
+        writer.writeBytesToPath(os.path.join('data', file_name),
+                                ufo.data[file_name])
+    default_layer = ufo.layers.defaultLayer
+    for layer in ufo.layers:
+        glyph_set = writer.getGlyphSet(layerName=layer.name,
+                                       defaultLayer=layer is default_layer)
+        for name in sorted(layer.keys()):
+            glyph = layer[name]
+            glyph_set.writeGlyph(name, glyph, glyph.drawPoints)
+        glyph_set.writeContents()
+        glyph_set.writeLayerInfo(layer)
+    writer.writeLayerContents(ufo.layers.layerOrder)
+    writer.setModificationTime()
+
+
+def _output_stamps(designspace_path, ufo_paths):
+    """Return the modification times of the files written by `convert`, to
+    notice when they were changed by someone else.
+    """
+    paths = [designspace_path] + [
+        os.path.join(ufo_path, 'metainfo.plist') for ufo_path in ufo_paths]
+    stamps = []
+    for path in paths:
+        try:
+            stamps.append(os.stat(path).st_mtime)
+        except OSError:
+            stamps.append(None)
+    return stamps
+
+
+class _RequestHandler(BaseHTTPRequestHandler):
+
+    server_version = 'glyphsLib'
+
+    def do_GET(self):
+        if not self._check_host():
+            return
+        if self.path.rstrip('/') == '/stats':
+            self._answer(200, self.server.service.stats({}))
+        else:
+            self._answer(405, {'error': 'Use POST for %s' % self.path})
+
+    def do_POST(self):
+        if not self._check_host():
+            return
+        content_type = self.headers.get('Content-Type') or ''
+        if content_type.split(';')[0].strip().lower() != 'application/json':
+            self._answer(415, {'error': 'The Content-Type must be '
+                                        'application/json'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            request = json.loads(tounicode(self.rfile.read(length), 'utf-8'))
+        except ValueError as e:
+            self._answer(400, {'error': 'Invalid JSON: %s' % e})
+            return
+        try:
+            response = self.server.service.handle(
+                self.path.strip('/'), request)
+        except RequestError as e:
+            self._answer(e.status, {'error': str(e)})
+        except Exception as e:
+            logger.exception('Error handling %s', self.path)
+            self._answer(500, {'error': '%s: %s' % (type(e).__name__, e)})
+        else:
+            self._answer(200, response)
+
+    def _check_host(self):
+        """Answer 403 and return False if the request is not addressed to
+        localhost, e.g. from a web page whose domain name was made to point
+        to 127.0.0.1.
+        """
+        allowed_hosts = self.server.allowed_hosts
+        host = self.headers.get('Host')
+        if allowed_hosts is None or host is None:
+            return True
+        name = host.strip().lower()
+        if name.startswith('['):
+            name = name[1:].split(']')[0]
+        else:
+            name = name.split(':')[0]
+        if name in allowed_hosts:
+            return True
+        self._answer(403, {'error': 'Unexpected Host: %s' % host})
+        return False
+
+    def _answer(self, status, data):
+        body = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # The client address of a Unix socket is empty
+        logger.debug(format, *args)
+
+
+class _UnixHTTPServer(UnixStreamServer):
+
+    def get_request(self):
+        request, _ = UnixStreamServer.get_request(self)
+        # BaseHTTPRequestHandler expects a (host, port) client address
+        return request, ('', 0)
+
+
+def make_server(service=None, port=0, socket_path=None):
+    """Return an HTTP server answering the requests with the
+    ConversionService `service`, on localhost at `port` (a free port if 0),
+    or on the Unix socket `socket_path` if given. Call its `serve_forever`.
+    """
+    if service is None:
+        service = ConversionService()
+    if socket_path is not None:
+        if not hasattr(socket, 'AF_UNIX'):
+            raise ValueError('Unix sockets are not supported here')
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        server = _UnixHTTPServer(socket_path, _RequestHandler)
+        # Only the users who can open the socket file can connect
+        server.allowed_hosts = None
+    else:
+        server = HTTPServer(('127.0.0.1', port), _RequestHandler)
+        server.allowed_hosts = ('127.0.0.1', 'localhost')
+    server.service = service
+    return server
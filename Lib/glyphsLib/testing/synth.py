@@ -0,0 +1,361 @@
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Generate large synthetic fonts, to test and benchmark at production scale.
+
+The fonts are built from a seed: the same arguments always give the same
+font. They are valid Glyphs sources, with compatible masters along a weight
+axis, one instance per master, outlines, nested components, anchors, brace
+and bracket layers, kerning groups, kerning, classes and features.
+
+    >>> font = make_font(glyphs=10, masters=3, seed=1)
+    >>> len(font.glyphs), len(font.masters)
+    (10, 3)
+
+From the command line:
+
+    python -m glyphsLib.testing.synth --glyphs 10000 --masters 8 \\
+        -o Synthetic.glyphs --ufo-dir master_ufo
+"""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import argparse
+import datetime
+import math
+import random
+import sys
+import uuid
+
+from glyphsLib.classes import (
+    GSFont, GSFontMaster, GSGlyph, GSLayer, GSPath, GSNode, GSComponent,
+    GSAnchor, GSClass, GSFeature, GSInstance)
+from glyphsLib.types import Point
+
+__all__ = ["make_font", "glyph_names", "main"]
+
+ANCHOR_NAMES = ['top', 'bottom', 'center', 'ogonek', 'topright',
+                'bottomright', 'topleft', 'bottomleft']
+
+# Segments of the largest contours, longer outlines are split into several
+# contours.
+MAX_CONTOUR_SEGMENTS = 12
+
+
+def glyph_names(count):
+    """Return `count` (glyph name, unicode value) tuples, taken from the CJK
+    ranges so that there are enough of them for the largest fonts.
+    """
+    names = []
+    for codepoint in range(0x4E00, 0xA000):
+        if len(names) == count:
+            return names
+        names.append(('uni%04X' % codepoint, '%04X' % codepoint))
+    for codepoint in range(0x20000, 0x2A6E0):
+        if len(names) == count:
+            return names
+        names.append(('u%05X' % codepoint, '%05X' % codepoint))
+    if count > len(names):
+        raise ValueError('Too many glyphs: %d (at most %d)' % (
+            count, len(names)))
+    return names
+
+
+def make_font(glyphs=1000, masters=2, brace_layers=0, bracket_layers=0,
+              nodes=24, component_depth=1, anchors=2, kerning=2.0,
+              classes=2, feature_lines=20, seed=0):
+    """Return a synthetic GSFont.
+
+    Args:
+        glyphs: number of glyphs. One glyph in four is a composite.
+        masters: number of masters, spread along the weight axis.
+        brace_layers: number of simple glyphs with an intermediate ("brace")
+            layer between each pair of neighbouring masters.
+        bracket_layers: number of simple glyphs with an alternate
+            ("bracket") layer in each master.
+        nodes: number of nodes of each simple glyph, rounded down to whole
+            curve segments. Long outlines are split into several contours.
+        component_depth: how deep components are nested in composites.
+        anchors: number of anchors of each simple glyph.
+        kerning: number of kerning pairs per glyph and master. Half of them
+            are between classes, the others are exceptions.
+        classes: number of glyph classes, of up to 50 glyphs each.
+        feature_lines: number of substitution rules in the feature code.
+        seed: seed of the pseudo-random generator.
+    """
+    if masters < 1:
+        raise ValueError('A font needs at least one master')
+    if component_depth < 1:
+        raise ValueError('The component depth must be at least 1')
+    rng = random.Random(seed)
+    font = GSFont()
+    font.familyName = 'Synthetic'
+    font.upm = 1000
+    font.versionMajor = 1
+    font.versionMinor = 0
+    font.date = datetime.datetime(2018, 1, 1)
+    _add_masters(font, masters)
+
+    names = glyph_names(glyphs)
+    group_count = max(1, glyphs // 20)
+    segments = max(2, nodes // 3)
+    contours = 1 + (segments - 1) // MAX_CONTOUR_SEGMENTS
+    segments = max(2, segments // contours)
+    simple_names = []
+    # Last glyph made at each component depth, 0 is for simple glyphs
+    last_at_depth = []
+    composite_count = 0
+    for index, (name, unicode_value) in enumerate(names):
+        glyph = GSGlyph(name)
+        glyph.unicode = unicode_value
+        group = 'group%d' % (index % group_count)
+        glyph.leftKerningGroup = group
+        glyph.rightKerningGroup = group
+        font.glyphs.append(glyph)
+        if index % 4 == 3:
+            depth = min(1 + composite_count % component_depth,
+                        len(last_at_depth))
+            bases = [last_at_depth[depth - 1],
+                     simple_names[rng.randrange(len(simple_names))]]
+            _add_composite_layers(font, glyph, bases)
+            composite_count += 1
+            if depth == len(last_at_depth):
+                last_at_depth.append(name)
+            else:
+                last_at_depth[depth] = name
+        else:
+            radii = [[rng.randint(150, 250) for _ in range(segments)]
+                     for _ in range(contours)]
+            _add_simple_layers(font, glyph, radii, anchors)
+            simple_names.append(name)
+            if last_at_depth:
+                last_at_depth[0] = name
+            else:
+                last_at_depth.append(name)
+
+    _add_alternate_layers(font, rng, simple_names, brace_layers,
+                          bracket_layers)
+    _add_kerning(font, rng, names, group_count, kerning)
+    _add_features(font, rng, names, classes, feature_lines)
+    return font
+
+
+def _add_masters(font, count):
+    weights = [100 + 800 * i // max(1, count - 1) for i in range(count)]
+    for index, weight in enumerate(weights):
+        master = GSFontMaster()
+        master.id = 'master%02d' % index
+        master.name = 'Weight %d' % weight
+        master.weightValue = weight
+        master.ascender = 800
+        master.capHeight = 700
+        master.xHeight = 500
+        master.descender = -200
+        font.masters.append(master)
+
+        # The weight class is set explicitly so that the user locations of
+        # the instances are distinct, whatever the number of masters.
+        instance = GSInstance()
+        instance.name = 'Weight %d' % weight
+        instance.weightValue = weight
+        instance.customParameters['weightClass'] = weight
+        font.instances.append(instance)
+
+
+def _add_simple_layers(font, glyph, radii, anchor_count):
+    for master_index, master in enumerate(font.masters):
+        layer = _new_layer(glyph, master, master.id)
+        _draw(layer, radii, 1 + 0.05 * master_index)
+        for index in range(anchor_count):
+            if index < len(ANCHOR_NAMES):
+                name = ANCHOR_NAMES[index]
+            else:
+                name = 'anchor%d' % index
+            layer.anchors.append(GSAnchor(name, Point(
+                100 * (index % 6), 700 - 100 * (index // 6))))
+
+
+def _add_composite_layers(font, glyph, bases):
+    for master in font.masters:
+        layer = _new_layer(glyph, master, master.id)
+        for offset, base in enumerate(bases):
+            layer.components.append(
+                GSComponent(base, offset=(offset * 300, 0)))
+
+
+def _add_alternate_layers(font, rng, simple_names, brace_count,
+                          bracket_count):
+    masters = list(font.masters)
+    for name in simple_names[:brace_count]:
+        glyph = font.glyphs[name]
+        for index in range(len(masters) - 1):
+            weight = (masters[index].weightValue +
+                      masters[index + 1].weightValue) // 2
+            layer = _new_layer(glyph, masters[index], _layer_id(rng))
+            layer.name = '{%d}' % weight
+            _copy_outline(glyph.layers[masters[index].id], layer, 1.1)
+    for name in simple_names[:bracket_count]:
+        glyph = font.glyphs[name]
+        threshold = (masters[0].weightValue + masters[-1].weightValue) // 2
+        for master in masters:
+            layer = _new_layer(glyph, master, _layer_id(rng))
+            layer.name = '%s [%d]' % (master.name, threshold)
+            _copy_outline(glyph.layers[master.id], layer, 0.9)
+
+
+def _new_layer(glyph, master, layer_id):
+    layer = GSLayer()
+    layer.layerId = layer_id
+    layer.associatedMasterId = master.id
+    glyph.layers.append(layer)
+    return layer
+
+
+def _layer_id(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128))).upper()
+
+
+def _draw(layer, radii, scale):
+    """Draw one closed contour of curves per list of `radii`, with one
+    segment per radius, side by side, and set the width of the `layer`.
+    """
+    for contour_index, contour_radii in enumerate(radii):
+        center_x = 300 * contour_index + 250
+        center_y = 350
+        points = []
+        for index, radius in enumerate(contour_radii):
+            angle = 2 * math.pi * index / len(contour_radii)
+            points.append((center_x + radius * scale * math.cos(angle),
+                           center_y + radius * math.sin(angle)))
+        path = GSPath()
+        for index, (x, y) in enumerate(points):
+            previous_x, previous_y = points[index - 1]
+            path.nodes.append(GSNode(
+                (round(previous_x + (x - previous_x) / 3),
+                 round(previous_y + (y - previous_y) / 3)), GSNode.OFFCURVE))
+            path.nodes.append(GSNode(
+                (round(previous_x + (x - previous_x) * 2 / 3),
+                 round(previous_y + (y - previous_y) * 2 / 3)),
+                GSNode.OFFCURVE))
+            path.nodes.append(GSNode((round(x), round(y)), GSNode.CURVE))
+        path.closed = True
+        layer.paths.append(path)
+    layer.width = round(300 * len(radii) * scale + 200)
+
+
+def _copy_outline(source, layer, scale):
+    for source_path in source.paths:
+        path = GSPath()
+        for node in source_path.nodes:
+            path.nodes.append(GSNode(
+                (round(node.position.x * scale), node.position.y), node.type))
+        path.closed = True
+        layer.paths.append(path)
+    for anchor in source.anchors:
+        layer.anchors.append(GSAnchor(anchor.name, Point(
+            round(anchor.position.x * scale), anchor.position.y)))
+    layer.width = round(source.width * scale)
+
+
+def _add_kerning(font, rng, names, group_count, density):
+    # Half class-class pairs, the rest glyph-class and glyph-glyph exceptions.
+    # There are no class-glyph pairs, which could conflict with glyph-class
+    # pairs and make the builder log a warning for each of them.
+    glyph_count = len(names)
+    if not glyph_count:
+        return
+    for master in font.masters:
+        for _ in range(int(glyph_count * density)):
+            kind = rng.random()
+            if kind < 0.5:
+                left = '@MMK_L_group%d' % rng.randrange(group_count)
+            else:
+                left = names[rng.randrange(glyph_count)][0]
+            if kind < 0.75:
+                right = '@MMK_R_group%d' % rng.randrange(group_count)
+            else:
+                right = names[rng.randrange(glyph_count)][0]
+            font.setKerningForPair(master.id, left, right,
+                                   rng.randint(-100, 50))
+
+
+def _add_features(font, rng, names, class_count, line_count):
+    if not names:
+        return
+    glyph_count = len(names)
+    class_names = []
+    for index in range(class_count):
+        members = sorted(set(names[rng.randrange(glyph_count)][0]
+                             for _ in range(50)))
+        glyph_class = GSClass('class%d' % index, ' '.join(members))
+        font.classes.append(glyph_class)
+        class_names.append(glyph_class.name)
+    lines = []
+    for _ in range(line_count):
+        target = names[rng.randrange(glyph_count)][0]
+        if class_names and rng.random() < 0.5:
+            source = '@' + class_names[rng.randrange(len(class_names))]
+        else:
+            source = names[rng.randrange(glyph_count)][0]
+        lines.append('sub %s by %s;' % (source, target))
+    if lines:
+        font.features.append(GSFeature('ss01', '\n'.join(lines)))
+
+
+def main(args=None):
+    """Write a synthetic .glyphs file, and optionally its UFO masters and
+    designspace.
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m glyphsLib.testing.synth',
+        description=main.__doc__)
+    parser.add_argument('-o', '--output', required=True, metavar='GLYPHS_FILE',
+                        help='Path of the .glyphs file to write.')
+    parser.add_argument('--ufo-dir', metavar='DIR', default=None,
+                        help='Also write the master UFOs and the designspace '
+                             'file to this directory.')
+    parser.add_argument('--glyphs', type=int, default=1000)
+    parser.add_argument('--masters', type=int, default=2)
+    parser.add_argument('--brace-layers', type=int, default=0,
+                        help='Glyphs with brace layers.')
+    parser.add_argument('--bracket-layers', type=int, default=0,
+                        help='Glyphs with bracket layers.')
+    parser.add_argument('--nodes', type=int, default=24,
+                        help='Nodes per simple glyph.')
+    parser.add_argument('--component-depth', type=int, default=1)
+    parser.add_argument('--anchors', type=int, default=2,
+                        help='Anchors per simple glyph.')
+    parser.add_argument('--kerning', type=float, default=2.0,
+                        help='Kerning pairs per glyph and master.')
+    parser.add_argument('--classes', type=int, default=2)
+    parser.add_argument('--feature-lines', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=0)
+    options = parser.parse_args(args)
+
+    font = make_font(
+        glyphs=options.glyphs, masters=options.masters,
+        brace_layers=options.brace_layers,
+        bracket_layers=options.bracket_layers, nodes=options.nodes,
+        component_depth=options.component_depth, anchors=options.anchors,
+        kerning=options.kerning, classes=options.classes,
+        feature_lines=options.feature_lines, seed=options.seed)
+    font.save(options.output)
+    if options.ufo_dir is not None:
+        import glyphsLib
+        glyphsLib.build_masters(options.output, options.ufo_dir)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
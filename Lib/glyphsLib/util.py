@@ -14,6 +14,7 @@
 
 # TODO: (jany) merge with builder/common.py
 
+from collections import OrderedDict
 import logging
 import os
 import shutil
@@ -102,3 +103,52 @@ def int_list_to_bin(value):
     for i in value:
         result += 1 << i
     return result
+
+
+class LRUCache(object):
+    """A mapping that keeps at most `maxsize` items, forgetting the least
+    recently used ones first.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+
+    def get(self, key, default=None):
+        try:
+            value = self._items.pop(key)
+        except KeyError:
+            return default
+        self._items[key] = value
+        return value
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self._items.pop(key, None)
+        self._items[key] = value
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def __delitem__(self, key):
+        del self._items[key]
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __len__(self):
+        return len(self._items)
+
+    def keys(self):
+        """Return the keys, least recently used first."""
+        return list(self._items)
+
+    def clear(self):
+        self._items.clear()
+
+
+_MISSING = object()
@@ -0,0 +1,539 @@
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Keep the master UFOs of a .glyphs file up to date while it is edited.
+
+`GlyphsWatcher.update` converts the .glyphs file again when it changed since
+the last update, doing as little work as it can:
+
+* Only the glyphs whose text changed are parsed again. The changed region of
+  the file is found by comparing the new text with the previous one, and
+  only that region is scanned for glyph boundaries (see
+  glyphsLib.parser.split_glyphs). The rest of the font (masters, kerning,
+  features...) is parsed again only if its text changed.
+
+* If only the layers of some glyphs changed, in a way that cannot change the
+  font-level data (same glyph attributes, layers, anchor names and, when
+  anchors are propagated, component names), only
+  these glyphs and the composite glyphs that use them are converted again,
+  and only their .glif files are written.
+
+* Otherwise, the whole font is converted again, but only the files whose
+  contents changed are written.
+
+`GlyphsWatcher.watch` polls the .glyphs file and calls `update` once the
+file has not changed for a short while, so that a save in progress is not
+read half-written.
+"""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+from bisect import bisect_left, bisect_right
+from io import StringIO, open
+import logging
+import os
+import shutil
+import tempfile
+import time
+
+from ufoLib.plistlib import readPlist
+
+from glyphsLib.builder import to_designspace
+from glyphsLib.parser import (
+    GlyphSpan, GlyphsListSpan, loads, parse_glyph, scan_glyphs, split_glyphs)
+from glyphsLib.util import ufo_create_background_layer_for_all_glyphs
+from glyphsLib.writer import Writer
+
+__all__ = ['GlyphsWatcher']
+
+logger = logging.getLogger(__name__)
+
+# The size of the blocks compared to find the common prefix and suffix of the
+# previous and the new text
+_BLOCK_SIZE = 1 << 16
+
+
+class GlyphsWatcher(object):
+    """Write the master UFOs and the designspace of `glyphs_file` and keep
+    them up to date. The arguments are the same as for
+    `glyphsLib.build_masters`, except that the designspace file is written
+    to `designspace_path` or next to the masters, named after the
+    .glyphs file.
+    """
+
+    def __init__(self, glyphs_file, master_dir, designspace_instance_dir=None,
+                 designspace_path=None, propagate_anchors=True,
+                 minimize_glyphs_diffs=False, normalize_ufos=False,
+                 create_background_layers=False):
+        self.glyphs_file = glyphs_file
+        self.master_dir = master_dir
+        if designspace_path is None:
+            designspace_path = os.path.join(
+                master_dir, os.path.splitext(
+                    os.path.basename(glyphs_file))[0] + '.designspace')
+        self.designspace_path = designspace_path
+        self.instance_dir = None
+        if designspace_instance_dir is not None:
+            self.instance_dir = os.path.relpath(
+                designspace_instance_dir, master_dir)
+        self.propagate_anchors = propagate_anchors
+        self.minimize_glyphs_diffs = minimize_glyphs_diffs
+        self.normalize_ufos = normalize_ufos
+        self.create_background_layers = create_background_layers
+
+        self.font = None
+        # The text of the last version that was converted, with its glyph
+        # spans
+        self._text = None
+        self._spans = None
+        # The (mtime, size) of the file when it was last read
+        self._signature = None
+        # The UFO paths written by the last full conversion
+        self._ufo_paths = []
+
+    def update(self):
+        """Convert the .glyphs file again if it changed since the last update
+        (or for the first time). Return the paths of the files that were
+        written or removed, or None if the .glyphs file did not change.
+
+        If the file cannot be parsed (e.g. because it is being written), the
+        ValueError is raised and the next update converts the whole file.
+        """
+        stat = os.stat(self.glyphs_file)
+        signature = (stat.st_mtime, stat.st_size)
+        if signature == self._signature:
+            return None
+        with open(self.glyphs_file, 'r', encoding='utf-8') as fp:
+            text = fp.read()
+        if text == self._text:
+            self._signature = signature
+            return None
+
+        try:
+            if self._text is None:
+                written = self._load(text)
+            else:
+                written = self._reload(text)
+        except Exception:
+            # The font may be half updated, start again from scratch
+            self.font = self._text = self._spans = self._signature = None
+            raise
+        self._text = text
+        self._signature = signature
+        return written
+
+    def watch(self, interval=0.2, debounce=0.3, callback=None,
+              should_stop=None):
+        """Call `update` whenever the .glyphs file changed and then stayed
+        the same for `debounce` seconds, checking every `interval` seconds,
+        until `should_stop()` returns True (forever by default).
+
+        `callback` is called after each update with the paths that were
+        written and the time that the update took. Errors while updating
+        are logged, and the update is tried again at the next change.
+        """
+        self._update_and_report(callback)
+        last_signature = self._signature
+        changed_at = None
+        while should_stop is None or not should_stop():
+            time.sleep(interval)
+            try:
+                stat = os.stat(self.glyphs_file)
+            except OSError:
+                # Being replaced
+                continue
+            signature = (stat.st_mtime, stat.st_size)
+            if signature != last_signature:
+                last_signature = signature
+                changed_at = time.time()
+            elif (changed_at is not None and
+                    time.time() - changed_at >= debounce):
+                changed_at = None
+                self._update_and_report(callback)
+
+    def _update_and_report(self, callback):
+        start = time.time()
+        try:
+            written = self.update()
+        except Exception:
+            logger.exception('Could not convert %s', self.glyphs_file)
+            return
+        if written is not None and callback is not None:
+            callback(written, time.time() - start)
+
+    def _load(self, text):
+        spans = split_glyphs(text)
+        font = loads(_font_text(text, spans))
+        font.glyphs = [parse_glyph(text[span.start:span.end])
+                       for span in spans.glyphs]
+        font.filepath = self.glyphs_file
+        self.font = font
+        self._spans = spans
+        return self._write_all()
+
+    def _reload(self, text):
+        old_text, old_spans = self._text, self._spans
+        spans, font_changed = _find_changes(old_text, old_spans, text)
+
+        # Parse the glyphs whose text changed, reuse the others
+        old_glyphs = {}
+        for span, glyph in zip(old_spans.glyphs, self.font.glyphs):
+            old_glyphs[span.name] = (old_text[span.start:span.end], glyph)
+        glyphs = []
+        changed = []
+        for index, span in enumerate(spans.glyphs):
+            glyph_text = text[span.start:span.end]
+            old_glyph_text, glyph = old_glyphs.get(span.name, (None, None))
+            if glyph_text != old_glyph_text:
+                glyph = parse_glyph(glyph_text)
+                changed.append(index)
+            glyphs.append(glyph)
+        logger.info('%d glyphs changed in %s', len(changed), self.glyphs_file)
+
+        same_glyph_names = (
+            [span.name for span in spans.glyphs] ==
+            [span.name for span in old_spans.glyphs])
+        incremental = (
+            not font_changed and same_glyph_names and
+            all(_same_font_data(self.font.glyphs[index], glyphs[index],
+                                self.propagate_anchors)
+                for index in changed))
+
+        if font_changed:
+            font = loads(_font_text(text, spans))
+            font.glyphs = glyphs
+            font.filepath = self.glyphs_file
+            self.font = font
+        elif not same_glyph_names:
+            self.font.glyphs = glyphs
+        else:
+            for index in changed:
+                self.font.glyphs[index] = glyphs[index]
+        self._spans = spans
+
+        if incremental and self._ufo_paths:
+            written = self._write_glyphs(
+                [spans.glyphs[index].name for index in changed])
+            if written is not None:
+                return written
+        return self._write_all()
+
+    def _build(self, subset=None):
+        designspace = to_designspace(
+            self.font,
+            propagate_anchors=self.propagate_anchors,
+            minimize_glyphs_diffs=self.minimize_glyphs_diffs,
+            instance_dir=self.instance_dir,
+            subset=subset)
+        if self.create_background_layers:
+            for source in designspace.sources:
+                ufo_create_background_layer_for_all_glyphs(source.font)
+        return designspace
+
+    def _save(self, designspace, directory):
+        """Save the UFOs of `designspace` in `directory`, return their paths.
+        """
+        paths = []
+        for source in designspace.sources:
+            path = os.path.join(directory, source.filename)
+            source.font.save(path)
+            if self.normalize_ufos:
+                import ufonormalizer
+                ufonormalizer.normalizeUFO(path, writeModTimes=False)
+            paths.append(path)
+        return paths
+
+    def _write_all(self):
+        """Convert the whole font and write the files that changed."""
+        designspace = self._build()
+        if not os.path.isdir(self.master_dir):
+            os.makedirs(self.master_dir)
+        tempdir = tempfile.mkdtemp(dir=self.master_dir, suffix='.tmp')
+        written = []
+        try:
+            ufo_paths = []
+            for temp_path in self._save(designspace, tempdir):
+                ufo_path = os.path.join(
+                    self.master_dir, os.path.basename(temp_path))
+                written.extend(_sync_tree(temp_path, ufo_path))
+                ufo_paths.append(ufo_path)
+            for ufo_path in self._ufo_paths:
+                # Not built any more, e.g. because the master was renamed
+                if ufo_path not in ufo_paths and os.path.isdir(ufo_path):
+                    shutil.rmtree(ufo_path)
+                    written.append(ufo_path)
+            temp_path = os.path.join(tempdir, 'font.designspace')
+            designspace.write(temp_path)
+            if _replace_if_changed(temp_path, self.designspace_path):
+                written.append(self.designspace_path)
+        finally:
+            shutil.rmtree(tempdir)
+        self._ufo_paths = ufo_paths
+        return written
+
+    def _write_glyphs(self, changed):
+        """Convert the `changed` glyphs and the glyphs that use them as
+        components, and write their .glif files. Return None if that is not
+        enough to update the UFOs, e.g. because a layer was added.
+        """
+        names = self.font.componentGraph.usedByClosure(changed)
+        designspace = self._build(subset=names)
+        tempdir = tempfile.mkdtemp(dir=self.master_dir, suffix='.tmp')
+        try:
+            temp_paths = self._save(designspace, tempdir)
+            if len(temp_paths) != len(self._ufo_paths):
+                return None
+            copies = []
+            for temp_path, ufo_path in zip(temp_paths, self._ufo_paths):
+                files = _glyph_files(temp_path, ufo_path, names)
+                if files is None:
+                    return None
+                copies.extend(files)
+            return [path for source, path in copies
+                    if _replace_if_changed(source, path)]
+        finally:
+            shutil.rmtree(tempdir)
+
+
+def _font_text(text, spans):
+    """Return the text of the font without its glyphs."""
+    return text[:spans.list_start] + text[spans.list_end:]
+
+
+def _find_changes(old_text, old_spans, text):
+    """Return the GlyphsListSpan of `text`, which is a new version of
+    `old_text` whose spans are `old_spans`, and whether the text outside of
+    the glyphs changed.
+
+    Only the region between the common prefix and suffix of the two texts is
+    scanned, if it is inside the glyphs list.
+    """
+    prefix = _common_prefix(old_text, text)
+    suffix = _common_suffix(old_text, text, len(old_text) - prefix)
+    old_end = len(old_text) - suffix
+    end = len(text) - suffix
+    delta = len(text) - len(old_text)
+    if prefix < old_spans.list_start or old_end > old_spans.list_end:
+        spans = split_glyphs(text)
+        font_changed = (
+            _font_text(old_text, old_spans) != _font_text(text, spans))
+        return spans, font_changed
+
+    old_glyphs = old_spans.glyphs
+    # The glyphs that end before the changes are the same
+    first = bisect_right([span.end for span in old_glyphs], prefix)
+    start = prefix
+    if first < len(old_glyphs) and old_glyphs[first].start < start:
+        start = old_glyphs[first].start
+    glyphs, scan_end = scan_glyphs(text, start, stop=end)
+    if scan_end < end:
+        # The list ended before the changes did
+        return split_glyphs(text), True
+    rest = []
+    if glyphs and scan_end == glyphs[-1].end:
+        # The glyphs that start after the last scanned one are the same
+        old_scan_end = scan_end - delta
+        last = bisect_left([span.start for span in old_glyphs], old_scan_end)
+        if last > 0 and old_glyphs[last - 1].end != old_scan_end:
+            return split_glyphs(text), True
+        rest = [GlyphSpan(span.name, span.start + delta, span.end + delta)
+                for span in old_glyphs[last:]]
+        list_end = old_spans.list_end + delta
+    else:
+        list_end = scan_end
+    spans = GlyphsListSpan(
+        old_spans.list_start, list_end, old_glyphs[:first] + glyphs + rest)
+    return spans, False
+
+
+def _common_prefix(a, b):
+    n = min(len(a), len(b))
+    i = 0
+    while i < n and a[i:i + _BLOCK_SIZE] == b[i:i + _BLOCK_SIZE]:
+        i += _BLOCK_SIZE
+    if i >= n:
+        return n
+    end = min(i + _BLOCK_SIZE, n)
+    while i < end and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def _common_suffix(a, b, limit):
+    """Return the length of the common suffix of `a` and `b`, at most
+    `limit` and the length of `b`.
+    """
+    n = min(limit, len(b))
+    i = 0
+    while i < n:
+        size = min(_BLOCK_SIZE, n - i)
+        if a[len(a) - i - size:len(a) - i] != b[len(b) - i - size:len(b) - i]:
+            break
+        i += size
+    else:
+        return n
+    end = min(i + _BLOCK_SIZE, n)
+    while i < end and a[len(a) - i - 1] == b[len(b) - i - 1]:
+        i += 1
+    return i
+
+
+def _same_font_data(old, new, propagate_anchors):
+    """Return True if replacing the GSGlyph `old` by `new` can only change
+    its own .glif files and those of the glyphs that use it, and not the
+    font-level data of the UFOs (glyph order, groups, features...).
+    """
+    for key in old._keyOrder:
+        if key in ('layers', 'lastChange'):
+            continue
+        if _plist_value(old, key) != _plist_value(new, key):
+            return False
+    return (_layer_structure(old, propagate_anchors) ==
+            _layer_structure(new, propagate_anchors))
+
+
+def _plist_value(glyph, key):
+    """Return the value of the attribute `key` of the GSGlyph `glyph` as it
+    would be written in a .glyphs file, as the user data and smart component
+    axes do not compare by value.
+    """
+    value = getattr(glyph, glyph._wrapperKeysTranslate.get(key, key), None)
+    if value is None:
+        return None
+    fp = StringIO()
+    Writer(fp).writeValue(value, key)
+    return fp.getvalue()
+
+
+def _layer_structure(glyph, propagate_anchors):
+    """The layers of the glyph and their anchors, as far as the font-level
+    data can see them: the GDEF table depends on anchor names, and on the
+    position of ligature caret anchors. When anchors are propagated, the
+    components of a layer bring their anchors, so their names count too.
+    """
+    structure = []
+    for layer in glyph.layers.values():
+        anchors = []
+        for anchor in layer.anchors:
+            if anchor.name and anchor.name.startswith('caret_'):
+                anchors.append(
+                    (anchor.name, anchor.position.x, anchor.position.y))
+            else:
+                anchors.append((anchor.name,))
+        # As written in the file: the master layers of a glyph that is not in
+        # a font yet have no master id nor name
+        master_id = layer.associatedMasterId or layer.layerId
+        name = layer._name if layer.layerId != master_id else None
+        components = None
+        if propagate_anchors:
+            components = [component.name for component in layer.components]
+        structure.append((layer.layerId, master_id, name, anchors,
+                          components))
+    return structure
+
+
+def _glyph_files(source_ufo, target_ufo, names):
+    """Return the (source, target) paths of the .glif files of the glyphs
+    `names` in the UFO `source_ufo` and in the UFO `target_ufo`, or None if
+    they do not have the same glyphs in the same layers.
+    """
+    source_layers = _read_plist(source_ufo, 'layercontents.plist')
+    target_layers = dict(_read_plist(target_ufo, 'layercontents.plist') or [])
+    if source_layers is None or not target_layers:
+        return None
+    files = []
+    for layer_name, source_dir in source_layers:
+        target_dir = target_layers.pop(layer_name, None)
+        if target_dir is None:
+            return None
+        source_contents = _read_plist(
+            source_ufo, os.path.join(source_dir, 'contents.plist'))
+        target_contents = _read_plist(
+            target_ufo, os.path.join(target_dir, 'contents.plist'))
+        if source_contents is None or target_contents is None:
+            return None
+        for name in names:
+            if name not in source_contents:
+                if name in target_contents:
+                    return None
+                continue
+            if name not in target_contents:
+                return None
+            files.append((
+                os.path.join(source_ufo, source_dir, source_contents[name]),
+                os.path.join(target_ufo, target_dir, target_contents[name])))
+    for layer_name, target_dir in target_layers.items():
+        # A layer where none of the glyphs is any more
+        target_contents = _read_plist(
+            target_ufo, os.path.join(target_dir, 'contents.plist')) or {}
+        if any(name in target_contents for name in names):
+            return None
+    return files
+
+
+def _read_plist(ufo_path, file_name):
+    path = os.path.join(ufo_path, file_name)
+    if not os.path.exists(path):
+        return None
+    return readPlist(path)
+
+
+def _read_bytes(path):
+    try:
+        with open(path, 'rb') as fp:
+            return fp.read()
+    except (IOError, OSError):
+        return None
+
+
+def _replace_if_changed(source, target):
+    """Move the file `source` to `target` if their contents differ. Return
+    True if `target` was replaced.
+    """
+    if _read_bytes(source) == _read_bytes(target):
+        return False
+    directory = os.path.dirname(target)
+    if directory and not os.path.isdir(directory):
+        os.makedirs(directory)
+    if os.path.exists(target):
+        os.remove(target)
+    shutil.move(source, target)
+    return True
+
+
+def _sync_tree(source, target):
+    """Make the directory `target` the same as `source`, only writing the
+    files that differ. Return the paths that were written or removed.
+    """
+    if os.path.isfile(target):
+        os.remove(target)
+    changed = []
+    source_files = set()
+    for root, _dirs, names in os.walk(source):
+        for name in names:
+            path = os.path.relpath(os.path.join(root, name), source)
+            source_files.add(path)
+            if _replace_if_changed(os.path.join(source, path),
+                                   os.path.join(target, path)):
+                changed.append(os.path.join(target, path))
+    for root, dirs, names in os.walk(target, topdown=False):
+        for name in names:
+            path = os.path.relpath(os.path.join(root, name), target)
+            if path not in source_files:
+                os.remove(os.path.join(root, name))
+                changed.append(os.path.join(target, path))
+        if not os.listdir(root):
+            os.rmdir(root)
+    return changed
@@ -19,6 +19,7 @@
 from __future__ import unicode_literals
 import sys
 import glyphsLib.classes
+from glyphsLib import profiling
 from glyphsLib.types import floatToString
 import logging
 import datetime
@@ -53,8 +54,9 @@ class Writer(object):
             self.file = codecs.getwriter('utf-8')(fp)
 
     def write(self, rootObject):
-        self.writeDict(rootObject)
-        self.file.write("\n")
+        with profiling.stage('write'):
+            self.writeDict(rootObject)
+            self.file.write("\n")
 
     def writeDict(self, dictValue):
         self.file.write("{\n")
@@ -65,13 +67,15 @@ class Writer(object):
             keys = sorted(dictValue._classesForName.keys())
         else:
             keys = dictValue.keys()
-            if not isinstance(dictValue, OrderedDict):
+            if not isinstance(dictValue, (OrderedDict,
+                                          glyphsLib.classes.KerningMapping)):
                 keys = sorted(keys)
         for key in keys:
             if hasattr(dictValue, "_classesForName"):
                 forType = dictValue._classesForName[key]
             try:
-                if isinstance(dictValue, (dict, OrderedDict)):
+                if isinstance(dictValue, (dict, OrderedDict,
+                                          glyphsLib.classes.KerningMapping)):
                     value = dictValue[key]
                 else:
                     getKey = key
@@ -129,7 +133,8 @@ class Writer(object):
                 self.writeUserData(value)
             else:
                 self.writeArray(value)
-        elif isinstance(value, (dict, OrderedDict, glyphsLib.classes.GSBase)):
+        elif isinstance(value, (dict, OrderedDict, glyphsLib.classes.GSBase,
+                                glyphsLib.classes.KerningMapping)):
             self.writeDict(value)
         elif type(value) == float:
             self.file.write(floatToString(value, 5))
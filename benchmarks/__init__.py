@@ -0,0 +1,28 @@
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks of the parse, write and conversion hot paths.
+
+The benchmarks are written for airspeed velocity (asv), which runs them
+against any range of commits and stores the results as JSON (in
+.asv/results), so that regressions can be found with `asv compare` or
+`asv continuous`:
+
+    pip install asv
+    asv run                              # benchmark the latest commit
+    asv continuous master HEAD           # compare a branch with master
+    GLYPHSLIB_BENCHMARK_SCALES=1k-2m asv run --quick    # smoke test
+
+The inputs are synthetic fonts at several scales, see `benchmarks.common`.
+"""
@@ -0,0 +1,112 @@
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks of the conversions between .glyphs files and UFOs."""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import os
+import shutil
+
+from glyphsLib.builder import to_ufos, to_designspace, to_glyphs
+from glyphsLib.builder.instances import apply_instance_data
+from glyphsLib.classes import GSFont
+
+from .common import (
+    DENSE_NODES, SyntheticFontBenchmark, cache_dir, dense_font, font_path)
+
+
+class ToUFOsSuite(SyntheticFontBenchmark):
+
+    def setup(self, scale):
+        self.font = GSFont(font_path(scale))
+
+    def time_to_ufos(self, scale):
+        to_ufos(self.font)
+
+    def time_to_designspace(self, scale):
+        to_designspace(self.font)
+
+    def peakmem_to_designspace(self, scale):
+        to_designspace(self.font)
+
+
+class ToGlyphsSuite(SyntheticFontBenchmark):
+
+    def setup(self, scale):
+        self.designspace = to_designspace(GSFont(font_path(scale)))
+
+    def time_to_glyphs(self, scale):
+        to_glyphs(self.designspace)
+
+
+class DenseOutlineSuite(object):
+    """Conversions of glyphs with long outlines and node user data, which
+    should take time linear in the number of nodes per glyph.
+    """
+    params = DENSE_NODES
+    param_names = ['nodes']
+    number = 1
+    repeat = 3
+    warmup_time = 0
+    timeout = 600
+
+    def setup(self, nodes):
+        self.font = dense_font(nodes)
+        self.designspace = to_designspace(dense_font(nodes))
+
+    def time_to_ufos(self, nodes):
+        to_ufos(self.font)
+
+    def time_to_glyphs(self, nodes):
+        to_glyphs(self.designspace)
+
+
+class ApplyInstanceDataSuite(SyntheticFontBenchmark):
+
+    def setup(self, scale):
+        self.designspace_path = instances_designspace_path(scale)
+
+    def time_apply_instance_data(self, scale):
+        apply_instance_data(self.designspace_path)
+
+
+def instances_designspace_path(scale):
+    """Return the path of a designspace with master and instance UFOs on disk
+    for the synthetic font at `scale`, writing them if they are not cached.
+
+    The instance UFOs are copies of the first master, as apply_instance_data
+    only needs them to exist.
+    """
+    directory = os.path.join(cache_dir(), os.path.splitext(
+        os.path.basename(font_path(scale)))[0] + '-instances')
+    designspace_path = os.path.join(directory, 'Synthetic.designspace')
+    if os.path.exists(designspace_path):
+        return designspace_path
+    if os.path.exists(directory):
+        shutil.rmtree(directory)
+    os.makedirs(directory)
+
+    designspace = to_designspace(GSFont(font_path(scale)),
+                                 instance_dir='instances')
+    for source in designspace.sources:
+        source.font.save(os.path.join(directory, source.filename))
+    first_master = os.path.join(directory, designspace.sources[0].filename)
+    for instance in designspace.instances:
+        shutil.copytree(first_master,
+                        os.path.join(directory, instance.filename))
+    # Written last: its presence means that the directory is complete.
+    designspace.write(designspace_path)
+    return designspace_path
@@ -0,0 +1,51 @@
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks of the glyph data lookups."""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+from glyphsLib.glyphdata import get_glyph
+
+from .common import SCALES, SyntheticFontBenchmark
+
+# Names that go through the other code paths of get_glyph: production names,
+# suffixes, ligatures, script suffixes and unknown names.
+OTHER_NAMES = [
+    'A', 'Aacute', 'a.sc', 'f_f_i', 'ka-deva', 'k_ssa-deva', 'uni0041.ss01',
+    'alef-hb', 'space', '.notdef', 'zero.osf', 'brevecomb_acutecomb',
+    'unknown.glyph',
+]
+
+
+class GlyphDataSuite(SyntheticFontBenchmark):
+
+    def setup(self, scale):
+        try:
+            from glyphsLib.testing.synth import glyph_names
+        except ImportError:
+            raise NotImplementedError('glyphsLib.testing.synth is needed')
+        glyph_count, _ = SCALES[scale]
+        names = [name for name, _ in glyph_names(glyph_count)]
+        # One name in ten gets a suffix, and OTHER_NAMES add another 10%.
+        for index in range(0, len(names), 10):
+            names[index] += '.alt'
+        names.extend(OTHER_NAMES * max(1, glyph_count // 10 //
+                                       len(OTHER_NAMES)))
+        self.names = names
+
+    def time_get_glyph(self, scale):
+        for name in self.names:
+            get_glyph(name)
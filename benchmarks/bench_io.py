@@ -0,0 +1,54 @@
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Benchmarks of reading and writing .glyphs files."""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+from io import open
+
+from fontTools.misc.py23 import UnicodeIO
+
+from glyphsLib.classes import GSFont
+from glyphsLib.parser import Parser
+from glyphsLib.writer import Writer
+
+from .common import SyntheticFontBenchmark, font_path
+
+
+class ParseSuite(SyntheticFontBenchmark):
+
+    def setup(self, scale):
+        self.path = font_path(scale)
+        with open(self.path, 'r', encoding='utf-8') as fp:
+            self.text = fp.read()
+
+    def time_parser_parse(self, scale):
+        Parser(current_type=GSFont).parse(self.text)
+
+    def time_gsfont_path(self, scale):
+        GSFont(self.path)
+
+    def peakmem_gsfont_path(self, scale):
+        GSFont(self.path)
+
+
+class WriteSuite(SyntheticFontBenchmark):
+
+    def setup(self, scale):
+        self.font = GSFont(font_path(scale))
+
+    def time_writer_write(self, scale):
+        Writer(UnicodeIO()).write(self.font)
@@ -0,0 +1,134 @@
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Deterministic synthetic fonts shared by the benchmarks.
+
+The fonts are made by glyphsLib.testing.synth from a fixed seed, so the same
+scale always gives the same .glyphs file. They are cached on disk (in
+$GLYPHSLIB_BENCHMARK_CACHE, or a directory in the system temporary
+directory) because the larger ones take a while to build.
+
+glyphsLib.testing.synth does not exist in older commits: to benchmark them,
+fill the cache first with a recent glyphsLib, e.g. by running the benchmarks
+of the latest commit. Otherwise the benchmarks are skipped.
+"""
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import os
+import tempfile
+from collections import OrderedDict
+
+# Bump this when the generated fonts change, so that stale cached files are
+# not reused.
+GENERATOR_VERSION = 2
+
+SEED = 20180627
+
+# Scale name -> (number of glyphs, number of masters)
+SCALES = OrderedDict([
+    ('1k-2m', (1000, 2)),
+    ('10k-8m', (10000, 8)),
+    ('60k-20m', (60000, 20)),
+])
+
+
+def scales():
+    """Return the scale names to benchmark.
+
+    All of them by default, or the comma-separated list of names in
+    $GLYPHSLIB_BENCHMARK_SCALES (e.g. "1k-2m,10k-8m" to skip the largest).
+    """
+    names = os.environ.get('GLYPHSLIB_BENCHMARK_SCALES')
+    if not names:
+        return list(SCALES)
+    names = [name.strip() for name in names.split(',') if name.strip()]
+    for name in names:
+        if name not in SCALES:
+            raise ValueError('Unknown benchmark scale: %s' % name)
+    return names
+
+
+# Nodes per simple glyph of the dense outline benchmarks
+DENSE_NODES = [500, 2000, 8000]
+
+
+def dense_font(nodes):
+    """Return a small synthetic GSFont whose simple glyphs have `nodes`
+    nodes each, all with user data. The time per node of its conversions
+    should not depend on `nodes`.
+    """
+    try:
+        from glyphsLib.testing import synth
+    except ImportError:
+        raise NotImplementedError(
+            'glyphsLib.testing.synth is needed to generate the font')
+    font = synth.make_font(glyphs=8, masters=2, nodes=nodes, seed=SEED)
+    for glyph in font.glyphs:
+        for layer in glyph.layers:
+            for path in layer.paths:
+                for node in path.nodes:
+                    node.userData['weight'] = 1
+    return font
+
+
+def cache_dir():
+    path = os.environ.get('GLYPHSLIB_BENCHMARK_CACHE') or os.path.join(
+        tempfile.gettempdir(), 'glyphsLib-benchmarks')
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    return path
+
+
+def font_path(scale):
+    """Return the path of the synthetic .glyphs file for `scale`, generating
+    it if it is not cached yet.
+    """
+    path = os.path.join(cache_dir(), 'Synthetic-%s-v%d-%d.glyphs' % (
+        scale, GENERATOR_VERSION, SEED))
+    if not os.path.exists(path):
+        try:
+            from glyphsLib.testing import synth
+        except ImportError:
+            # asv skips benchmarks whose setup raises NotImplementedError
+            raise NotImplementedError(
+                'glyphsLib.testing.synth is needed to generate %s' % path)
+        glyph_count, master_count = SCALES[scale]
+        font = synth.make_font(
+            glyphs=glyph_count, masters=master_count,
+            brace_layers=glyph_count // 100, bracket_layers=glyph_count // 100,
+            classes=max(1, glyph_count // 500),
+            feature_lines=max(20, glyph_count // 10), seed=SEED)
+        # Write next to the final path and rename, so that an interrupted
+        # run does not leave a truncated file in the cache.
+        font.save(path + '.tmp')
+        os.rename(path + '.tmp', path)
+    return path
+
+
+class SyntheticFontBenchmark(object):
+    """Base class of the benchmarks over the synthetic fonts, parametrized by
+    scale.
+
+    Each sample runs the benchmarked function once, after a fresh `setup`,
+    because the larger fonts take minutes and some conversions modify their
+    input.
+    """
+    params = scales()
+    param_names = ['scale']
+    number = 1
+    repeat = 3
+    warmup_time = 0
+    timeout = 3600
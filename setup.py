@@ -46,6 +46,7 @@ setup(
         "console_scripts": [
             "ufo2glyphs = glyphsLib.cli:_ufo2glyphs_entry_point",
             "glyphs2ufo = glyphsLib.cli:_glyphs2ufo_entry_point",
+            "glyphs-merge-driver = glyphsLib.cli:_merge_driver_entry_point",
         ],
     },
     setup_requires=pytest_runner + wheel + ["setuptools_scm"],
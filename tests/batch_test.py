@@ -0,0 +1,115 @@
+# coding=UTF-8
+#
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import glob
+import io
+import os
+import shutil
+
+import pytest
+
+import glyphsLib.cli
+from glyphsLib.batch import BatchJob, build_masters_batch, read_manifest
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+
+@pytest.fixture
+def sources(tmpdir):
+    paths = []
+    for name in ('GlyphsUnitTestSans', 'MontserratStrippedDown'):
+        path = os.path.join(str(tmpdir), name + '.glyphs')
+        shutil.copy(os.path.join(DATA, name + '.glyphs'), path)
+        paths.append(path)
+    return paths
+
+
+def test_read_manifest(tmpdir):
+    manifest = os.path.join(str(tmpdir), 'fonts.txt')
+    with io.open(manifest, 'w', encoding='utf-8') as fp:
+        fp.write('# Sources\nA.glyphs\n\n  sub/B.glyphs  \n')
+    assert read_manifest(manifest) == [
+        os.path.join(str(tmpdir), 'A.glyphs'),
+        os.path.join(str(tmpdir), 'sub', 'B.glyphs')]
+
+
+@pytest.mark.parametrize('processes', [1, 2])
+def test_build_masters_batch(tmpdir, sources, processes):
+    master_dir = os.path.join(str(tmpdir), 'masters')
+    jobs = [BatchJob(path, master_dir, None, None)
+            for path in sources + [os.path.join(str(tmpdir), 'missing.glyphs')]]
+
+    results = list(build_masters_batch(jobs, processes=processes,
+                                       normalize_ufos=False))
+
+    by_file = {os.path.basename(r.job.glyphs_file): r for r in results}
+    assert sorted(by_file) == [
+        'GlyphsUnitTestSans.glyphs', 'MontserratStrippedDown.glyphs',
+        'missing.glyphs']
+    assert by_file['GlyphsUnitTestSans.glyphs'].status == 'ok'
+    assert by_file['GlyphsUnitTestSans.glyphs'].error is None
+    assert by_file['missing.glyphs'].status == 'failed'
+    assert 'missing.glyphs' in by_file['missing.glyphs'].error
+    assert len(glob.glob(os.path.join(master_dir, '*.ufo'))) == 6
+    assert len(glob.glob(os.path.join(master_dir, '*.designspace'))) == 2
+
+
+def test_largest_first(tmpdir, sources):
+    jobs = [BatchJob(path, str(tmpdir), None, None) for path in sources]
+    results = list(build_masters_batch(jobs, processes=1))
+    sizes = [os.path.getsize(r.job.glyphs_file) for r in results]
+    assert sizes == sorted(sizes, reverse=True)
+
+
+def test_main(tmpdir, sources, capsys):
+    manifest = os.path.join(str(tmpdir), 'fonts.txt')
+    with io.open(manifest, 'w', encoding='utf-8') as fp:
+        fp.write('MontserratStrippedDown.glyphs\n')
+    master_dir = os.path.join(str(tmpdir), 'masters')
+
+    status = glyphsLib.cli.main([
+        'batch', sources[0], '--manifest', manifest, '-m', master_dir,
+        '-j', '1', '--no-normalize-ufos'])
+
+    assert status == 0
+    out = capsys.readouterr().out
+    assert '[2/2] ok' in out
+    assert '2 files converted, 0 failed' in out
+    assert os.path.exists(
+        os.path.join(master_dir, 'GlyphsUnitTestSans.designspace'))
+
+    # Twice the same file would write the same outputs concurrently
+    assert glyphsLib.cli.main(['batch', sources[0], sources[0]]) == 2
+
+
+def test_main_relative_paths(tmpdir, sources, capsys):
+    # The outputs go next to the sources, in the current directory
+    cwd = os.getcwd()
+    os.chdir(str(tmpdir))
+    try:
+        status = glyphsLib.cli.main([
+            'batch', 'GlyphsUnitTestSans.glyphs',
+            'MontserratStrippedDown.glyphs', '-j', '1', '--stream'])
+    finally:
+        os.chdir(cwd)
+
+    assert status == 0
+    assert '2 files converted, 0 failed' in capsys.readouterr().out
+    assert len(glob.glob(os.path.join(str(tmpdir), '*.ufo'))) == 6
+    assert not glob.glob(os.path.join(str(tmpdir), '*.tmp'))
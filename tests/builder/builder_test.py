@@ -32,14 +32,17 @@ from fontTools.misc.loggingTools import CapturingLogHandler
 from glyphsLib import builder
 from glyphsLib.classes import (
     GSFont, GSFontMaster, GSInstance, GSCustomParameter, GSGlyph, GSLayer,
-    GSPath, GSNode, GSAnchor, GSComponent, GSAlignmentZone, GSGuideLine)
+    GSPath, GSNode, GSAnchor, GSComponent, GSAlignmentZone, GSGuideLine,
+    GSFeature)
 from glyphsLib.types import Point
 
 from glyphsLib.builder import to_ufos, to_glyphs
 from glyphsLib.builder.builders import UFOBuilder, GlyphsBuilder
 from glyphsLib.builder.paths import to_ufo_paths
 from glyphsLib.builder.names import build_stylemap_names
+from glyphsLib.builder.features import _build_gdef
 from glyphsLib.builder.filters import parse_glyphs_filter
+from glyphsLib.testing import synth
 from glyphsLib.builder.constants import (
     GLYPHS_PREFIX, PUBLIC_PREFIX, GLYPHLIB_PREFIX,
     UFO2FT_USE_PROD_NAMES_KEY, FONT_CUSTOM_PARAM_PREFIX,
@@ -391,6 +394,40 @@ class ToUfosTest(unittest.TestCase):
         # due to conflict with (a, kern2.V, 100)
         self.assertEqual(ufo.kerning['A', 'v'], -100)
 
+    def test_load_kerning_conflict_warning(self):
+        """Test that only the conflicting pair is dropped from a class rule,
+        and that a warning is printed for it.
+        """
+
+        font = generate_minimal_font()
+        for glyph_name in ('A', 'a', 'V', 'v'):
+            glyph = add_glyph(font, glyph_name)
+            glyph.rightKerningGroup = glyph_name.upper()
+            glyph.leftKerningGroup = glyph_name.upper()
+
+        font.kerning = {
+            font.masters[0].id: collections.OrderedDict((
+                ('@MMK_L_A', collections.OrderedDict((
+                    ('v', -100),
+                    ('V', -80),
+                ))),
+                ('a', collections.OrderedDict((
+                    ('@MMK_R_V', 100),
+                ))),
+            ))}
+
+        with CapturingLogHandler(builder.logger, "WARNING") as captor:
+            ufo = to_ufos(font)[0]
+        self.assertEqual(len([r for r in captor.records
+                              if "Conflicting kerning rules" in r.msg]), 2)
+
+        # both class-to-glyph rules conflict on 'a', the rest is unchanged
+        self.assertEqual(dict(ufo.kerning), {
+            ('a', 'public.kern2.V'): 100,
+            ('A', 'v'): -100,
+            ('A', 'V'): -80,
+        })
+
     def test_propagate_anchors(self):
         """Test anchor propagation for some relatively complicated cases."""
 
@@ -458,6 +495,93 @@ class ToUfosTest(unittest.TestCase):
         # We just want the call to `to_ufos` to not crash
         assert to_ufos(font)
 
+    def test_propagate_anchors_deep_components(self):
+        """Composites nested deeper than the recursion limit still get
+        their anchors propagated."""
+        font = generate_minimal_font()
+        add_glyph(font, 'base')
+        add_anchor(font, 'base', 'top', 100, 700)
+        depth = 1500
+        previous = 'base'
+        for i in range(depth):
+            name = 'nested%d' % i
+            add_glyph(font, name)
+            add_component(font, name, previous, (1, 0, 0, 1, 1, 0))
+            previous = name
+
+        ufo = to_ufos(font)[0]
+
+        anchors = ufo[previous].anchors
+        self.assertEqual(len(anchors), 1)
+        self.assertEqual(anchors[0].name, 'top')
+        self.assertEqual((anchors[0].x, anchors[0].y), (100 + depth, 700))
+
+    def test_subset(self):
+        font = generate_minimal_font()
+        for glyph_name in ('A', 'Aacute', 'acutecomb', 'V', 'W'):
+            glyph = add_glyph(font, glyph_name)
+            glyph.leftKerningGroup = glyph_name[0]
+            glyph.rightKerningGroup = glyph_name[0]
+        add_component(font, 'Aacute', 'A', (1, 0, 0, 1, 0, 0))
+        add_component(font, 'Aacute', 'acutecomb', (1, 0, 0, 1, 0, 0))
+        font.kerning = {
+            font.masters[0].id: collections.OrderedDict((
+                ('@MMK_L_A', collections.OrderedDict((
+                    ('@MMK_R_V', -250),
+                    ('@MMK_R_W', -200),
+                    ('W', -150),
+                ))),
+                ('V', collections.OrderedDict((
+                    ('A', -50),
+                ))),
+            ))}
+
+        with CapturingLogHandler(builder.logger, "WARNING") as captor:
+            ufo = to_ufos(font, subset=['Aacute', 'V', 'missing'])[0]
+        captor.assertRegex('left out of the subset: missing$')
+
+        self.assertEqual(sorted(ufo.keys()),
+                         ['A', 'Aacute', 'V', 'acutecomb'])
+        self.assertEqual(ufo.lib['public.glyphOrder'],
+                         ['A', 'Aacute', 'acutecomb', 'V'])
+        self.assertNotIn('public.kern1.W', ufo.groups)
+        self.assertEqual(ufo.groups['public.kern1.A'], ['A', 'Aacute'])
+        self.assertEqual(dict(ufo.kerning), {
+            ('public.kern1.A', 'public.kern2.V'): -250,
+            ('V', 'A'): -50,
+        })
+
+    def test_bulk(self):
+        def dump(ufo):
+            return [
+                ufo.glyphOrder,
+                [(layer.name, layer.dirty, dict(layer.unicodeData),
+                  [(glyph.name, glyph.width, glyph.unicodes,
+                    [[(p.x, p.y, p.segmentType) for p in contour]
+                     for contour in glyph],
+                    [(c.baseGlyph, c.transformation)
+                     for c in glyph.components],
+                    [(a.name, a.x, a.y) for a in glyph.anchors],
+                    dict(glyph.lib))
+                   for glyph in sorted(layer, key=lambda g: g.name)])
+                 for layer in ufo.layers],
+                ufo.dirty]
+
+        font = synth.make_font(glyphs=20, masters=2, brace_layers=2,
+                               bracket_layers=1, seed=3)
+        bulk_ufos = to_ufos(font)
+        slow_ufos = to_ufos(font, bulk=False)
+        self.assertEqual([dump(ufo) for ufo in bulk_ufos],
+                         [dump(ufo) for ufo in slow_ufos])
+
+        # The notifications are enabled again after the build
+        ufo = bulk_ufos[0]
+        ufo.newGlyph('new')
+        self.assertEqual(ufo.glyphOrder[-1], 'new')
+        ufo.dirty = False
+        ufo['new'].width = 100
+        self.assertTrue(ufo.dirty)
+
     def test_postscript_name_from_data(self):
         font = generate_minimal_font()
         add_glyph(font, 'foo')['production'] = 'f_o_o.alt1'
@@ -546,6 +670,44 @@ class ToUfosTest(unittest.TestCase):
             '} GDEF;',
         ])
 
+    def test_GDEF_shared_cache(self):
+        font = generate_minimal_font()
+        for glyph in ('A', 'fi', 'wigglylinebelowcomb'):
+            add_glyph(font, glyph)
+        add_anchor(font, 'A', 'top', 300, 700)
+        add_anchor(font, 'fi', 'caret_1', 150, 0)
+        ufo = to_ufos(font, minimize_glyphs_diffs=True)[0]
+
+        cache = {}
+        gdef = _build_gdef(ufo, cache)
+        self.assertEqual(cache['categories'], {
+            'A': ('Letter', 'Uppercase'),
+            'fi': ('Letter', 'Ligature'),
+            'wigglylinebelowcomb': ('Mark', 'Nonspacing'),
+        })
+        self.assertEqual(cache['glyphIndex'],
+                         {'A': 0, 'fi': 1, 'wigglylinebelowcomb': 2})
+
+        # The cached categories are used for the other masters
+        cache['categories']['A'] = ('Mark', 'Nonspacing')
+        self.assertNotEqual(_build_gdef(ufo, cache), gdef)
+        self.assertIn('[A wigglylinebelowcomb], # Mark',
+                      _build_gdef(ufo, cache))
+
+    def test_features_shared_between_masters(self):
+        font = generate_minimal_font()
+        master = GSFontMaster()
+        master.id = 'id2'
+        font.masters.append(master)
+        font.features.append(GSFeature(name='liga', code='sub f i by fi;'))
+        for glyph in ('f', 'i', 'fi'):
+            add_glyph(font, glyph)
+        ufo1, ufo2 = to_ufos(font)
+
+        self.assertEqual(ufo1.features.text,
+                         'feature liga {\nsub f i by fi;\n} liga;\n')
+        self.assertIs(ufo1.features.text, ufo2.features.text)
+
     def test_GDEF_base_with_attaching_anchor(self):
         font = generate_minimal_font()
         add_glyph(font, 'A.alt')
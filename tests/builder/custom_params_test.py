@@ -31,7 +31,10 @@ import glyphsLib
 from defcon import Font
 from glyphsLib.builder.builders import UFOBuilder, GlyphsBuilder
 from glyphsLib.builder.custom_params import (to_ufo_custom_params,
-                                             _set_default_params)
+                                             _set_default_params,
+                                             get_dispatch_table,
+                                             GlyphsObjectProxy,
+                                             KNOWN_PARAM_HANDLERS)
 from glyphsLib.builder.constants import (
     GLYPHS_PREFIX, PUBLIC_PREFIX, GLYPHLIB_PREFIX,
     UFO2FT_USE_PROD_NAMES_KEY, FONT_CUSTOM_PARAM_PREFIX,
@@ -168,6 +171,20 @@ class SetCustomParamsTest(unittest.TestCase):
         self.assertEqual(mock_parse_glyphs_filter.call_args_list[2],
                          mock.call(filter2, is_pre=False))
 
+    def test_dispatch_only_present_params(self):
+        self.master.customParameters['underlinePosition'] = -50
+        glyphs_proxy = GlyphsObjectProxy(self.master, glyphs_module=None)
+        handlers = get_dispatch_table().to_ufo_handlers(glyphs_proxy)
+
+        names = [getattr(handler, 'glyphs_name', None) for handler in handlers]
+        self.assertIn('underlinePosition', names)
+        self.assertNotIn('underlineThickness', names)
+        # Handlers of attributes are always called
+        self.assertIn('weightValue', names)
+        # Handlers are called in the order in which they were registered
+        self.assertEqual(handlers,
+                         sorted(handlers, key=KNOWN_PARAM_HANDLERS.index))
+
     def test_set_defaults(self):
         _set_default_params(self.ufo)
         self.assertEqual(self.ufo.info.openTypeOS2Type, [3])
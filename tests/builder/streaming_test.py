@@ -0,0 +1,86 @@
+# coding=UTF-8
+#
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import io
+import os
+
+import pytest
+
+import glyphsLib
+from glyphsLib.testing import synth
+
+DATA = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data')
+
+
+def read_tree(path):
+    """Return the contents of the files in `path`, by relative path."""
+    files = {}
+    for root, _dirs, names in os.walk(path):
+        for name in names:
+            file_path = os.path.join(root, name)
+            with io.open(file_path, 'rb') as fp:
+                files[os.path.relpath(file_path, path)] = fp.read()
+    return files
+
+
+def build_both(tmpdir, path, **kwargs):
+    trees = []
+    for stream in (False, True):
+        master_dir = os.path.join(str(tmpdir), 'stream' if stream else 'ufo')
+        masters = glyphsLib.build_masters(
+            path, master_dir, stream=stream, **kwargs)
+        assert len(masters.ufos) == len(glyphsLib.GSFont(path).masters)
+        trees.append(read_tree(master_dir))
+    return trees
+
+
+@pytest.mark.parametrize('normalize_ufos', [False, True])
+@pytest.mark.parametrize('minimize_glyphs_diffs', [False, True])
+def test_same_files(tmpdir, normalize_ufos, minimize_glyphs_diffs):
+    path = os.path.join(DATA, 'GlyphsUnitTestSans.glyphs')
+    expected, actual = build_both(
+        tmpdir, path, normalize_ufos=normalize_ufos,
+        minimize_glyphs_diffs=minimize_glyphs_diffs)
+    assert sorted(actual) == sorted(expected)
+    assert actual == expected
+
+
+def test_synthetic_font(tmpdir):
+    # Composites, propagated anchors, brace and bracket layers, background
+    # layers added after the build
+    font = synth.make_font(glyphs=60, masters=3, brace_layers=4,
+                           bracket_layers=2, component_depth=3, seed=11)
+    path = os.path.join(str(tmpdir), 'Synthetic.glyphs')
+    font.save(path)
+    expected, actual = build_both(tmpdir, path, create_background_layers=True)
+    assert any('glyphs.{300}' in name for name in actual)
+    assert actual == expected
+
+
+def test_temporary_files_removed_on_error(tmpdir, monkeypatch):
+    def fail(self):
+        raise ValueError('boom')
+    monkeypatch.setattr(
+        glyphsLib.builder.builders.UFOBuilder, 'to_ufo_kerning', fail)
+    master_dir = os.path.join(str(tmpdir), 'masters')
+    with pytest.raises(ValueError):
+        glyphsLib.build_masters(
+            os.path.join(DATA, 'GlyphsUnitTestSans.glyphs'), master_dir,
+            stream=True)
+    assert os.listdir(master_dir) == []
@@ -144,7 +144,6 @@ def test_groups():
     ufo.groups['public.kern2.hebrewLikeO'] = ['samekh-hb']
     groups_dict = dict(ufo.groups)
 
-    # TODO: (jany) add a test with 2 UFOs with conflicting data
     # TODO: (jany) add a test with with both UFO groups and feature file classes
     # TODO: (jany) add a test with UFO groups that conflict with feature file classes
     font = to_glyphs([ufo], minimize_ufo_diffs=True)
@@ -186,6 +185,29 @@ def test_groups():
     assert dict(ufo.groups) == groups_dict
 
 
+def test_groups_compared_between_ufos(caplog):
+    ufos = []
+    for style, members in (('Regular', ['o', 'e']), ('Bold', ['e', 'o']),
+                           ('Black', ['o'])):
+        ufo = defcon.Font()
+        ufo.info.styleName = style
+        for name in ('T', 'o', 'e'):
+            ufo.newGlyph(name)
+        ufo.groups['public.kern1.T'] = ['T']
+        ufo.groups['public.kern2.oe'] = members
+        ufos.append(ufo)
+
+    # The order of the glyphs in a group does not matter
+    to_glyphs(ufos[:2])
+    assert 'reference for groups' not in caplog.text
+
+    font = to_glyphs(ufos)
+    assert 'reference for groups' in caplog.text
+    assert 'group `public.kern2.oe` from `Black`' in caplog.text
+    assert 'public.kern1.T` from' not in caplog.text
+    assert font.glyphs['e'].leftKerningGroup == 'oe'
+
+
 def test_guidelines():
     ufo = defcon.Font()
     a = ufo.newGlyph('a')
@@ -535,3 +557,47 @@ def test_custom_stylemap_style_name():
     ufo, = to_ufos(font)
 
     assert ufo.info.styleMapStyleName == 'bold'
+
+
+def test_layers_found_by_master_and_name():
+    from glyphsLib.builder.builders import GlyphsBuilder
+    from glyphsLib.builder.layers import _find_layer
+    from glyphsLib.testing import synth
+
+    def find_layer(glyph, master_id, name):
+        # The layer that the index replaces the search for
+        return next((layer for layer in glyph.layers
+                     if layer.associatedMasterId == master_id and
+                     layer.name == name), None)
+
+    def layer_keys(font):
+        # The layers with the same name share one UFO layer, and its id
+        return {glyph.name: sorted(
+            (layer.associatedMasterId, layer.name, layer.width)
+            for layer in glyph.layers) for glyph in font.glyphs}
+
+    font = synth.make_font(glyphs=12, masters=3, brace_layers=4,
+                           bracket_layers=3, seed=7)
+    designspace = to_designspace(font, minimize_glyphs_diffs=True)
+    builder = GlyphsBuilder(designspace=designspace, minimize_ufo_diffs=True)
+    new_font = builder.font
+    assert layer_keys(new_font) == layer_keys(font)
+
+    for glyph in new_font.glyphs:
+        for layer in glyph.layers:
+            key = (layer.associatedMasterId, layer.name)
+            assert _find_layer(builder, glyph, *key) is layer
+            assert find_layer(glyph, *key) is layer
+        assert _find_layer(builder, glyph, 'unknown', None) is None
+
+    glyph = next(glyph for glyph in new_font.glyphs if len(glyph.layers) > 3)
+    layer = glyph.layers[len(glyph.layers) - 1]
+    master_id, old_name = layer.associatedMasterId, layer.name
+    layer.name = 'Renamed'
+    assert _find_layer(builder, glyph, master_id, 'Renamed') is layer
+    assert _find_layer(builder, glyph, master_id, old_name) is None
+    master_layer = glyph.layers[0]
+    layer.associatedMasterId = master_layer.layerId
+    assert _find_layer(builder, glyph, master_id, 'Renamed') is None
+    assert _find_layer(builder, glyph, master_layer.layerId,
+                       'Renamed') is layer
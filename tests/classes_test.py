@@ -24,14 +24,15 @@ import datetime
 import copy
 import unittest
 import pytest
-from fontTools.misc.py23 import unicode
+from fontTools.misc.py23 import unicode, open
 
+import glyphsLib
 from glyphsLib.classes import (
     GSFont, GSFontMaster, GSInstance, GSCustomParameter, GSGlyph, GSLayer,
     GSAnchor, GSComponent, GSAlignmentZone, GSClass, GSFeature, GSAnnotation,
     GSFeaturePrefix, GSGuideLine, GSHint, GSNode, GSSmartComponentAxis,
-    GSBackgroundImage, LayerComponentsProxy, LayerGuideLinesProxy,
-    STEM, TEXT, ARROW, CIRCLE, PLUS, MINUS
+    GSBackgroundImage, GSKerning, LayerComponentsProxy,
+    LayerGuideLinesProxy, STEM, TEXT, ARROW, CIRCLE, PLUS, MINUS
 )
 from glyphsLib.types import Point, Transform, Rect, Size
 
@@ -155,6 +156,144 @@ class GSFontTest(unittest.TestCase):
         self.assertEqual(master.font, font)
 
 
+class GSComponentGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.font = generate_minimal_font()
+        for name in ('A', 'acutecomb', 'Aacute', 'Aacute.sc', 'loop1',
+                     'loop2'):
+            add_glyph(self.font, name)
+        identity = (1, 0, 0, 1, 0, 0)
+        add_component(self.font, 'Aacute', 'A', identity)
+        add_component(self.font, 'Aacute', 'acutecomb', identity)
+        add_component(self.font, 'Aacute.sc', 'Aacute', identity)
+        add_component(self.font, 'Aacute.sc', 'missing', identity)
+        add_component(self.font, 'loop1', 'loop2', identity)
+        add_component(self.font, 'loop2', 'loop1', identity)
+
+    def test_edges(self):
+        graph = self.font.componentGraph
+        self.assertEqual(graph.components('Aacute'), ['A', 'acutecomb'])
+        self.assertEqual(graph.components('Aacute.sc'), ['Aacute', 'missing'])
+        self.assertEqual(graph.usedBy('A'), ['Aacute'])
+        self.assertEqual(graph.usedBy('missing'), ['Aacute.sc'])
+        self.assertEqual(graph.usedBy('Aacute.sc'), [])
+
+    def test_closure(self):
+        graph = self.font.componentGraph
+        self.assertEqual(graph.componentClosure(['Aacute.sc']),
+                         {'Aacute.sc', 'Aacute', 'A', 'acutecomb'})
+        self.assertEqual(graph.usedByClosure(['acutecomb']),
+                         {'acutecomb', 'Aacute', 'Aacute.sc'})
+
+    def test_topological_order_and_cycles(self):
+        graph = self.font.componentGraph
+        order = graph.topologicalOrder()
+        self.assertEqual(sorted(order), sorted(g.name for g in self.font.glyphs))
+        self.assertLess(order.index('A'), order.index('Aacute'))
+        self.assertLess(order.index('Aacute'), order.index('Aacute.sc'))
+        self.assertEqual(order[-2:], ['loop1', 'loop2'])
+        self.assertEqual(graph.cycles(), [['loop1', 'loop2']])
+
+    def test_updated_by_proxy_mutations(self):
+        graph = self.font.componentGraph
+        layer = self.font.glyphs['Aacute'].layers[0]
+        del layer.components[1]
+        self.assertEqual(graph.components('Aacute'), ['A'])
+        self.assertEqual(graph.usedBy('acutecomb'), [])
+        layer.components.append(GSComponent('acutecomb'))
+        self.assertEqual(graph.usedBy('acutecomb'), ['Aacute'])
+        layer.components = []
+        self.assertEqual(graph.components('Aacute'), [])
+        self.assertIs(self.font.componentGraph, graph)
+
+        add_glyph(self.font, 'B')
+        self.assertIsNot(self.font.componentGraph, graph)
+        self.assertIn('B', self.font.componentGraph)
+
+
+class GSKerningTest(unittest.TestCase):
+    def test_load_compact(self):
+        with open(TESTFILE_PATH, encoding='utf-8') as fp:
+            text = fp.read()
+        font = glyphsLib.loads(text)
+        compact = glyphsLib.loads(text, compact_kerning=True)
+        self.assertFalse(font.compactKerning)
+        self.assertIsInstance(compact.kerning, GSKerning)
+        self.assertEqual(compact.kerning, font.kerning)
+        self.assertEqual(glyphsLib.dumps(compact), glyphsLib.dumps(font))
+
+    def test_pair_methods(self):
+        font = generate_minimal_font()
+        font.compactKerning = True
+        font.setKerningForPair('id', '@MMK_L_A', 'V', -40)
+        font.setKerningForPair('id', '@MMK_L_A', 'W', -30)
+        font.setKerningForPair('id', 'T', 'o', -60)
+        self.assertEqual(font.kerningForPair('id', '@MMK_L_A', 'V'), -40)
+        self.assertEqual(font.kerningForPair('id', 'T', 'V'),
+                         GSFont.EMPTY_KERNING_VALUE)
+        self.assertEqual(font.kerning, {'id': {
+            '@MMK_L_A': {'V': -40, 'W': -30},
+            'T': {'o': -60},
+        }})
+
+        font.removeKerningForPair('id', '@MMK_L_A', 'V')
+        font.removeKerningForPair('id', 'T', 'o')
+        self.assertEqual(list(font.kerning['id']), ['@MMK_L_A'])
+        font.removeKerningForPair('id', '@MMK_L_A', 'W')
+        self.assertEqual(dict(font.kerning), {})
+
+    def test_views(self):
+        font = generate_minimal_font()
+        font.kerning = {'id': {'A': {'V': -40}}}
+        font.compactKerning = True
+        master = font.kerning['id']
+        master['T'] = {'o': -60, 'a': -50}
+        master['A']['W'] = -30
+        del master['T']['o']
+        self.assertEqual(list(master), ['A', 'T'])
+        self.assertEqual(list(master['A'].items()), [('V', -40), ('W', -30)])
+        del master['A']
+        self.assertNotIn('A', master)
+        self.assertEqual(master, {'T': {'a': -50}})
+
+        font.compactKerning = False
+        self.assertIsInstance(font.kerning, dict)
+        self.assertEqual(font.kerning, {'id': {'T': {'a': -50}}})
+
+    def test_delete_to_empty(self):
+        font = generate_minimal_font()
+        # Written without its microseconds, which could not be read back
+        font.date = datetime.datetime(2018, 1, 1)
+        font.kerning = {'id': {'A': {'V': -40}, 'T': {'o': -60}}}
+        text = glyphsLib.dumps(font)
+        plain = glyphsLib.loads(text)
+        font = glyphsLib.loads(text, compact_kerning=True)
+        master = font.kerning['id']
+
+        # Emptied entries are removed, like removeKerningForPair does
+        del master['A']['V']
+        plain.removeKerningForPair('id', 'A', 'V')
+        self.assertNotIn('A', master)
+        self.assertEqual(glyphsLib.dumps(font), glyphsLib.dumps(plain))
+        master['T'] = {}
+        plain.removeKerningForPair('id', 'T', 'o')
+        self.assertNotIn('id', font.kerning)
+        self.assertEqual(glyphsLib.dumps(font), glyphsLib.dumps(plain))
+        self.assertEqual(
+            glyphsLib.loads(glyphsLib.dumps(font)).kerning, {})
+
+        # The view still works on the removed master
+        self.assertEqual(len(master), 0)
+        master['T'] = {'o': -60}
+        self.assertEqual(font.kerning, {'id': {'T': {'o': -60}}})
+        del master['T']
+        self.assertNotIn('id', font.kerning)
+        font.kerning['id'] = {}
+        self.assertNotIn('id', font.kerning)
+        with self.assertRaises(KeyError):
+            del master['T']
+
+
 class GSObjectsTestCase(unittest.TestCase):
 
     def setUp(self):
@@ -248,6 +387,25 @@ class GSFontFromFileTest(GSObjectsTestCase):
         font.masters.remove(font.masters[0])
         self.assertEqual(amount, len(font.masters))
 
+    def test_masterForId(self):
+        font = self.font
+        for master in font.masters:
+            self.assertIs(font.masterForId(master.id), master)
+            self.assertIs(font.masters[master.id], master)
+        self.assertIsNone(font.masterForId('missing'))
+
+        new_master = GSFontMaster()
+        font.masters.insert(0, new_master)
+        self.assertIs(font.masterForId(new_master.id), new_master)
+
+        old_id = new_master.id
+        new_master.id = 'renamed'
+        self.assertIsNone(font.masterForId(old_id))
+        self.assertIs(font.masters['renamed'], new_master)
+
+        font.masters.remove(new_master)
+        self.assertIsNone(font.masterForId('renamed'))
+
     def test_instances(self):
         font = self.font
         amount = len(font.instances)
@@ -446,6 +604,43 @@ class GSFontFromFileTest(GSObjectsTestCase):
         self.assertEqual(amount, len(list(font.customParameters)))
         del font.customParameters['trademark']
 
+    def test_customParameters_duplicate_names(self):
+        params = GSFont().customParameters
+        first = GSCustomParameter('Filter', 'a')
+        second = GSCustomParameter('Filter', 'b')
+        params.extend([first, GSCustomParameter('other', 'c'), second])
+        self.assertEqual(params['Filter'], 'a')
+        self.assertEqual(params._get_parameters_by_key('Filter'),
+                         [first, second])
+
+        first.name = 'renamed'
+        self.assertEqual(params['Filter'], 'b')
+        self.assertEqual(params['renamed'], 'a')
+
+        params.values().append(GSCustomParameter('direct', 'd'))
+        self.assertEqual(params['direct'], 'd')
+        # Changes to the list that keep its length
+        params.values()[-1] = GSCustomParameter('replaced', 'r')
+        self.assertNotIn('direct', params)
+        self.assertEqual(params['replaced'], 'r')
+        params.values()[-1] = GSCustomParameter('direct', 'd')
+        params.values().reverse()
+        self.assertEqual(params['Filter'], 'b')
+        self.assertEqual(params._get_parameters_by_key('renamed')[0], first)
+        second.name = 'renamed'
+        self.assertEqual(params['renamed'], 'b')
+        params.values().reverse()
+        self.assertEqual(params['renamed'], 'a')
+        second.name = 'Filter'
+
+        params.append(GSCustomParameter('Filter', 'e'))
+        self.assertEqual(params._get_parameters_by_key('Filter'),
+                         [second, params[-1]])
+        del params['Filter']
+        self.assertNotIn('Filter', params)
+        self.assertEqual([p.name for p in params],
+                         ['renamed', 'other', 'direct'])
+
     # TODO: selection, selectedLayers, currentText, tabs, currentTab
 
     # TODO: selectedFontMaster, masterIndex
@@ -871,6 +1066,27 @@ class GSGlyphFromFileTest(GSObjectsTestCase):
         self.assertNotEqual([l.layerId for l in glyph.layers],
                             [l.layerId for l in glyph.layers.values()])
 
+    def test_layers_order_follows_changes(self):
+        glyph = self.glyph
+        masters = list(self.font.masters)
+        self.assertEqual([l.layerId for l in glyph.layers][:3],
+                         [m.id for m in masters])
+        self.assertIs(glyph.layers[1], glyph.layers[masters[1].id])
+
+        # Reordering the masters reorders the master layers
+        self.font.masters = list(reversed(masters))
+        self.assertEqual([l.layerId for l in glyph.layers][:3],
+                         [m.id for m in reversed(masters)])
+        self.assertIs(glyph.layers[0], glyph.layers[masters[2].id])
+
+        # A layer that is no longer associated with its master moves after
+        # the master layers
+        layer = glyph.layers[masters[2].id]
+        layer.associatedMasterId = masters[0].id
+        self.assertEqual([l.layerId for l in glyph.layers][:2],
+                         [masters[1].id, masters[0].id])
+        self.assertIn(layer, list(glyph.layers)[2:])
+
     def test_name(self):
         glyph = self.glyph
         self.assertIsInstance(glyph.name, unicode)
@@ -1511,6 +1727,19 @@ class GSNodeFromFileTest(GSObjectsTestCase):
         self.assertEqual(self.path.nodes[0].index, 0)
         self.assertEqual(self.path.nodes[-1].index, 43)
 
+    def test_index_after_mutation(self):
+        node = self.path.nodes[3]
+        self.assertEqual(node.index, 3)
+        self.path.nodes.insert(0, GSNode(Point("{20, 20}")))
+        self.assertEqual(node.index, 4)
+        self.assertEqual(node._indices(), Point(0, 4))
+        node.makeNodeFirst()
+        self.assertEqual(node.index, 0)
+        self.assertEqual(node.prevNode, self.path.nodes[-1])
+        self.path.nodes.remove(node)
+        with self.assertRaises(ValueError):
+            node.index
+
     def test_nextNode(self):
         self.assertEqual(type(self.path.nodes[-1].nextNode), GSNode)
         self.assertEqual(self.path.nodes[-1].nextNode, self.path.nodes[0])
@@ -0,0 +1,168 @@
+# coding=UTF-8
+#
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import io
+import json
+import os
+
+import pytest
+
+import glyphsLib
+import glyphsLib.cli
+from glyphsLib.diffing import Change, diff_values
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+BOLD = 'BFFFD157-90D3-4B85-B99D-9A2F366F03CA'
+LIGHT = 'C4872ECA-A3A9-40AB-960A-1DB2202F16DE'
+
+
+@pytest.fixture(scope='module')
+def text():
+    path = os.path.join(DATA, 'GlyphsUnitTestSans.glyphs')
+    with io.open(path, encoding='utf-8') as fp:
+        return fp.read()
+
+
+def diff_texts(old, new):
+    return glyphsLib.diff(io.StringIO(old), io.StringIO(new))
+
+
+def edited(text, *replacements):
+    for old, new in zip(replacements[::2], replacements[1::2]):
+        assert old in text
+        text = text.replace(old, new, 1)
+    return text
+
+
+def test_same(text):
+    assert diff_texts(text, text) == []
+    # Different text, same data
+    assert diff_texts(text, edited(text, 'familyName = "', 'familyName =  "')
+                      ) == []
+
+
+def test_glyph_changes(text):
+    new = edited(
+        text,
+        '"555 700 LINE"', '"556 700 LINE"',
+        'leftKerningGroup = A;', 'leftKerningGroup = Alpha;',
+        'unicode = 0041;', 'unicode = 0391;')
+    assert diff_texts(text, new) == [
+        Change('changed', ('glyphs', 'A', 'layers', BOLD, 'paths', 0,
+                           'nodes', 0), '555 700 LINE', '556 700 LINE'),
+        Change('changed', ('glyphs', 'A', 'leftKerningGroup'), 'A', 'Alpha'),
+        Change('changed', ('glyphs', 'A', 'unicode'), '0041', '0391'),
+    ]
+
+
+def test_anchors_by_name(text):
+    new = edited(
+        text,
+        '{\nname = bottom;\nposition = "{377, 0}";\n},\n', '',
+        'name = top;\nposition = "{377, 700}";',
+        'name = top;\nposition = "{377, 710}";')
+    changes = diff_texts(text, new)
+    anchors = ('glyphs', 'A', 'layers', BOLD, 'anchors')
+    assert [change[:2] for change in changes] == [
+        ('removed', anchors + ('bottom',)),
+        ('changed', anchors + ('top', 'position')),
+    ]
+    assert changes[0].old['position'] == '{377, 0}'
+    assert changes[1][2:] == ('{377, 700}', '{377, 710}')
+
+
+def test_added_removed_reordered_glyphs(text):
+    new = edited(
+        text,
+        '{\nglyphname = A;', '{\nglyphname = A.alt;\nlayers = (\n);\n},\n'
+                            '{\nglyphname = A;')
+    changes = diff_texts(text, new)
+    assert changes == [Change('added', ('glyphs', 'A.alt'), None,
+                              {'glyphname': 'A.alt', 'layers': []})]
+    assert diff_texts(new, text) == [
+        Change('removed', ('glyphs', 'A.alt'), changes[0].new, None)]
+
+    font = glyphsLib.loads(text)
+    font.glyphs = list(reversed(font.glyphs))
+    assert glyphsLib.diff(glyphsLib.loads(text), font) == [
+        Change('reordered', ('glyphs',), None, None)]
+
+
+def test_font_changes(text):
+    font = glyphsLib.loads(text)
+    font.customParameters['note'] = 'Other'
+    font.kerning[LIGHT]['@MMK_L_A']['@MMK_R_J'] = -35
+    font.features[0].code = 'feature smcp;\n'
+    font.masters[0].xHeight = 501
+    changes = glyphsLib.diff(glyphsLib.loads(text), font)
+    master_id = font.masters[0].id
+    assert changes == [
+        Change('changed', ('customParameters', 'note', 'value'),
+               'Bla bla', 'Other'),
+        Change('changed', ('features', 'aalt', 'code'),
+               'feature c2sc;\nfeature smcp;\n', 'feature smcp;\n'),
+        Change('changed', ('fontMaster', master_id, 'xHeight'),
+               '470', '501'),
+        Change('changed', ('kerning', LIGHT, '@MMK_L_A', '@MMK_R_J'),
+               '-30', '-35'),
+    ]
+
+
+def test_diff_paths(tmpdir, text):
+    path = os.path.join(str(tmpdir), 'new.glyphs')
+    with io.open(path, 'w', encoding='utf-8') as fp:
+        fp.write(edited(text, '"555 700 LINE"', '"556 700 LINE"'))
+    assert len(glyphsLib.diff(
+        os.path.join(DATA, 'GlyphsUnitTestSans.glyphs'), path)) == 1
+
+
+def test_diff_lists():
+    old = ['a', 'b', 'c', 'd']
+    new = ['a', 'x', 'c', 'y', 'z', 'd']
+    assert list(diff_values(('list',), old, new)) == [
+        Change('changed', ('list', 1), 'b', 'x'),
+        Change('added', ('list', 3), None, 'y'),
+        Change('added', ('list', 4), None, 'z'),
+    ]
+    # Several items with the same key are matched by position
+    old = [{'name': 'a', 'x': '1'}, {'name': 'a', 'x': '2'}]
+    new = [{'name': 'a', 'x': '1'}, {'name': 'a', 'x': '3'}]
+    assert list(diff_values(('anchors',), old, new)) == [
+        Change('changed', ('anchors', 1, 'x'), '2', '3')]
+
+
+def test_cli(tmpdir, text, capsys):
+    old = os.path.join(DATA, 'GlyphsUnitTestSans.glyphs')
+    new = os.path.join(str(tmpdir), 'new.glyphs')
+    with io.open(new, 'w', encoding='utf-8') as fp:
+        fp.write(edited(text, 'leftKerningGroup = A;',
+                        'leftKerningGroup = Alpha;'))
+
+    assert glyphsLib.cli.main(['diff', old, old]) == 0
+    assert capsys.readouterr().out == ''
+
+    assert glyphsLib.cli.main(['diff', old, new]) == 1
+    assert capsys.readouterr().out == (
+        '~ glyphs/A/leftKerningGroup: A -> Alpha\n')
+
+    assert glyphsLib.cli.main(['diff', '--json', old, new]) == 1
+    change = json.loads(capsys.readouterr().out)
+    assert change == {'kind': 'changed',
+                      'path': ['glyphs', 'A', 'leftKerningGroup'],
+                      'old': 'A', 'new': 'Alpha'}
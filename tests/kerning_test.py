@@ -0,0 +1,98 @@
+# coding=UTF-8
+#
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import unittest
+
+from glyphsLib.classes import GSFont, GSFontMaster, GSGlyph
+from glyphsLib.kerning import flatten, KerningFlattener
+
+
+def make_font():
+    font = GSFont()
+    for name, weight in (('Light', 100), ('Bold', 200)):
+        master = GSFontMaster()
+        master.id = name
+        master.name = name
+        master.weightValue = weight
+        font.masters.append(master)
+    for name, group in (('A', 'A'), ('Aacute', 'A'), ('V', 'V'),
+                        ('W', 'V'), ('T', None)):
+        glyph = GSGlyph(name)
+        glyph.leftKerningGroup = group
+        glyph.rightKerningGroup = group
+        font.glyphs.append(glyph)
+    font.kerning = {
+        'Light': {
+            '@MMK_L_A': {'@MMK_R_V': -40, 'T': -20},
+            'Aacute': {'@MMK_R_V': -10},
+            'A': {'W': -30},
+        },
+        'Bold': {
+            '@MMK_L_A': {'@MMK_R_V': -80},
+            'T': {'@MMK_R_V': 20},
+        },
+    }
+    return font
+
+
+class FlattenTest(unittest.TestCase):
+
+    def test_masters(self):
+        font = make_font()
+        light = flatten(font, {'Weight': 100})
+        self.assertEqual(light, {
+            ('A', 'V'): -40,
+            ('A', 'W'): -30,
+            ('Aacute', 'V'): -10,
+            ('Aacute', 'W'): -10,
+            ('A', 'T'): -20,
+            ('Aacute', 'T'): -20,
+            ('T', 'V'): 0,
+            ('T', 'W'): 0,
+        })
+        bold = flatten(font, {'wght': 200})
+        self.assertEqual(bold[('A', 'V')], -80)
+        self.assertEqual(bold[('T', 'W')], 20)
+        # The exceptions of the other master are still there, with the
+        # class value that they override in that master
+        self.assertEqual(bold[('A', 'T')], 0)
+        self.assertEqual(bold[('Aacute', 'V')], -80)
+        self.assertEqual(bold[('A', 'W')], -80)
+
+    def test_interpolation(self):
+        flattener = KerningFlattener(make_font())
+        self.assertEqual(flattener.master_weights({'Weight': 125}),
+                         [0.75, 0.25])
+        middle = flattener.flatten({'Weight': 150})
+        self.assertEqual(middle[('A', 'V')], -60)
+        self.assertEqual(middle[('A', 'W')], -55)
+        self.assertEqual(middle[('T', 'V')], 10)
+        # Missing axes are at the regular master, outside is clamped
+        self.assertEqual(flattener.flatten({}), flattener.flatten(
+            {'Weight': 100}))
+        self.assertEqual(flattener.flatten({'Weight': 300}),
+                         flattener.flatten({'Weight': 200}))
+
+    def test_unknown_axis(self):
+        with self.assertRaises(ValueError):
+            flatten(make_font(), {'Slant': 10})
+
+
+if __name__ == '__main__':
+    unittest.main()
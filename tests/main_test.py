@@ -54,6 +54,53 @@ def test_glyphs_main_masters(tmpdir):
     assert os.path.isfile(glyphs_file)
 
 
+def test_glyphs2ufo_profile(tmpdir):
+    import json
+
+    filename = os.path.join(
+        os.path.dirname(__file__), 'data/GlyphsUnitTestSans.glyphs')
+    master_dir = os.path.join(str(tmpdir), 'master_ufos')
+    profile_path = os.path.join(str(tmpdir), 'profile.json')
+
+    glyphsLib.cli.main([
+        "glyphs2ufo", filename, '-m', master_dir, '--no-normalize-ufo',
+        '--profile', profile_path
+    ])
+
+    with open(profile_path) as fp:
+        profile = json.load(fp)
+    stages = profile['stages']
+    assert stages['parse']['calls'] == 1
+    assert len(stages['ufo.glyph']['masters']) == 3
+    assert len(stages['save']['masters']) == 3
+    assert profile['counters']['ufo.glyphs']['total'] > 0
+
+
+def test_glyphs2ufo_stream(tmpdir):
+    filename = os.path.join(
+        os.path.dirname(__file__), 'data/GlyphsUnitTestSans.glyphs')
+    master_dir = os.path.join(str(tmpdir), 'master_ufos')
+
+    glyphsLib.cli.main(["glyphs2ufo", filename, '-m', master_dir, '--stream'])
+
+    assert len(glob.glob(master_dir + '/*.ufo')) == 3
+    assert not glob.glob(master_dir + '/*.tmp')
+    assert glob.glob(master_dir + '/*.ufo/glyphs/A_.glif')
+
+
+def test_glyphs2ufo_watch_conflicts(tmpdir, capsys):
+    filename = os.path.join(
+        os.path.dirname(__file__), 'data/GlyphsUnitTestSans.glyphs')
+    master_dir = os.path.join(str(tmpdir), 'master_ufos')
+
+    for option in (['--subset', 'A'], ['--stream']):
+        assert glyphsLib.cli.main(
+            ["glyphs2ufo", filename, '-m', master_dir, '--watch'] +
+            option) == 2
+        assert '--watch cannot be used' in capsys.readouterr().err
+    assert not os.path.exists(master_dir)
+
+
 def test_parser_main(capsys):
     """This is both a test for the "main" functionality of glyphsLib.parser
     and for the round-trip of GlyphsUnitTestSans.glyphs.
@@ -0,0 +1,189 @@
+# coding=UTF-8
+#
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import io
+import os
+import sys
+
+import pytest
+
+import glyphsLib
+import glyphsLib.cli
+from glyphsLib.merging import MergeConflict, parse_raw, write_raw
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+BOLD = 'BFFFD157-90D3-4B85-B99D-9A2F366F03CA'
+LIGHT = 'C4872ECA-A3A9-40AB-960A-1DB2202F16DE'
+
+
+@pytest.fixture(scope='module')
+def text():
+    path = os.path.join(DATA, 'GlyphsUnitTestSans.glyphs')
+    with io.open(path, encoding='utf-8') as fp:
+        return fp.read()
+
+
+def merge_texts(base, ours, theirs):
+    return glyphsLib.merge(io.StringIO(base), io.StringIO(ours),
+                           io.StringIO(theirs))
+
+
+def edited(text, *replacements):
+    for old, new in zip(replacements[::2], replacements[1::2]):
+        assert old in text
+        text = text.replace(old, new, 1)
+    return text
+
+
+# Edits of the same glyph on different lines, and of the font
+OUR_EDITS = (
+    '"555 700 LINE"', '"556 700 LINE"',
+    'familyName = "Glyphs Unit Test Sans";', 'familyName = "Ours";',
+)
+THEIR_EDITS = (
+    '"191 700 LINE"', '"192 700 LINE"',
+    'leftKerningGroup = A;', 'leftKerningGroup = Alpha;',
+    '"@MMK_R_J" = -30;', '"@MMK_R_J" = -35;',
+    'value = "Bla bla";', 'value = "Theirs";',
+)
+
+
+@pytest.mark.parametrize('filename', [
+    'GlyphsUnitTestSans.glyphs', 'MontserratStrippedDown.glyphs'])
+def test_write_raw(filename):
+    with io.open(os.path.join(DATA, filename), encoding='utf-8') as fp:
+        text = fp.read()
+    assert write_raw(parse_raw(text)) + '\n' == text
+
+
+def test_merge(text):
+    assert merge_texts(text, text, text) == (text, [])
+
+    ours = edited(text, *OUR_EDITS)
+    theirs = edited(text, *THEIR_EDITS)
+    expected = edited(ours, *THEIR_EDITS)
+    assert merge_texts(text, ours, theirs) == (expected, [])
+    assert merge_texts(text, theirs, ours) == (expected, [])
+    # Only one side changed
+    assert merge_texts(text, ours, text) == (ours, [])
+    assert merge_texts(text, text, theirs) == (theirs, [])
+
+
+def test_merge_fonts(text):
+    base = glyphsLib.loads(text)
+    ours = glyphsLib.loads(text)
+    ours.glyphs['A'].layers[BOLD].width = 600
+    theirs = glyphsLib.loads(text)
+    theirs.glyphs['A'].layers[LIGHT].width = 500
+    merged = glyphsLib.loads(glyphsLib.merge(base, ours, theirs).text)
+    assert merged.glyphs['A'].layers[BOLD].width == 600
+    assert merged.glyphs['A'].layers[LIGHT].width == 500
+
+
+def test_conflicts(text):
+    ours = edited(text, *OUR_EDITS)
+    theirs = edited(text, '"555 700 LINE"', '"557 700 LINE"',
+                    'familyName = "Glyphs Unit Test Sans";',
+                    'familyName = "Theirs";')
+    merged, conflicts = merge_texts(text, ours, theirs)
+    # The conflicting values are left as in ours
+    assert merged == ours
+    assert conflicts == [
+        MergeConflict(('familyName',), '"Glyphs Unit Test Sans"', '"Ours"',
+                      '"Theirs"'),
+        MergeConflict(('glyphs', 'A', 'layers', BOLD, 'paths', 0, 'nodes', 0),
+                      '"555 700 LINE"', '"556 700 LINE"', '"557 700 LINE"'),
+    ]
+
+
+def without_glyph(text, name):
+    start = text.index('{\nglyphname = %s;' % name)
+    end = text.index('{\nglyphname', start + 1)
+    return text[:start] + text[end:]
+
+
+def test_added_and_removed_glyphs(text):
+    glyph = '{\nglyphname = %s;\nlayers = (\n);\n},\n{\nglyphname = A;'
+    ours = edited(text, '{\nglyphname = A;', glyph % 'A.ours')
+    # Removed on one side, unchanged on the other
+    theirs = without_glyph(
+        edited(text, '{\nglyphname = A;', glyph % 'A.theirs'), 'adieresis')
+
+    merged, conflicts = merge_texts(text, ours, theirs)
+    assert conflicts == []
+    font = glyphsLib.loads(merged)
+    names = [glyph.name for glyph in font.glyphs]
+    assert 'adieresis' not in names
+    assert names.index('A.ours') < names.index('A.theirs') < names.index('A')
+
+    # Removed on one side, changed on the other
+    ours = edited(text, 'glyphname = adieresis;\nlastChange',
+                  'glyphname = adieresis;\nnote = x;\nlastChange')
+    theirs = without_glyph(text, 'adieresis')
+    merged, conflicts = merge_texts(text, ours, theirs)
+    assert merged == ours
+    assert [conflict.path for conflict in conflicts] == [
+        ('glyphs', 'adieresis')]
+    assert conflicts[0].theirs is None
+
+
+def test_reordered_glyphs(text):
+    font = glyphsLib.loads(text)
+    font.glyphs = list(reversed(font.glyphs))
+    theirs = glyphsLib.dumps(font)
+    ours = edited(text, *OUR_EDITS)
+    merged, conflicts = merge_texts(text, ours, theirs)
+    assert conflicts == []
+    assert merged == edited(theirs, *OUR_EDITS)
+
+
+def test_cli(tmpdir, text, capsys):
+    base = os.path.join(str(tmpdir), 'base.glyphs')
+    ours = os.path.join(str(tmpdir), 'ours.glyphs')
+    theirs = os.path.join(str(tmpdir), 'theirs.glyphs')
+    for path, version in ((base, text), (ours, edited(text, *OUR_EDITS)),
+                          (theirs, edited(text, *THEIR_EDITS))):
+        with io.open(path, 'w', encoding='utf-8') as fp:
+            fp.write(version)
+
+    assert glyphsLib.cli.main(['merge', base, ours, theirs]) == 0
+    expected = edited(text, *(OUR_EDITS + THEIR_EDITS))
+    assert capsys.readouterr().out == expected
+
+    # As a git merge driver, writing to ours
+    argv = sys.argv
+    sys.argv = ['glyphs-merge-driver', base, ours, theirs]
+    try:
+        assert glyphsLib.cli._merge_driver_entry_point() == 0
+    finally:
+        sys.argv = argv
+    with io.open(ours, encoding='utf-8') as fp:
+        assert fp.read() == expected
+
+    with io.open(theirs, 'w', encoding='utf-8') as fp:
+        fp.write(edited(text, 'familyName = "Glyphs Unit Test Sans";',
+                        'familyName = "Theirs";'))
+    output = os.path.join(str(tmpdir), 'merged.glyphs')
+    assert glyphsLib.cli.main(
+        ['merge', base, ours, theirs, '-o', output]) == 1
+    assert capsys.readouterr().err == (
+        'Conflict in familyName: base "Glyphs Unit Test Sans", '
+        'ours "Ours", theirs "Theirs"\n')
+    with io.open(output, encoding='utf-8') as fp:
+        assert fp.read() == expected
@@ -22,7 +22,7 @@ from collections import OrderedDict
 import unittest
 import datetime
 
-from glyphsLib.parser import Parser
+from glyphsLib.parser import Parser, parse_glyph, scan_glyphs, split_glyphs
 from glyphsLib.classes import GSGlyph
 
 GLYPH_DATA = '''\
@@ -196,5 +196,60 @@ class ParserGlyphTest(unittest.TestCase):
         self.assertEqual(glyph.unicode, "0041")
 
 
+FONT_DATA = '''\
+{
+note = "{\nglyphs = (";
+glyphs = (
+{
+glyphname = A;
+note = "} ) {";
+layers = (
+{
+layerId = m01;
+}
+);
+},
+{
+glyphname = "a.sc";
+}
+);
+userData = {
+glyphs = ();
+};
+}
+'''
+
+
+class SplitGlyphsTest(unittest.TestCase):
+    def test_split_glyphs(self):
+        spans = split_glyphs(FONT_DATA)
+        self.assertEqual(FONT_DATA[spans.list_start:spans.list_end],
+                         FONT_DATA[FONT_DATA.index('(\n{') + 1:
+                                   FONT_DATA.index(');\nuserData')])
+        self.assertEqual([span.name for span in spans.glyphs], ['A', 'a.sc'])
+        first, second = spans.glyphs
+        self.assertTrue(FONT_DATA[first.start:].startswith('{\nglyphname = A'))
+        self.assertEqual(FONT_DATA[second.start:second.end],
+                         '{\nglyphname = "a.sc";\n}')
+
+        glyph = parse_glyph(FONT_DATA[first.start:first.end])
+        self.assertIsInstance(glyph, GSGlyph)
+        self.assertEqual(glyph.name, 'A')
+        self.assertEqual(glyph.note, '} ) {')
+        self.assertEqual(len(glyph.layers.values()), 1)
+
+    def test_scan_glyphs(self):
+        spans = split_glyphs(FONT_DATA)
+        first, second = spans.glyphs
+        self.assertEqual(scan_glyphs(FONT_DATA, first.end + 1),
+                         ([second], spans.list_end))
+        self.assertEqual(scan_glyphs(FONT_DATA, first.start, first.end),
+                         ([first], first.end))
+
+    def test_no_glyphs(self):
+        with self.assertRaises(ValueError):
+            split_glyphs('{\nuserData = {\nglyphs = ();\n};\n}')
+
+
 if __name__ == '__main__':
     unittest.main()
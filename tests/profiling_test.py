@@ -0,0 +1,90 @@
+# coding=UTF-8
+#
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import json
+import os
+
+import pytest
+
+from glyphsLib import dumps, loads, profiling, to_designspace, to_glyphs
+from glyphsLib.testing.synth import make_font
+
+
+def test_disabled():
+    assert not profiling.active()
+    assert profiling.stage('anything') is profiling.stage('other')
+    profiling.count('anything')
+
+
+def test_stages_and_counters():
+    font = make_font(glyphs=8, masters=2, kerning=1, seed=1)
+    text = dumps(font)
+    with profiling.profile() as profiler:
+        assert profiling.active()
+        designspace = to_designspace(loads(text))
+        to_glyphs(designspace)
+    assert not profiling.active()
+
+    data = profiler.as_dict()
+    stages = data['stages']
+    for name in ('parse', 'ufo.font_attributes', 'ufo.glyph',
+                 'ufo.glyph.paths', 'ufo.propagate_anchors', 'ufo.features',
+                 'ufo.groups', 'ufo.kerning', 'ufo.designspace',
+                 'glyphs.glyph', 'glyphs.kerning', 'glyphs.designspace'):
+        assert stages[name]['calls'] >= 1, name
+    assert stages['parse']['calls'] == 1
+    assert stages['ufo.glyph']['calls'] == 16
+    assert stages['ufo.glyph']['masters']['master00']['calls'] == 8
+    assert stages['ufo.glyph']['seconds'] >= sum(
+        master['seconds']
+        for master in stages['ufo.glyph.paths']['masters'].values())
+
+    counters = data['counters']
+    assert counters['ufo.glyphs']['total'] == 16
+    assert counters['ufo.glyphs']['masters'] == {
+        'master00': 8, 'master01': 8}
+    # 6 simple glyphs of one contour, in 2 masters
+    assert counters['ufo.paths']['total'] == 6 * 2
+    assert counters['ufo.kerning_pairs']['total'] > 0
+    assert counters['glyphs.glyphs']['total'] == 16
+    json.dumps(data)
+
+
+def test_chrome_trace(tmpdir):
+    with profiling.profile() as profiler:
+        with profiling.stage('outer'):
+            pass
+    with pytest.raises(ValueError):
+        profiler.as_chrome_trace()
+
+    with profiling.profile(trace=True) as profiler:
+        with profiling.stage('outer', 'm1'):
+            with profiling.stage('inner', 'm1'):
+                profiling.count('things', 3, 'm1')
+    path = os.path.join(str(tmpdir), 'trace.json')
+    profiler.write_chrome_trace(path)
+    with open(path) as fp:
+        trace = json.load(fp)
+    events = trace['traceEvents']
+    assert [event['name'] for event in events] == ['outer', 'inner']
+    assert all(event['ph'] == 'X' for event in events)
+    assert events[0]['args'] == {'master': 'm1'}
+    assert events[0]['ts'] + events[0]['dur'] >= (
+        events[1]['ts'] + events[1]['dur'])
+    assert trace['otherData']['counters']['things']['total'] == 3
@@ -0,0 +1,271 @@
+# coding=UTF-8
+#
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import io
+import json
+import os
+import shutil
+import socket
+import threading
+
+import defcon
+import pytest
+
+try:
+    from http.client import HTTPConnection
+except ImportError:
+    from httplib import HTTPConnection
+
+import glyphsLib
+from glyphsLib.server import (
+    ConversionService, FontCache, RequestError, make_server)
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def read_tree(path):
+    files = {}
+    for root, _dirs, names in os.walk(path):
+        for name in names:
+            file_path = os.path.join(root, name)
+            with io.open(file_path, 'rb') as fp:
+                files[os.path.relpath(file_path, path)] = fp.read()
+    return files
+
+
+@pytest.fixture
+def glyphs_file(tmpdir):
+    path = os.path.join(str(tmpdir), 'GlyphsUnitTestSans.glyphs')
+    shutil.copy(os.path.join(DATA, 'GlyphsUnitTestSans.glyphs'), path)
+    return path
+
+
+def test_font_cache(glyphs_file):
+    cache = FontCache(max_fonts=1)
+    cached = cache.get(glyphs_file)
+    assert cache.get(glyphs_file) is cached
+    assert cache.stats['parses'] == 1
+
+    # Touched but not changed: not parsed again
+    stat = os.stat(glyphs_file)
+    os.utime(glyphs_file, (stat.st_atime, stat.st_mtime + 10))
+    assert cache.get(glyphs_file) is cached
+    assert cache.stats['parses'] == 1
+
+    font = cached.font
+    font.familyName = 'Changed'
+    font.save(glyphs_file)
+    cached = cache.get(glyphs_file)
+    assert cached.font.familyName == 'Changed'
+    assert cache.stats['parses'] == 2
+
+    other = os.path.join(DATA, 'MontserratStrippedDown.glyphs')
+    cache.get(other)
+    assert len(cache) == 1
+    cache.get(glyphs_file)
+    assert cache.stats['parses'] == 4
+
+    with pytest.raises(RequestError):
+        cache.get(glyphs_file + '.missing')
+
+
+@pytest.mark.parametrize('normalize_ufos', [False, True])
+def test_convert(tmpdir, glyphs_file, normalize_ufos):
+    expected_dir = os.path.join(str(tmpdir), 'expected')
+    glyphsLib.build_masters(glyphs_file, expected_dir,
+                            normalize_ufos=normalize_ufos)
+
+    service = ConversionService()
+    output_dir = os.path.join(str(tmpdir), 'served')
+    request = {'file': glyphs_file, 'output_dir': output_dir,
+               'normalize_ufos': normalize_ufos}
+    response = service.handle('convert', request)
+    assert response['written']
+    assert response['designspace'] == os.path.join(
+        output_dir, 'GlyphsUnitTestSans.designspace')
+    assert len(response['masters']) == 3
+    assert read_tree(output_dir) == read_tree(expected_dir)
+
+    # Nothing changed, nothing to write
+    assert not service.handle('convert', request)['written']
+    assert service.cache.stats['builds'] == 1
+
+    # The output was modified, it is written again in full
+    shutil.rmtree(response['masters'][0])
+    assert service.handle('convert', request)['written']
+    assert read_tree(output_dir) == read_tree(expected_dir)
+    assert service.cache.stats['builds'] == 1
+
+
+def test_master_and_glyph(tmpdir, glyphs_file):
+    service = ConversionService()
+    font = glyphsLib.GSFont(glyphs_file)
+    path = os.path.join(str(tmpdir), 'Bold.ufo')
+    service.handle('master', {'file': glyphs_file, 'master': 'Bold',
+                              'path': path})
+    assert defcon.Font(path).info.styleName == 'Bold'
+    # By id, and saved again to the same path
+    service.handle('master', {'file': glyphs_file,
+                              'master': font.masters[0].id, 'path': path})
+    assert defcon.Font(path).info.styleName == 'Light'
+    assert service.cache.stats['builds'] == 1
+
+    response = service.handle('glyph', {'file': glyphs_file, 'glyph': 'A'})
+    assert response['glyph'] == 'A'
+    assert [m['id'] for m in response['masters']] == [
+        master.id for master in font.masters]
+    assert all(m['glif'].startswith('<?xml') and '<contour>' in m['glif']
+               for m in response['masters'])
+
+    with pytest.raises(RequestError) as excinfo:
+        service.handle('glyph', {'file': glyphs_file, 'glyph': 'missing'})
+    assert excinfo.value.status == 404
+    with pytest.raises(RequestError) as excinfo:
+        service.handle('master', {'file': glyphs_file, 'master': 'Black',
+                                  'path': path})
+    assert excinfo.value.status == 404
+    with pytest.raises(RequestError) as excinfo:
+        service.handle('glyph', {'glyph': 'A'})
+    assert excinfo.value.status == 400
+
+
+def post(connection, path, data):
+    connection.request('POST', path, json.dumps(data),
+                       {'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    return response.status, json.loads(response.read().decode('utf-8'))
+
+
+def test_http(glyphs_file):
+    server = make_server(port=0)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        connection = HTTPConnection('127.0.0.1', server.server_address[1])
+        status, data = post(connection, '/glyph',
+                            {'file': glyphs_file, 'glyph': 'A'})
+        assert status == 200
+        assert len(data['masters']) == 3
+        assert post(connection, '/glyph', {'file': glyphs_file,
+                                           'glyph': 'missing'})[0] == 404
+        assert post(connection, '/unknown', {})[0] == 404
+        connection.request('GET', '/stats')
+        response = connection.getresponse()
+        assert response.status == 200
+        assert json.loads(response.read().decode('utf-8'))['builds'] == 1
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def test_http_errors(monkeypatch):
+    server = make_server(port=0)
+
+    def handle(path, request):
+        raise ValueError('builder failure')
+
+    monkeypatch.setattr(server.service, 'handle', handle)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        connection = HTTPConnection('127.0.0.1', server.server_address[1])
+        connection.request('POST', '/glyph', '{"file": ',
+                           {'Content-Type': 'application/json'})
+        response = connection.getresponse()
+        assert response.status == 400
+        assert 'Invalid JSON' in response.read().decode('utf-8')
+        # The errors of the conversion are not blamed on the request
+        assert post(connection, '/glyph', {}) == (
+            500, {'error': 'ValueError: builder failure'})
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+def test_http_cross_origin(tmpdir, glyphs_file):
+    server = make_server(port=0)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    port = server.server_address[1]
+    path = os.path.join(str(tmpdir), 'Master.ufo')
+    body = json.dumps({'file': glyphs_file, 'master': 'Bold', 'path': path})
+    try:
+        connection = HTTPConnection('127.0.0.1', port)
+        # What a web page can send without asking the server first
+        connection.request('POST', '/master', body,
+                           {'Content-Type': 'text/plain'})
+        response = connection.getresponse()
+        response.read()
+        assert response.status == 415
+        # A domain name pointing to 127.0.0.1
+        connection.request('POST', '/master', body,
+                           {'Content-Type': 'application/json',
+                            'Host': 'example.com:%d' % port})
+        response = connection.getresponse()
+        response.read()
+        assert response.status == 403
+        assert not os.path.exists(path)
+
+        connection.request('POST', '/master', body,
+                           {'Content-Type': 'application/json; charset=utf-8',
+                            'Host': 'localhost:%d' % port})
+        response = connection.getresponse()
+        response.read()
+        assert response.status == 200
+        assert os.path.isdir(path)
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
+
+
+class UnixHTTPConnection(HTTPConnection):
+
+    def __init__(self, path):
+        HTTPConnection.__init__(self, 'localhost')
+        self.socket_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.socket_path)
+
+
+@pytest.mark.skipif(not hasattr(socket, 'AF_UNIX'),
+                    reason='Unix sockets are not supported')
+def test_unix_socket(tmpdir, glyphs_file):
+    socket_path = os.path.join(str(tmpdir), 'glyphsLib.sock')
+    server = make_server(socket_path=socket_path)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.start()
+    try:
+        connection = UnixHTTPConnection(socket_path)
+        status, data = post(connection, '/glyph',
+                            {'file': glyphs_file, 'glyph': 'A'})
+        assert status == 200
+        assert data['glyph'] == 'A'
+        connection.close()
+    finally:
+        server.shutdown()
+        server.server_close()
+        thread.join()
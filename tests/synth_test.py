@@ -0,0 +1,87 @@
+# coding=UTF-8
+#
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import glob
+import os
+
+from glyphsLib import GSFont, dumps, loads, to_designspace
+from glyphsLib.testing import synth
+
+
+def make_font(**kwargs):
+    options = dict(glyphs=40, masters=3, brace_layers=2, bracket_layers=1,
+                   nodes=60, component_depth=3, anchors=3, classes=2,
+                   feature_lines=5, seed=7)
+    options.update(kwargs)
+    return synth.make_font(**options)
+
+
+def test_deterministic():
+    assert dumps(make_font()) == dumps(make_font())
+    assert dumps(make_font()) != dumps(make_font(seed=8))
+
+
+def test_contents():
+    font = make_font()
+    assert len(font.glyphs) == 40
+    assert len(font.masters) == len(font.instances) == 3
+
+    glyph = font.glyphs['uni4E00']
+    # 2 brace layers between the 3 masters, 1 bracket layer per master
+    assert [layer.name for layer in glyph.layers][3:] == [
+        '{300}', '{700}',
+        'Weight 100 [500]', 'Weight 500 [500]', 'Weight 900 [500]']
+    master_layer = glyph.layers['master00']
+    assert [len(path.nodes) for path in master_layer.paths] == [30, 30]
+    assert [a.name for a in master_layer.anchors] == [
+        'top', 'bottom', 'center']
+
+    # Composites go 3 levels deep
+    depth = {}
+    for glyph in font.glyphs:
+        components = glyph.layers['master00'].components
+        depth[glyph.name] = 1 + max(
+            [depth[c.name] for c in components] or [-1])
+    assert max(depth.values()) == 3
+
+
+def test_roundtrip():
+    font = make_font()
+    text = dumps(font)
+    assert dumps(loads(text)) == text
+
+    designspace = to_designspace(loads(text))
+    assert len(designspace.sources) == len(designspace.instances) == 3
+    ufo = designspace.sources[0].font
+    assert len(ufo) == 40
+    assert sorted(layer.name for layer in ufo.layers) == [
+        'Weight 100 [500]', 'public.default', '{300}']
+    assert ufo.kerning
+    assert ufo.groups
+    assert '@class0' in ufo.features.text
+
+
+def test_main(tmpdir):
+    path = os.path.join(str(tmpdir), 'Synthetic.glyphs')
+    ufo_dir = os.path.join(str(tmpdir), 'master_ufo')
+    synth.main(['-o', path, '--ufo-dir', ufo_dir, '--glyphs', '20',
+                '--masters', '2', '--seed', '1'])
+    assert len(GSFont(path).glyphs) == 20
+    assert len(glob.glob(os.path.join(ufo_dir, '*.ufo'))) == 2
+    assert glob.glob(os.path.join(ufo_dir, '*.designspace'))
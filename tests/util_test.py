@@ -19,7 +19,7 @@ from __future__ import (print_function, division, absolute_import,
 
 import unittest
 
-from glyphsLib.util import bin_to_int_list, int_list_to_bin
+from glyphsLib.util import LRUCache, bin_to_int_list, int_list_to_bin
 
 class UtilTest(unittest.TestCase):
     def test_bin_to_int_list(self):
@@ -37,3 +37,19 @@ class UtilTest(unittest.TestCase):
         self.assertEqual(int_list_to_bin([0, 1]), 3)
         self.assertEqual(int_list_to_bin([2]), 4)
         self.assertEqual(int_list_to_bin([7, 30]), (1 << 7) + (1 << 30))
+
+    def test_lru_cache(self):
+        cache = LRUCache(2)
+        cache['a'] = 1
+        cache['b'] = 2
+        self.assertEqual(cache.get('a'), 1)
+        cache['c'] = 3
+        # 'b' was the least recently used
+        self.assertEqual(cache.keys(), ['a', 'c'])
+        self.assertNotIn('b', cache)
+        self.assertIsNone(cache.get('b'))
+        with self.assertRaises(KeyError):
+            cache['b']
+        cache['a'] = 4
+        self.assertEqual(cache.keys(), ['c', 'a'])
+        self.assertEqual(len(cache), 2)
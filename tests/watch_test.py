@@ -0,0 +1,172 @@
+# coding=UTF-8
+#
+# Copyright 2018 Google Inc. All Rights Reserved.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from __future__ import (print_function, division, absolute_import,
+                        unicode_literals)
+
+import io
+import os
+import shutil
+
+import pytest
+
+import glyphsLib
+from glyphsLib.watch import GlyphsWatcher
+
+DATA = os.path.join(os.path.dirname(__file__), 'data')
+
+
+def read_tree(path):
+    files = {}
+    for root, _dirs, names in os.walk(path):
+        for name in names:
+            file_path = os.path.join(root, name)
+            with io.open(file_path, 'rb') as fp:
+                files[os.path.relpath(file_path, path)] = fp.read()
+    return files
+
+
+def edit(path, old, new):
+    with io.open(path, encoding='utf-8') as fp:
+        text = fp.read()
+    assert old in text
+    with io.open(path, 'w', encoding='utf-8') as fp:
+        fp.write(text.replace(old, new, 1))
+    # Make sure that the change is seen even on coarse file systems
+    stat = os.stat(path)
+    os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+
+
+def assert_same_as_build_masters(tmpdir, watcher):
+    expected_dir = os.path.join(str(tmpdir), 'expected')
+    if os.path.isdir(expected_dir):
+        shutil.rmtree(expected_dir)
+    glyphsLib.build_masters(
+        watcher.glyphs_file, expected_dir,
+        designspace_path=os.path.join(
+            expected_dir, os.path.basename(watcher.designspace_path)))
+    assert read_tree(watcher.master_dir) == read_tree(expected_dir)
+
+
+@pytest.fixture
+def glyphs_file(tmpdir):
+    path = os.path.join(str(tmpdir), 'GlyphsUnitTestSans.glyphs')
+    shutil.copy(os.path.join(DATA, 'GlyphsUnitTestSans.glyphs'), path)
+    return path
+
+
+@pytest.fixture
+def watcher(tmpdir, glyphs_file):
+    return GlyphsWatcher(glyphs_file, os.path.join(str(tmpdir), 'master_ufo'))
+
+
+def test_first_update(tmpdir, watcher):
+    written = watcher.update()
+    assert os.path.join(
+        watcher.master_dir, 'GlyphsUnitTestSans.designspace') in written
+    assert_same_as_build_masters(tmpdir, watcher)
+
+    # Nothing changed
+    assert watcher.update() is None
+    stat = os.stat(watcher.glyphs_file)
+    os.utime(watcher.glyphs_file, (stat.st_atime, stat.st_mtime + 10))
+    assert watcher.update() is None
+
+
+def test_edit_glyph_outline(tmpdir, watcher):
+    watcher.update()
+    edit(watcher.glyphs_file, '"555 700 LINE"', '"556 700 LINE"')
+    # Only the .glif files whose contents changed are written
+    assert watcher.update() == [os.path.join(
+        watcher.master_dir, 'GlyphsUnitTestSans-Bold.ufo', 'glyphs',
+        'A_.glif')]
+    assert_same_as_build_masters(tmpdir, watcher)
+
+
+def test_edit_glyph_attribute(tmpdir, watcher):
+    watcher.update()
+    edit(watcher.glyphs_file, 'leftKerningGroup = A;',
+         'leftKerningGroup = Alpha;')
+    written = watcher.update()
+    assert any(path.endswith('groups.plist') for path in written)
+    assert_same_as_build_masters(tmpdir, watcher)
+
+
+def test_edit_font(tmpdir, watcher):
+    watcher.update()
+    old_ufo = os.path.join(watcher.master_dir, 'GlyphsUnitTestSans-Bold.ufo')
+    assert os.path.isdir(old_ufo)
+    edit(watcher.glyphs_file, 'familyName = "Glyphs Unit Test Sans";',
+         'familyName = "Glyphs Unit Test Serif";')
+    written = watcher.update()
+    assert old_ufo in written
+    assert not os.path.exists(old_ufo)
+    assert_same_as_build_masters(tmpdir, watcher)
+
+
+def test_edit_components(tmpdir, watcher):
+    watcher.update()
+    # Adieresis loses the anchors propagated from A, and with them its
+    # GDEF class in features.fea
+    for _ in range(3):
+        edit(watcher.glyphs_file, '{\nname = A;\n},\n{\nname = dieresis;',
+             '{\nname = dieresis;')
+    watcher.update()
+    assert_same_as_build_masters(tmpdir, watcher)
+
+
+def test_add_glyph(tmpdir, watcher):
+    watcher.update()
+    edit(watcher.glyphs_file, 'glyphname = A;',
+         'glyphname = B.alt;\nlayers = ();\n},\n{\nglyphname = A;')
+    watcher.update()
+    assert_same_as_build_masters(tmpdir, watcher)
+
+
+def test_parse_error(tmpdir, watcher):
+    watcher.update()
+    with io.open(watcher.glyphs_file, encoding='utf-8') as fp:
+        text = fp.read()
+    with io.open(watcher.glyphs_file, 'w', encoding='utf-8') as fp:
+        fp.write(text[:len(text) // 2])
+    with pytest.raises(ValueError):
+        watcher.update()
+    assert watcher.font is None
+
+    with io.open(watcher.glyphs_file, 'w', encoding='utf-8') as fp:
+        fp.write(text.replace('"555 700 LINE"', '"556 700 LINE"'))
+    assert watcher.update()
+    assert_same_as_build_masters(tmpdir, watcher)
+
+
+def test_watch(tmpdir, watcher):
+    updates = []
+    checks = []
+
+    def callback(written, seconds):
+        updates.append(written)
+
+    def should_stop():
+        checks.append(None)
+        if len(checks) == 2:
+            edit(watcher.glyphs_file, '"555 700 LINE"', '"556 700 LINE"')
+        return len(updates) == 2 or len(checks) > 100
+
+    watcher.watch(interval=0.01, debounce=0.02, callback=callback,
+                  should_stop=should_stop)
+    assert len(updates) == 2
+    assert all(path.endswith('.glif') for path in updates[1])
+    assert_same_as_build_masters(tmpdir, watcher)